@@ -1,9 +1,10 @@
 """
 Main entry point for the barcoder package.
-This allows running the application using 'python -m barcoder'.
+This allows running the application using 'python -m barcoder',
+or headless commands such as 'python -m barcoder decode <paths>'.
 """
 
-from barcoder.core.main import run_application
+from barcoder.core.cli import main
 
 if __name__ == "__main__":
-    run_application()
+    main()
@@ -0,0 +1,253 @@
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from barcoder.core.decoder import FrameDecoder
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.m4v', '.webm', '.mpg', '.mpeg'}
+
+# Decoder used by image worker processes, created by _init_image_worker
+_worker_decoder = None
+
+
+def source_kind(path):
+    """Return 'image', 'video' or None depending on the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return 'image'
+    if extension in VIDEO_EXTENSIONS:
+        return 'video'
+    return None
+
+
+def expand_inputs(inputs):
+    """Expand directories and glob patterns into a sorted list of image and video files"""
+    sources = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            paths = []
+            for root, _, files in os.walk(pattern):
+                paths.extend(os.path.join(root, name) for name in files)
+        elif glob.has_magic(pattern):
+            paths = glob.glob(pattern, recursive=True)
+        else:
+            paths = [pattern]
+
+        for path in sorted(paths):
+            if os.path.isfile(path) and source_kind(path) is not None:
+                sources.append(path)
+    return sources
+
+
+def barcode_record(barcode):
+    """Convert a pyzbar result into a JSON-serialisable dict"""
+    return {
+        "data": barcode.data.decode('utf-8', errors='replace'),
+        "type": barcode.type,
+        "rect": list(barcode.rect)
+    }
+
+
+def _init_image_worker(settings):
+    """Create the per-process decoder used for still images"""
+    global _worker_decoder
+    from barcoder.utils.zbar_finder import load_zbar_library
+    load_zbar_library()
+    # Unrelated images: no tracking or change gating between them
+    _worker_decoder = FrameDecoder.from_settings(settings, workers=0, roi_tracking=False, change_gate=False)
+
+
+def _decode_image_file(path):
+    """Read and decode one image file (runs in a worker process)"""
+    image = cv2.imread(path)
+    if image is None:
+        return {"source": path, "frame": 0, "timestamp": None, "error": "unreadable image"}
+    barcodes = _worker_decoder.decode(image)
+    return {
+        "source": path,
+        "frame": 0,
+        "timestamp": None,
+        "barcodes": [barcode_record(barcode) for barcode in barcodes]
+    }
+
+
+def decode_images(paths, settings, workers):
+    """Decode image files on a process pool, yielding records in input order"""
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_image_worker, initargs=(settings,)) as pool:
+        yield from pool.imap(_decode_image_file, paths, chunksize=4)
+
+
+def decode_video(path, decoder, frame_step=1):
+    """Decode a video file frame by frame, yielding records in frame order"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        yield {"source": path, "frame": 0, "timestamp": None, "error": "unreadable video"}
+        return
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or None
+    # Keep the decode pool busy while the next frames are being read
+    window = decoder.max_in_flight * 2
+    pending = deque()
+
+    def record(index, future):
+        return {
+            "source": path,
+            "frame": index,
+            "timestamp": round(index / fps, 3) if fps else None,
+            "barcodes": [barcode_record(barcode) for barcode in future.result()]
+        }
+
+    try:
+        with ThreadPoolExecutor(max_workers=decoder.max_in_flight) as executor:
+            index = 0
+            while True:
+                if index % frame_step:
+                    # Skipped frames only need to be grabbed, not decoded into images
+                    if not cap.grab():
+                        break
+                    index += 1
+                    continue
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                pending.append((index, executor.submit(decoder.decode, frame)))
+                index += 1
+
+                while len(pending) >= window:
+                    yield record(*pending.popleft())
+
+            while pending:
+                yield record(*pending.popleft())
+    finally:
+        cap.release()
+
+
+class JsonLinesWriter:
+    """Writes one JSON object per decoded frame"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+
+
+class CsvWriter:
+    """Writes one row per decoded barcode, and one empty row per frame without barcodes"""
+
+    FIELDS = ["source", "frame", "timestamp", "data", "type", "left", "top", "width", "height", "error"]
+
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=self.FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        base = {"source": record["source"], "frame": record["frame"], "timestamp": record["timestamp"]}
+        if "error" in record:
+            self.writer.writerow(dict(base, error=record["error"]))
+            return
+        if not record["barcodes"]:
+            self.writer.writerow(base)
+        for barcode in record["barcodes"]:
+            left, top, width, height = barcode["rect"]
+            self.writer.writerow(dict(
+                base, data=barcode["data"], type=barcode["type"],
+                left=left, top=top, width=width, height=height
+            ))
+
+
+def _runs(sources):
+    """Group consecutive sources of the same kind, so output keeps the input order"""
+    run_kind, run = None, []
+    for path in sources:
+        kind = source_kind(path)
+        if kind != run_kind and run:
+            yield run_kind, run
+            run = []
+        run_kind = kind
+        run.append(path)
+    if run:
+        yield run_kind, run
+
+
+def run_batch(inputs, output=None, output_format=None, workers=None, settings=None, frame_step=1):
+    """
+    Decode image files and videos without a GUI or camera
+
+    Args:
+        inputs: Image/video files, directories or glob patterns
+        output: Output file path (None writes to stdout)
+        output_format: 'jsonl' or 'csv' (guessed from the output extension if None)
+        workers: Number of decode processes (defaults to the number of CPUs)
+        settings: Application settings used to configure decoding
+        frame_step: Decode every Nth video frame
+
+    Returns:
+        Dict with the number of sources, frames, barcodes and the throughput
+    """
+    settings = settings or {}
+    workers = workers or os.cpu_count() or 1
+    if output_format is None:
+        output_format = 'csv' if output and output.lower().endswith('.csv') else 'jsonl'
+
+    sources = expand_inputs(inputs)
+    if not sources:
+        print("No image or video files found", file=sys.stderr)
+
+    stream = open(output, 'w', newline='') if output else sys.stdout
+    writer = CsvWriter(stream) if output_format == 'csv' else JsonLinesWriter(stream)
+
+    stats = {"sources": len(sources), "frames": 0, "barcodes": 0, "errors": 0}
+    start = time.perf_counter()
+    last_report = start
+    video_decoder = None
+
+    try:
+        for kind, paths in _runs(sources):
+            if kind == 'image':
+                records = decode_images(paths, settings, workers)
+            else:
+                if video_decoder is None:
+                    # Frames are decoded concurrently and may finish out of order, so
+                    # state carried from one frame to the next would make results vary
+                    video_decoder = FrameDecoder.from_settings(
+                        settings, workers=workers, max_in_flight=workers + 1, roi_tracking=False, change_gate=False
+                    )
+                records = (record for path in paths for record in decode_video(path, video_decoder, frame_step))
+
+            for record in records:
+                writer.write(record)
+                stats["frames"] += 1
+                stats["barcodes"] += len(record.get("barcodes", []))
+                stats["errors"] += "error" in record
+
+                now = time.perf_counter()
+                if now - last_report >= 2.0:
+                    last_report = now
+                    print(f"{stats['frames']} frames, {stats['frames'] / (now - start):.1f} fps", file=sys.stderr)
+    finally:
+        if video_decoder is not None:
+            video_decoder.close()
+        if output:
+            stream.close()
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["fps"] = round(stats["frames"] / elapsed, 1) if elapsed > 0 else 0.0
+    print(
+        f"Decoded {stats['frames']} frames from {stats['sources']} sources in {elapsed:.1f} s "
+        f"({stats['fps']} fps), {stats['barcodes']} barcodes, {stats['errors']} errors",
+        file=sys.stderr
+    )
+    return stats
@@ -0,0 +1,177 @@
+import time
+
+import cv2
+
+# Capture backends that can be selected with camera_backend
+BACKENDS = {
+    "any": cv2.CAP_ANY,
+    "v4l2": cv2.CAP_V4L2,
+    "gstreamer": cv2.CAP_GSTREAMER,
+    "ffmpeg": cv2.CAP_FFMPEG,
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+    "avfoundation": cv2.CAP_AVFOUNDATION
+}
+
+# Modes tried by probe_modes; OpenCV cannot list what a camera supports, so
+# each one is requested and kept if the camera actually switches to it
+PROBE_FOURCCS = ("MJPG", "YUYV")
+PROBE_RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080), (2560, 1440), (3840, 2160))
+
+
+def parse_device(device):
+    """Return a camera index for numeric devices, otherwise the path or pipeline string"""
+    if isinstance(device, str) and device.strip().isdigit():
+        return int(device)
+    return device
+
+
+def fourcc_code(fourcc):
+    """Convert a four character code such as 'MJPG' to the integer OpenCV expects"""
+    return cv2.VideoWriter_fourcc(*fourcc.ljust(4)[:4])
+
+
+def fourcc_string(code):
+    """Convert an integer FOURCC reported by OpenCV back to its four characters"""
+    code = int(code)
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ")
+
+
+def open_camera(device=0, backend="any", width=0, height=0, fps=0, fourcc="", buffer_size=0):
+    """
+    Open a camera and apply the requested capture mode
+
+    Zero or empty values leave the camera's default in place. The FOURCC is
+    set before the resolution and frame rate, since many V4L2 drivers only
+    offer high resolutions at full frame rate with MJPEG.
+
+    Args:
+        device: Camera index, device path (e.g. /dev/video2) or GStreamer pipeline
+        backend: Key of BACKENDS
+        width: Frame width in pixels
+        height: Frame height in pixels
+        fps: Requested frame rate
+        fourcc: Pixel format such as "MJPG" or "YUYV"
+        buffer_size: Number of frames the driver buffers (1 for the lowest latency)
+
+    Returns:
+        The cv2.VideoCapture, which may not be opened if the device is unavailable
+    """
+    if backend not in BACKENDS:
+        print(f"Unknown camera backend '{backend}', using the default")
+    cap = cv2.VideoCapture(parse_device(device), BACKENDS.get(backend, cv2.CAP_ANY))
+    if not cap.isOpened():
+        print(f"Failed to open camera {device}")
+        return cap
+
+    if fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, fourcc_code(fourcc))
+    if width and height:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    if buffer_size:
+        # Not every backend supports this; set() then simply returns False
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+    return cap
+
+
+def camera_from_settings(settings):
+    """Open the camera configured in a settings dict"""
+    return open_camera(
+        device=settings.get("camera_device", 0),
+        backend=settings.get("camera_backend", "any"),
+        width=settings.get("camera_width", 0),
+        height=settings.get("camera_height", 0),
+        fps=settings.get("camera_fps", 0),
+        fourcc=settings.get("camera_fourcc", ""),
+        buffer_size=settings.get("camera_buffer_size", 0)
+    )
+
+
+def describe_camera(cap):
+    """Return the mode the camera is actually running in"""
+    return {
+        "backend": cap.getBackendName(),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": round(cap.get(cv2.CAP_PROP_FPS), 1),
+        "fourcc": fourcc_string(cap.get(cv2.CAP_PROP_FOURCC)),
+        "buffer_size": int(cap.get(cv2.CAP_PROP_BUFFERSIZE))
+    }
+
+
+def measure_camera(cap, frames=60, warmup=5, pause=0.5):
+    """
+    Measure the frame rate and buffering latency of an opened camera
+
+    The frame rate is timed over consecutive reads. To estimate latency the
+    camera is then left alone for `pause` seconds: reads that return
+    immediately afterwards come from the driver's buffer, and each of them
+    is a frame interval by which the image lags behind the scene.
+
+    Returns:
+        Dict with the measured fps, mean read time, buffered frames and the
+        latency those add, or None if no frames could be read
+    """
+    for _ in range(warmup):
+        cap.read()
+
+    read_times = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        before = time.perf_counter()
+        ret, _ = cap.read()
+        if not ret:
+            return None
+        read_times.append(time.perf_counter() - before)
+    elapsed = time.perf_counter() - start
+    fps = frames / elapsed
+    interval = 1.0 / fps
+
+    time.sleep(pause)
+    buffered = 0
+    while buffered < 32:
+        before = time.perf_counter()
+        if not cap.read()[0] or time.perf_counter() - before > interval / 3:
+            break
+        buffered += 1
+
+    return {
+        "measured_fps": round(fps, 1),
+        "read_ms": round(1000 * sum(read_times) / len(read_times), 1),
+        "buffered_frames": buffered,
+        "buffer_latency_ms": round(1000 * buffered * interval, 1)
+    }
+
+
+def probe_modes(device=0, backend="any", frames=60, fourccs=PROBE_FOURCCS, resolutions=PROBE_RESOLUTIONS):
+    """
+    Try common capture modes on a camera and measure each one it accepts
+
+    Returns:
+        List of dicts describing each distinct mode with its measurements
+    """
+    results = []
+    seen = set()
+    for fourcc in fourccs:
+        for width, height in resolutions:
+            cap = open_camera(device, backend, width, height, fourcc=fourcc)
+            if not cap.isOpened():
+                return results
+            try:
+                mode = describe_camera(cap)
+                key = (mode["fourcc"], mode["width"], mode["height"])
+                # Cameras fall back to the nearest mode they support, so skip repeats
+                if key in seen:
+                    continue
+                seen.add(key)
+                measurement = measure_camera(cap, frames=frames)
+            finally:
+                cap.release()
+
+            if measurement is not None:
+                mode.update(measurement)
+                results.append(mode)
+    return results
@@ -0,0 +1,106 @@
+import sys
+import argparse
+
+# Imported first so start-up timings include everything that follows
+from barcoder.core.startup import PROCESS_START
+
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(
+        prog="barcoder",
+        description="Barcode Scanner and Image Capture Application. Run without a command to start the GUI."
+    )
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="Report import and initialization timings and the time to the first camera frame"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    decode_parser = subparsers.add_parser(
+        "decode", help="Decode barcodes from image folders, globs or video files without a GUI"
+    )
+    decode_parser.add_argument("inputs", nargs="+", help="Image/video files, directories or glob patterns")
+    decode_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    decode_parser.add_argument(
+        "-f", "--format", choices=["jsonl", "csv"],
+        help="Output format (default: from the output extension, else jsonl)"
+    )
+    decode_parser.add_argument(
+        "-j", "--workers", type=int, help="Number of decode processes (default: number of CPUs)"
+    )
+    decode_parser.add_argument(
+        "--frame-step", type=int, default=1, help="Decode every Nth frame of videos (default: 1)"
+    )
+    decode_parser.add_argument("--settings", help="Settings file to read decode options from")
+
+    probe_parser = subparsers.add_parser(
+        "probe", help="List the capture modes a camera accepts and measure their frame rate and latency"
+    )
+    probe_parser.add_argument("--device", help="Camera index or device path (default: camera_device setting)")
+    probe_parser.add_argument(
+        "--backend", help="Capture backend, e.g. v4l2 or gstreamer (default: camera_backend setting)"
+    )
+    probe_parser.add_argument("--frames", type=int, default=60, help="Frames timed per mode (default: 60)")
+    probe_parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    probe_parser.add_argument("--settings", help="Settings file to read the camera options from")
+
+    return parser
+
+
+def run_probe(args):
+    """Probe the configured camera and print one line per mode"""
+    import json
+    from barcoder.core.camera import probe_modes
+    from barcoder.core.settings import SETTINGS_PATH, read_settings
+
+    settings = read_settings(args.settings or SETTINGS_PATH)
+    device = args.device if args.device is not None else settings.get("camera_device", 0)
+    backend = args.backend or settings.get("camera_backend", "any")
+
+    modes = probe_modes(device, backend, frames=max(args.frames, 1))
+    if args.json:
+        print(json.dumps(modes, indent=2))
+    elif not modes:
+        print(f"No frames could be read from camera {device}")
+    else:
+        for mode in modes:
+            print(
+                f"{mode['fourcc']:4} {mode['width']}x{mode['height']} @ {mode['fps']} fps reported: "
+                f"{mode['measured_fps']} fps measured, {mode['read_ms']} ms per read, "
+                f"{mode['buffered_frames']} buffered frames ({mode['buffer_latency_ms']} ms) [{mode['backend']}]"
+            )
+    return 0 if modes else 1
+
+
+def main(argv=None):
+    """Entry point for the barcoder command"""
+    args = build_parser().parse_args(argv)
+
+    if args.command == "decode":
+        # Only the headless path is imported here, so no Qt or camera is needed
+        from barcoder.utils.zbar_finder import load_zbar_library
+        load_zbar_library()
+
+        from barcoder.core.batch import run_batch
+        from barcoder.core.settings import SETTINGS_PATH, read_settings
+
+        stats = run_batch(
+            args.inputs,
+            output=args.output,
+            output_format=args.format,
+            workers=args.workers,
+            settings=read_settings(args.settings or SETTINGS_PATH),
+            frame_step=max(args.frame_step, 1)
+        )
+        sys.exit(1 if stats["errors"] else 0)
+
+    if args.command == "probe":
+        sys.exit(run_probe(args))
+
+    from barcoder.core.main import run_application
+    run_application(profile_startup=args.profile_startup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import queue
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Shared memory blocks this worker process has attached to, keyed by name
+_attached = {}
+# Upper bound on cached attachments; slots are only replaced when frames grow
+_MAX_ATTACHED = 32
+
+
+def _init_worker():
+    """Make sure every worker process can find the ZBar library"""
+    from barcoder.utils.zbar_finder import load_zbar_library
+    load_zbar_library()
+
+
+def _attach(name):
+    """Attach to a shared memory block created by the parent process"""
+    shm = _attached.get(name)
+    if shm is not None:
+        return shm
+
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag; spawned workers share the parent's
+        # resource tracker, so registering the block again is harmless
+        shm = shared_memory.SharedMemory(name=name)
+
+    if len(_attached) >= _MAX_ATTACHED:
+        oldest = next(iter(_attached))
+        _attached.pop(oldest).close()
+    _attached[name] = shm
+    return shm
+
+
+def _decode_shared(seq, name, shape, dtype):
+    """Decode the frame stored in a shared memory block (runs in a worker process)"""
+    from pyzbar.pyzbar import decode
+
+    shm = _attach(name)
+    image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    return seq, decode(image)
+
+
+class _SharedSlot:
+    """A shared memory block that holds one frame while it is being decoded"""
+
+    def __init__(self, nbytes=0):
+        self.shm = None
+        self._allocate(max(nbytes, 1))
+
+    def _allocate(self, nbytes):
+        if self.shm is not None:
+            self.release()
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, image):
+        """Copy a frame into the block, growing it if the frame does not fit"""
+        if image.nbytes > self.shm.size:
+            self._allocate(image.nbytes)
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=self.shm.buf)
+        np.copyto(view, image)
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+class DecodePool:
+    """
+    Decodes frames in parallel on a pool of worker processes
+
+    Frames are copied once into a shared memory slot and only the slot name
+    and shape are sent to the worker, so large frames never go through
+    pickling. At most max_in_flight frames are being decoded at any time;
+    submit() blocks until a slot is free. Every result is tagged with the
+    sequence number of its frame. With several frames in flight results can
+    complete out of order; the pool delivers all of them, and the consumer
+    drops stale ones by comparing sequence numbers (the GUI does so in
+    handle_barcodes).
+    """
+
+    def __init__(self, workers=2, max_in_flight=None):
+        """
+        Initialize the decode pool
+
+        Args:
+            workers: Number of worker processes
+            max_in_flight: Maximum number of frames being decoded at once
+                           (defaults to the number of workers)
+        """
+        self.workers = workers
+        self.max_in_flight = max_in_flight or workers
+        # Spawn rather than fork so workers do not inherit Qt or camera state
+        context = multiprocessing.get_context("spawn")
+        self._pool = context.Pool(workers, initializer=_init_worker)
+
+        self._slots = []
+        self._free_slots = queue.Queue()
+        for _ in range(self.max_in_flight):
+            slot = _SharedSlot()
+            self._slots.append(slot)
+            self._free_slots.put(slot)
+
+        self._lock = threading.Lock()
+        self._next_seq = 0
+
+    def submit(self, seq, image):
+        """
+        Queue a frame for decoding
+
+        Args:
+            seq: Sequence number of the frame
+            image: Frame as a NumPy array
+
+        Returns:
+            multiprocessing AsyncResult whose value is (seq, barcodes); get()
+            raises the worker's exception if decoding failed
+        """
+        slot = self._free_slots.get()
+        try:
+            slot.write(image)
+        except Exception:
+            self._free_slots.put(slot)
+            raise
+
+        def free_slot(_):
+            self._free_slots.put(slot)
+
+        return self._pool.apply_async(
+            _decode_shared,
+            (seq, slot.name, image.shape, image.dtype.str),
+            callback=free_slot,
+            error_callback=free_slot
+        )
+
+    def decode(self, image, seq=None):
+        """
+        Decode a frame and wait for the result
+
+        A failure in the worker is raised here; DecodeThread counts and reports it.
+        """
+        if seq is None:
+            with self._lock:
+                self._next_seq += 1
+                seq = self._next_seq
+        return self.submit(seq, image).get()[1]
+
+    def close(self):
+        """Shut down the worker processes and free the shared memory"""
+        self._pool.terminate()
+        self._pool.join()
+        for slot in self._slots:
+            slot.release()
+        self._slots = []
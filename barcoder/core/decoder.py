@@ -0,0 +1,103 @@
+from barcoder.core.decode_pool import DecodePool
+from barcoder.core.roi import RoiTracker
+from barcoder.core.preprocess import Preprocessor, StageTimings
+from barcoder.core.motion import ChangeGate
+
+
+class FrameDecoder:
+    """Decodes barcodes in camera frames, in-process or on a DecodePool"""
+
+    def __init__(self, workers=0, max_in_flight=2, roi_tracking=True, roi_padding=0.5,
+                 roi_full_scan_interval=15, grayscale=True, scale=1.0, retry_native=True,
+                 change_gate=True, change_threshold=4.0, change_refresh_interval=5.0, pool=None):
+        """
+        Initialize the frame decoder
+
+        Args:
+            workers: Number of decode worker processes (0 decodes in-process)
+            max_in_flight: Maximum number of frames decoded concurrently
+            roi_tracking: Decode around the last seen barcode before the full frame
+            roi_padding: Padding around the tracked barcode, as a fraction of its size
+            roi_full_scan_interval: Force a full-frame scan every this many frames
+            grayscale: Convert frames to grayscale once before decoding
+            scale: Downscale factor for full-frame scans (1.0 disables downscaling)
+            retry_native: Retry at native resolution when the downscaled pass misses
+            change_gate: Skip decoding frames that have not changed since the last decode
+            change_threshold: Mean thumbnail difference (0-255) that counts as a change
+            change_refresh_interval: Decode at least this often (seconds) while skipping
+            pool: DecodePool shared with other decoders; used instead of creating
+                  one from workers, and left open by close()
+        """
+        self.gate = None
+        if change_gate:
+            self.gate = ChangeGate(threshold=change_threshold, refresh_interval=change_refresh_interval)
+        self.last_barcodes = []
+
+        self.timings = StageTimings()
+        self.preprocessor = Preprocessor(
+            grayscale=grayscale, scale=scale, retry_native=retry_native, timings=self.timings
+        )
+
+        self.tracker = None
+        if roi_tracking:
+            self.tracker = RoiTracker(padding=roi_padding, full_scan_interval=roi_full_scan_interval)
+
+        self.pool = pool
+        self._owns_pool = False
+        if pool is None and workers > 0:
+            self.pool = DecodePool(workers=workers, max_in_flight=max_in_flight)
+            self._owns_pool = True
+        self.max_in_flight = self.pool.max_in_flight if self.pool is not None else 1
+
+    @classmethod
+    def from_settings(cls, settings, **overrides):
+        """Create a frame decoder configured from the application settings, with optional overrides"""
+        options = dict(
+            workers=settings.get("decode_workers", 0),
+            max_in_flight=settings.get("decode_max_in_flight", 2),
+            roi_tracking=settings.get("roi_tracking", True),
+            roi_padding=settings.get("roi_padding", 0.5),
+            roi_full_scan_interval=settings.get("roi_full_scan_interval", 15),
+            grayscale=settings.get("preprocess_grayscale", True),
+            scale=settings.get("decode_scale", 1.0),
+            retry_native=settings.get("decode_retry_native", True),
+            change_gate=settings.get("change_gate", True),
+            change_threshold=settings.get("change_threshold", 4.0),
+            change_refresh_interval=settings.get("change_refresh_interval", 5.0)
+        )
+        options.update(overrides)
+        return cls(**options)
+
+    def decode(self, image):
+        """Return the barcodes found in an image, in the image's coordinates"""
+        if self.gate is not None:
+            with self.timings.measure("gate"):
+                changed = self.gate.changed(image)
+            if not changed:
+                # Scene is static, the previous result still applies
+                return self.last_barcodes
+
+        gray = self.preprocessor.to_gray(image)
+        if self.tracker is not None:
+            barcodes = self.tracker.decode(gray, self._decode, full_decode_fn=self._decode_full)
+        else:
+            barcodes = self._decode_full(gray)
+        self.last_barcodes = barcodes
+        return barcodes
+
+    def _decode_full(self, image):
+        return self.preprocessor.decode(image, self._decode)
+
+    def _decode(self, image):
+        with self.timings.measure("decode"):
+            if self.pool is not None:
+                return self.pool.decode(image)
+            # Imported on first use, which loads ZBar off the start-up path
+            from pyzbar.pyzbar import decode
+            return decode(image)
+
+    def close(self):
+        """Release the worker processes, if this decoder created them"""
+        if self.pool is not None and self._owns_pool:
+            self.pool.close()
+        self.pool = None
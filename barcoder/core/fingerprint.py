@@ -0,0 +1,157 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Extensions of the capture formats (see CAPTURE_EXTENSIONS in barcoder.core.writer)
+CAPTURE_FILE_EXTENSIONS = ('.jpg', '.webp')
+
+# Separates a barcode from its capture's version number. Capture names never
+# contain it otherwise (see capture_name), so "ABC~v2" can only be version 2 of ABC.
+VERSION_SEPARATOR = "~v"
+
+
+def capture_name(barcode):
+    """Return the file name stem for a barcode's captures, with path and version separators replaced"""
+    for char in ('/', '\\', ':', '~'):
+        barcode = barcode.replace(char, '_')
+    return barcode
+
+
+def dhash(image, size=8):
+    """
+    Return the difference hash of an image, as an integer of size * size bits
+
+    The image is reduced to size + 1 by size grey levels, and each bit tells
+    whether a pixel is brighter than its right neighbour. Sensor noise and
+    recompression flip few bits, so the Hamming distance between two hashes
+    measures how different the images look.
+
+    Args:
+        image: BGR or grayscale image
+        size: Number of rows of the reduced image
+    """
+    # Every few pixels still leave at least 16 by 16 samples to average per cell,
+    # at a fraction of the cost of averaging the whole frame
+    height, width = image.shape[:2]
+    step = max(1, min(height // (16 * size), width // (16 * (size + 1))))
+    small = cv2.resize(image[::step, ::step], (size + 1, size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def hamming(a, b):
+    """Return the number of bits that differ between two hashes"""
+    return bin(a ^ b).count("1")
+
+
+class CaptureIndex:
+    """
+    Fingerprints of the captures saved for each barcode, to skip repeats and version the rest
+
+    The first capture of a barcode is saved as <name>.jpg, later ones as
+    <name>~v2.jpg, <name>~v3.jpg and so on, so no capture overwrites another
+    and each version is uploaded once. A capture whose dHash is within
+    max_distance bits of an earlier capture of the same barcode is the same
+    item photographed again and is not saved at all.
+
+    The captures already in the folder are fingerprinted the first time a
+    barcode is seen, reading the JPEGs at reduced size, so repeats are
+    recognised across restarts. The most recently used max_size barcodes are
+    kept in memory.
+    """
+
+    def __init__(self, max_distance=5, max_size=1024):
+        """
+        Initialize the index
+
+        Args:
+            max_distance: Largest Hamming distance (of 64 bits) at which two captures count
+                          as the same, or None to save every capture as a new version
+            max_size: Maximum number of barcodes whose captures are kept in memory
+        """
+        self.max_distance = max_distance
+        self.max_size = max_size
+        self._captures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, path, fingerprint):
+        """
+        Reserve the name a new capture is saved under, unless it repeats an earlier one
+
+        Args:
+            path: Path the capture would have without versioning, e.g. images/<barcode>.jpg
+            fingerprint: dhash() of the captured image
+
+        Returns:
+            (path to save the capture to, None), or (None, path of the earlier
+            capture) if the capture is a repeat
+        """
+        directory, name = os.path.split(path)
+        stem, extension = os.path.splitext(name)
+        key = self._key(path)
+        with self._lock:
+            captures = self._captures.pop(key, None)
+            if captures is None:
+                captures = self._load(directory, stem)
+            self._captures[key] = captures
+            while len(self._captures) > self.max_size:
+                self._captures.popitem(last=False)
+
+            if self.max_distance is not None:
+                for version, earlier_path, earlier in captures:
+                    if earlier is not None and hamming(fingerprint, earlier) <= self.max_distance:
+                        return None, earlier_path
+
+            version = max((version for version, _, _ in captures), default=0) + 1
+            if version > 1:
+                path = os.path.join(directory, f"{stem}{VERSION_SEPARATOR}{version}{extension}")
+            captures.append((version, path, fingerprint))
+            return path, None
+
+    def unclaim(self, path, claimed_path):
+        """
+        Give back a name claimed for a capture that could not be written
+
+        The version number is free again and the capture no longer counts as
+        an earlier one, so a retry of the same image is saved.
+
+        Args:
+            path: Path passed to claim()
+            claimed_path: Path claim() returned for it
+        """
+        with self._lock:
+            captures = self._captures.get(self._key(path))
+            if captures is not None:
+                captures[:] = [capture for capture in captures if capture[1] != claimed_path]
+
+    @staticmethod
+    def _key(path):
+        directory, name = os.path.split(path)
+        return os.path.join(directory, os.path.splitext(name)[0])
+
+    @staticmethod
+    def _load(directory, stem):
+        """Fingerprint the captures of a barcode already saved in directory"""
+        pattern = re.compile(re.escape(stem) + "(?:" + re.escape(VERSION_SEPARATOR) + r"(\d+))?(\.\w+)$")
+        captures = []
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return captures
+
+        for name in names:
+            match = pattern.fullmatch(name)
+            if match is None or match.group(2) not in CAPTURE_FILE_EXTENSIONS:
+                continue
+            path = os.path.join(directory, name)
+            image = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+            # An unreadable file still takes its version number
+            fingerprint = dhash(image) if image is not None else None
+            captures.append((int(match.group(1) or 1), path, fingerprint))
+        return captures
@@ -1,22 +1,39 @@
 import sys
-import os
 
-# First, load ZBar library before importing other modules
-from barcoder.utils.zbar_finder import load_zbar_library
-load_zbar_library()
+from barcoder.core.startup import StartupProfiler
 
-# Now import other modules that depend on ZBar
-from PyQt5.QtWidgets import QApplication
-from barcoder.gui.app import BarcodeCameraApp
 
-def run_application():
-    """Run the barcode scanner application"""
+def run_application(profile_startup=False):
+    """
+    Run the barcode scanner application
+
+    Args:
+        profile_startup: Print how long each start-up stage took once the
+                         first camera frame is on screen
+    """
+    # Settings are read before anything heavy is imported, for the start-up budget
+    from barcoder.core.settings import read_settings
+    profiler = StartupProfiler(budget_ms=read_settings().get("startup_budget_ms", 2000), verbose=profile_startup)
+
+    # Load ZBar before any module that depends on it is used
+    with profiler.stage("resolve ZBar library"):
+        from barcoder.utils.zbar_finder import load_zbar_library
+        load_zbar_library()
+
+    with profiler.stage("import Qt"):
+        from PyQt5.QtWidgets import QApplication
+    with profiler.stage("import application"):
+        from barcoder.gui.app import BarcodeCameraApp
+
     # Create Qt application
-    app = QApplication(sys.argv)
+    with profiler.stage("create QApplication"):
+        app = QApplication(sys.argv)
 
     # Create and show main window
-    window = BarcodeCameraApp()
-    window.show()
+    with profiler.stage("create window"):
+        window = BarcodeCameraApp(startup=profiler)
+    with profiler.stage("show window"):
+        window.show()
 
     # Start the application event loop
     sys.exit(app.exec_())
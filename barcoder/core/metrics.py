@@ -0,0 +1,405 @@
+import json
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets; they span a fast
+# ROI decode up to a slow upload over a poor connection
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def quantile(buckets, counts, q):
+    """
+    Estimate a quantile from histogram bucket counts
+
+    The value is interpolated linearly within the bucket the quantile falls
+    in, as Prometheus' histogram_quantile does.
+
+    Args:
+        buckets: Bucket upper bounds
+        counts: Non-cumulative count per bucket, plus one for values above the last bound
+        q: Quantile between 0 and 1
+
+    Returns:
+        The estimate, or None if there are no observations
+    """
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if index == len(buckets):
+                # Above the last bound there is nothing to interpolate towards
+                return buckets[-1]
+            lower = buckets[index - 1] if index > 0 else 0.0
+            return lower + (buckets[index] - lower) * (rank - seen) / count
+        seen += count
+    return buckets[-1]
+
+
+class Counter:
+    """A value that only goes up, such as a number of errors"""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        """Set the total, for counts a component keeps itself and a collector copies in"""
+        self.value = value
+
+
+class Gauge:
+    """A value that is set to its current level, such as a queue depth"""
+
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram:
+    """Distribution of durations over fixed buckets, with their count and sum"""
+
+    kind = "histogram"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus one for values above the last bound
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    @contextmanager
+    def time(self):
+        """Context manager that observes how long its body takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def counts(self):
+        """Return the non-cumulative count per bucket, the last one for values above every bound"""
+        with self._lock:
+            return list(self._counts)
+
+    def quantile(self, q):
+        return quantile(self.buckets, self.counts(), q)
+
+
+class LatencyWindow:
+    """Quantiles of a histogram over the observations made since the previous call"""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self._last = histogram.counts()
+
+    def quantiles(self, *qs):
+        """Return the requested quantiles in seconds (None without new observations) and start a new window"""
+        counts = self.histogram.counts()
+        delta = [count - last for count, last in zip(counts, self._last)]
+        self._last = counts
+        return [quantile(self.histogram.buckets, delta, q) for q in qs]
+
+
+class MetricsRegistry:
+    """
+    Named counters, gauges and histograms, exported as Prometheus text or JSON
+
+    Metrics are created on first use with counter(), gauge() or histogram()
+    and identified by their name and labels, so every caller asking for the
+    same series gets the same object. Hot paths should look a metric up once
+    and keep it. Values that components already track (frame counts, queue
+    depths, API calls) are instead read when metrics are collected, by
+    collectors registered with register_collector().
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._help = {}
+        self._kinds = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, *args):
+        key = (name, _label_key(labels))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                if self._kinds.setdefault(name, cls.kind) != cls.kind:
+                    raise ValueError(f"Metric {name} is a {self._kinds[name]}, not a {cls.kind}")
+                metric = self._metrics[key] = cls(*args)
+            if help:
+                self._help.setdefault(name, help)
+            return metric
+
+    def counter(self, name, help="", **labels):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help="", **labels):
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, help, labels, buckets)
+
+    def register_collector(self, key, collector):
+        """
+        Register a callable invoked before every collection to update metrics
+
+        A collector registered under an existing key replaces it, so a
+        component that is recreated does not leave a stale collector behind.
+        """
+        with self._lock:
+            self._collectors[key] = collector
+
+    def unregister_collector(self, key):
+        with self._lock:
+            self._collectors.pop(key, None)
+
+    def total(self, name):
+        """Return the sum of a counter's or gauge's values over all its labels, as of the last collection"""
+        with self._lock:
+            return sum(metric.value for (metric_name, _), metric in self._metrics.items()
+                       if metric_name == name and metric.kind != "histogram")
+
+    def collect(self):
+        """
+        Run the collectors and return every metric
+
+        Returns:
+            Dict of metric name to {"type", "help", "series"}, where series is a
+            list of (labels dict, metric) pairs
+        """
+        with self._lock:
+            collectors = list(self._collectors.values())
+        for collector in collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+
+        families = {}
+        with self._lock:
+            for (name, labels), metric in sorted(self._metrics.items()):
+                family = families.setdefault(
+                    name, {"type": metric.kind, "help": self._help.get(name, ""), "series": []}
+                )
+                family["series"].append((dict(labels), metric))
+        return families
+
+    def snapshot(self):
+        """Return every metric as plain data, as written by the JSON export"""
+        result = {}
+        for name, family in self.collect().items():
+            series = []
+            for labels, metric in family["series"]:
+                if metric.kind == "histogram":
+                    counts = metric.counts()
+                    value = {
+                        "count": metric.count,
+                        "sum": metric.sum,
+                        "buckets": dict(zip([str(bound) for bound in metric.buckets] + ["+Inf"], counts)),
+                        "p50": quantile(metric.buckets, counts, 0.5),
+                        "p95": quantile(metric.buckets, counts, 0.95)
+                    }
+                else:
+                    value = metric.value
+                series.append({"labels": labels, "value": value})
+            result[name] = {"type": family["type"], "help": family["help"], "series": series}
+        return result
+
+    def to_json(self):
+        return json.dumps({"timestamp": time.time(), "metrics": self.snapshot()}, indent=2)
+
+    def to_prometheus(self):
+        """Return every metric in the Prometheus text exposition format"""
+        lines = []
+        for name, family in self.collect().items():
+            if family["help"]:
+                lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for labels, metric in family["series"]:
+                if metric.kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(metric.value)}")
+                    continue
+
+                cumulative = 0
+                bounds = [_format_value(bound) for bound in metric.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, metric.counts()):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(dict(labels, le=bound))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(metric.sum)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# The application's registry, which every component records into
+REGISTRY = MetricsRegistry()
+
+
+class MetricsExporter:
+    """
+    Publishes a registry for dashboards, to a file and/or a local HTTP endpoint
+
+    The file is rewritten atomically every interval seconds, so a node
+    exporter textfile collector or a log shipper never reads it half
+    written. The HTTP server answers /metrics with Prometheus text and
+    /metrics.json with JSON.
+    """
+
+    def __init__(self, registry=REGISTRY, path=None, file_format="prometheus", interval=15.0,
+                 port=0, host="127.0.0.1"):
+        """
+        Initialize the exporter
+
+        Args:
+            registry: MetricsRegistry to export
+            path: File to write the metrics to (None disables the file)
+            file_format: "prometheus" or "json"
+            interval: Seconds between file updates
+            port: Port of the HTTP endpoint (0 disables it)
+            host: Address the HTTP endpoint listens on
+        """
+        self.registry = registry
+        self.path = path
+        self.file_format = file_format
+        self.interval = interval
+        self.port = port
+        self.host = host
+        self.server = None
+        self._thread = None
+        self._server_thread = None
+        self._stop_event = threading.Event()
+
+    @classmethod
+    def from_settings(cls, settings, registry=REGISTRY):
+        """Create an exporter from the application settings, or return None if export is disabled"""
+        path = settings.get("metrics_export_path") or None
+        port = settings.get("metrics_port", 0)
+        if path is None and not port:
+            return None
+        return cls(
+            registry,
+            path=path,
+            file_format=settings.get("metrics_export_format", "prometheus"),
+            interval=settings.get("metrics_export_interval", 15.0),
+            port=port
+        )
+
+    def render(self, file_format):
+        return self.registry.to_json() if file_format == "json" else self.registry.to_prometheus()
+
+    def write(self):
+        """Write the current metrics to the export file"""
+        # Imported here so the registry itself stays free of OpenCV
+        from barcoder.core.writer import write_atomic
+        try:
+            write_atomic(self.path, self.render(self.file_format).encode("utf-8"))
+        except Exception as e:
+            print(f"Failed to write metrics to {self.path}: {e}")
+
+    def start(self):
+        """Start writing the file and serving the endpoint, whichever are configured"""
+        if self.port:
+            # Imported here to keep http.server off the start-up path when no endpoint is configured
+            from http.server import ThreadingHTTPServer
+            try:
+                self.server = ThreadingHTTPServer((self.host, self.port), _handler(self))
+            except OSError as e:
+                print(f"Failed to serve metrics on {self.host}:{self.port}: {e}")
+            else:
+                self._server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+                self._server_thread.start()
+
+        if self.path:
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
+
+    def _worker(self):
+        while not self._stop_event.wait(self.interval):
+            self.write()
+
+    def stop(self):
+        """Stop the endpoint and write the file one last time"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+            self.write()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def _handler(exporter):
+    """Return a request handler class serving the exporter's metrics"""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+                body = exporter.render("prometheus")
+            elif path == "/metrics.json":
+                content_type = "application/json"
+                body = exporter.render("json")
+            else:
+                self.send_error(404)
+                return
+
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would otherwise flood the console
+            pass
+
+    return MetricsHandler
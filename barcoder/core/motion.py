@@ -0,0 +1,63 @@
+import time
+import threading
+
+import cv2
+
+
+class ChangeGate:
+    """
+    Cheap frame-difference detector used to skip decoding unchanged scenes
+
+    Each frame is shrunk to a small grayscale thumbnail and compared with the
+    thumbnail of the last frame that was let through. Frames whose mean
+    absolute difference stays under the threshold are skipped, so an empty
+    conveyor or a barcode held still costs a resize instead of a decode.
+    Comparing against the last decoded frame rather than the previous one
+    means slow drift still accumulates until it is large enough to matter.
+    """
+
+    def __init__(self, threshold=4.0, size=(64, 48), refresh_interval=5.0):
+        """
+        Initialize the gate
+
+        Args:
+            threshold: Mean absolute difference (0-255) that counts as a change
+            size: Thumbnail size (width, height) used for the comparison
+            refresh_interval: Let a frame through at least this often (seconds),
+                              even if nothing changed; 0 disables the refresh
+        """
+        self.threshold = threshold
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.passed = 0
+        self.skipped = 0
+        self._reference = None
+        self._reference_time = 0.0
+        self._lock = threading.Lock()
+
+    def _thumbnail(self, image):
+        # Subsample with a stride first so the area filter only has to average
+        # a few pixels per output pixel instead of reading the whole frame
+        width, height = self.size
+        step = max(1, min(image.shape[0] // (4 * height), image.shape[1] // (4 * width)))
+        small = cv2.resize(image[::step, ::step], self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def changed(self, image):
+        """Return True if the frame differs enough from the last one let through"""
+        small = self._thumbnail(image)
+        now = time.monotonic()
+
+        with self._lock:
+            if self._reference is not None and self._reference.shape == small.shape:
+                stale = self.refresh_interval and now - self._reference_time >= self.refresh_interval
+                if not stale and cv2.absdiff(small, self._reference).mean() < self.threshold:
+                    self.skipped += 1
+                    return False
+
+            self._reference = small
+            self._reference_time = now
+            self.passed += 1
+            return True
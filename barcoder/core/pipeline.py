@@ -0,0 +1,314 @@
+import sys
+import time
+import threading
+from collections import deque, namedtuple
+
+from barcoder.core.metrics import REGISTRY
+from barcoder.core.ring import FrameRing
+
+# A captured frame tagged with its capture sequence number and timestamp. Frames
+# from a FrameRing carry the slot their image lives in; whoever holds such a
+# frame holds a reference to the slot and must release it when done.
+Frame = namedtuple("Frame", ["seq", "timestamp", "image", "slot"], defaults=(None,))
+
+
+def release_frame(frame):
+    """Release the ring slot held by a frame, if it has one"""
+    if frame is not None and frame.slot is not None:
+        frame.slot.release()
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking producers"""
+
+    def __init__(self, maxsize=1, on_drop=None):
+        """
+        Initialize the queue
+
+        Args:
+            maxsize: Maximum number of items held before the oldest is dropped
+            on_drop: Optional callback invoked with each dropped item
+        """
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """
+        Add an item, dropping the oldest one if the queue is full. Returns True if an item was dropped.
+
+        Once the queue is closed the item itself is dropped, so nothing is left
+        holding it.
+        """
+        with self._cond:
+            dropped = None
+            if self._closed:
+                dropped = item
+            else:
+                if len(self._items) >= self.maxsize:
+                    dropped = self._items.popleft()
+                    self.dropped += 1
+                self._items.append(item)
+                self._cond.notify()
+
+        if dropped is None:
+            return False
+        if self.on_drop is not None:
+            self.on_drop(dropped)
+        return True
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, or None on timeout or when closed"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def get_nowait(self):
+        """Remove and return the oldest item, or None if the queue is empty"""
+        with self._cond:
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def qsize(self):
+        with self._cond:
+            return len(self._items)
+
+    def close(self):
+        """Wake up any waiting consumers so they can exit, dropping the items still queued"""
+        with self._cond:
+            self._closed = True
+            items, self._items = list(self._items), deque()
+            self._cond.notify_all()
+
+        if self.on_drop is not None:
+            for item in items:
+                self.on_drop(item)
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames from the camera and fans them out to the decode and render queues"""
+
+    def __init__(self, cap, queues, on_frame=None, ring=None, labels=None):
+        """
+        Initialize the capture thread
+
+        Args:
+            cap: An opened cv2.VideoCapture
+            queues: DropOldestQueue instances that receive every captured frame
+            on_frame: Optional callback invoked after a frame has been queued;
+                      it receives a reference to the frame that it must release
+            ring: Optional FrameRing whose slots the camera is read into
+            labels: Labels of this thread's metrics, e.g. the camera name
+        """
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.queues = queues
+        self.on_frame = on_frame
+        self.ring = ring
+        self.frames_captured = 0
+        self.frames_skipped = 0
+        self.read_seconds = REGISTRY.histogram(
+            "barcoder_capture_seconds", "Time to read a frame from the camera", **(labels or {})
+        )
+        self._stop_event = threading.Event()
+
+    def _read(self):
+        """
+        Read the next frame, into a ring slot if there is a ring
+
+        Returns:
+            (image, slot), (None, None) if the camera returned nothing, or
+            (None, False) if the frame was skipped because the ring was full
+        """
+        if self.ring is None:
+            with self.read_seconds.time():
+                ret, image = self.cap.read()
+            return (image, None) if ret else (None, None)
+
+        slot = self.ring.acquire()
+        if slot is None:
+            # Every slot is still held downstream; take the frame off the
+            # camera so its buffer does not fill up, but do not keep it.
+            # grab() waits for the camera, so this does not spin.
+            self.cap.grab()
+            self.frames_skipped += 1
+            return None, False
+
+        start = time.perf_counter()
+        ret, image = self.cap.read(slot.image)
+        self.read_seconds.observe(time.perf_counter() - start)
+        if not ret or image is None:
+            slot.release()
+            return None, None
+        self.ring.store(slot, image)
+        return image, slot
+
+    def run(self):
+        seq = 0
+        while not self._stop_event.is_set():
+            image, slot = self._read()
+            if slot is False:
+                continue
+            if image is None:
+                # Camera not ready or temporarily unavailable, back off briefly
+                time.sleep(0.05)
+                continue
+
+            seq += 1
+            self.frames_captured += 1
+            frame = Frame(seq, time.monotonic(), image, slot)
+            for frame_queue in self.queues:
+                if slot is not None:
+                    slot.retain()
+                frame_queue.put(frame)
+
+            # The capture thread's own reference passes to on_frame
+            if self.on_frame is not None:
+                self.on_frame(frame)
+            else:
+                release_frame(frame)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class DecodeThread(threading.Thread):
+    """Takes frames from a queue, decodes them and hands the results to a callback"""
+
+    def __init__(self, frame_queue, decode_fn, on_result, labels=None):
+        """
+        Initialize the decode worker
+
+        Args:
+            frame_queue: DropOldestQueue to take frames from
+            decode_fn: Callable that takes an image and returns a list of barcodes
+            on_result: Callback invoked with (frame, barcodes) for every decoded frame.
+                       frame.image is only valid during the call unless the
+                       callback retains frame.slot.
+            labels: Labels of this thread's metrics, e.g. the camera name
+        """
+        super().__init__(daemon=True)
+        self.frame_queue = frame_queue
+        self.decode_fn = decode_fn
+        self.on_result = on_result
+        self.frames_decoded = 0
+        labels = labels or {}
+        self.decode_seconds = REGISTRY.histogram(
+            "barcoder_decode_seconds", "Time to decode a frame, including skipped unchanged frames", **labels
+        )
+        self.errors = REGISTRY.counter("barcoder_decode_errors_total", "Frames that failed to decode", **labels)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            frame = self.frame_queue.get(timeout=0.1)
+            if frame is None:
+                continue
+
+            try:
+                with self.decode_seconds.time():
+                    barcodes = self.decode_fn(frame.image)
+                self.frames_decoded += 1
+                self.on_result(frame, barcodes)
+            except Exception as e:
+                self.errors.inc()
+                print(f"Decode error: {e}", file=sys.stderr)
+            finally:
+                release_frame(frame)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class FramePipeline:
+    """
+    Capture -> decode -> render pipeline
+
+    The capture thread reads frames as fast as the camera delivers them and
+    pushes each one into two bounded drop-oldest queues: one feeding the
+    decode workers and one holding the latest frame for display. A slow
+    decoder or a busy GUI therefore only causes frames to be skipped, never
+    the camera to fall behind. With more than one decode thread, results may
+    complete out of order; consumers should compare frame.seq and ignore
+    results older than the newest one they have applied.
+
+    Frames are read into the slots of a FrameRing and shared by reference
+    between the queues, the decode threads and the GUI, so memory use stays
+    flat. The ring needs a slot for the frame being captured, one for each
+    queued and each in-progress decode, the render queue and the frame on
+    screen, plus any the caller keeps (e.g. captures waiting to be saved).
+    """
+
+    def __init__(self, cap, decode_fn, on_result, on_frame=None, decode_threads=1, ring_size=None, labels=None,
+                 held_frames=0):
+        """
+        Initialize the pipeline
+
+        Args:
+            cap: An opened cv2.VideoCapture
+            decode_fn: Callable that takes an image and returns a list of barcodes
+            on_result: Callback invoked with (frame, barcodes) from the decode thread
+            on_frame: Optional callback invoked from the capture thread when a new
+                      frame is waiting in the render queue
+            decode_threads: Number of frames decoded concurrently
+            ring_size: Number of frame slots (default: enough for the pipeline, held_frames and four spare)
+            labels: Labels of the pipeline's metrics, e.g. the camera name
+            held_frames: Number of frames the caller keeps for longer, e.g. a
+                         SharpnessHistory, which the default ring size makes room for
+        """
+        self.cap = cap
+        if ring_size is None:
+            ring_size = 2 * decode_threads + 7 + held_frames
+        self.ring = FrameRing(ring_size)
+        self.decode_queue = DropOldestQueue(decode_threads, on_drop=release_frame)
+        self.render_queue = DropOldestQueue(1, on_drop=release_frame)
+        self._on_frame = on_frame
+
+        self.capture_thread = CaptureThread(
+            cap, [self.decode_queue], on_frame=self._frame_captured, ring=self.ring, labels=labels
+        )
+        self.decode_threads = [
+            DecodeThread(self.decode_queue, decode_fn, on_result, labels=labels) for _ in range(decode_threads)
+        ]
+
+    def _frame_captured(self, frame):
+        # The capture thread's reference moves into the render queue. Only
+        # notify when the previous frame was consumed, so a busy GUI gets one
+        # pending notification rather than a growing event backlog
+        if not self.render_queue.put(frame) and self._on_frame is not None:
+            self._on_frame(frame)
+
+    def start(self):
+        """Start the capture and decode threads"""
+        self.capture_thread.start()
+        for decode_thread in self.decode_threads:
+            decode_thread.start()
+
+    def stop(self):
+        """Stop the worker threads and wait briefly for them to exit"""
+        self.capture_thread.stop()
+        for decode_thread in self.decode_threads:
+            decode_thread.stop()
+        # Let the capture thread finish queueing its last frame, so closing
+        # the queues releases every slot they hold
+        self.capture_thread.join(timeout=1)
+        self.decode_queue.close()
+        self.render_queue.close()
+        for decode_thread in self.decode_threads:
+            decode_thread.join(timeout=1)
+
+    def latest_frame(self):
+        """
+        Return the newest captured frame that has not been rendered yet, or None
+
+        The caller takes over the frame's slot reference and must pass the
+        frame to release_frame() once it no longer needs the image.
+        """
+        return self.render_queue.get_nowait()
@@ -0,0 +1,130 @@
+import time
+import threading
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from barcoder.core.roi import offset_barcodes
+
+
+class StageTimings:
+    """Smoothed per-stage timings, safe to update from several threads"""
+
+    def __init__(self, smoothing=0.1):
+        """
+        Initialize the timings
+
+        Args:
+            smoothing: Weight of the newest sample in the moving average
+        """
+        self.smoothing = smoothing
+        self._averages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """Add a timing sample for a stage"""
+        with self._lock:
+            average = self._averages.get(stage)
+            if average is None:
+                self._averages[stage] = seconds
+            else:
+                self._averages[stage] = average + self.smoothing * (seconds - average)
+
+    @contextmanager
+    def measure(self, stage):
+        """Context manager that records how long its body takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def averages_ms(self):
+        """Return a dict of stage name to average duration in milliseconds"""
+        with self._lock:
+            return {stage: seconds * 1000 for stage, seconds in self._averages.items()}
+
+    def summary(self):
+        """Return the averages formatted for display"""
+        return ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in self.averages_ms().items())
+
+
+class Preprocessor:
+    """
+    Prepares frames for ZBar: one grayscale conversion and an optional downscale
+
+    pyzbar only ever looks at a single 8-bit channel and copies the pixels it
+    is given, so handing it a contiguous grayscale frame saves both a strided
+    channel copy and the colour information it would ignore anyway. Output
+    buffers are allocated once per decode thread and reused for every frame.
+    """
+
+    def __init__(self, grayscale=True, scale=1.0, retry_native=True, timings=None):
+        """
+        Initialize the preprocessor
+
+        Args:
+            grayscale: Convert frames to grayscale before decoding
+            scale: Downscale factor for full-frame scans (1.0 disables downscaling)
+            retry_native: Retry at native resolution when the downscaled pass misses
+            timings: StageTimings to record per-stage durations in
+        """
+        self.grayscale = grayscale
+        self.scale = scale
+        self.retry_native = retry_native
+        self.timings = timings if timings is not None else StageTimings()
+        self.retries = 0
+        # Reusable buffers, one set per decode thread
+        self._local = threading.local()
+
+    def _buffer(self, name, shape):
+        """Return the calling thread's buffer of the given shape, allocating it only on shape changes"""
+        buffer = getattr(self._local, name, None)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            setattr(self._local, name, buffer)
+        return buffer
+
+    def to_gray(self, image):
+        """Return the image as grayscale, converted into a reused buffer"""
+        if not self.grayscale or image.ndim == 2:
+            return image
+
+        with self.timings.measure("gray"):
+            gray = self._buffer("gray", image.shape[:2])
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+        return gray
+
+    def decode(self, image, decode_fn):
+        """
+        Decode a full frame, downscaled first if configured
+
+        Args:
+            image: Frame as a NumPy array, ideally already grayscale
+            decode_fn: Callable that takes an image and returns a list of barcodes
+
+        Returns:
+            List of barcodes in the coordinates of image
+        """
+        if self.scale >= 1.0:
+            return decode_fn(image)
+
+        height, width = image.shape[:2]
+        small_width = max(int(width * self.scale), 1)
+        small_height = max(int(height * self.scale), 1)
+
+        with self.timings.measure("downscale"):
+            small = self._buffer("small", (small_height, small_width) + image.shape[2:])
+            cv2.resize(image, (small_width, small_height), dst=small, interpolation=cv2.INTER_AREA)
+
+        barcodes = decode_fn(small)
+        if barcodes:
+            return offset_barcodes(barcodes, 0, 0, scale=width / small_width)
+        if not self.retry_native:
+            return barcodes
+
+        # Small or dense barcodes may not survive downscaling
+        self.retries += 1
+        with self.timings.measure("retry"):
+            return decode_fn(image)
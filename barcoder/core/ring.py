@@ -0,0 +1,81 @@
+import threading
+
+
+class FrameSlot:
+    """One preallocated frame buffer in a FrameRing"""
+
+    def __init__(self, ring, index):
+        self.ring = ring
+        self.index = index
+        self.image = None
+        self.refs = 0
+
+    def retain(self):
+        """Add a reference for another holder of the frame"""
+        self.ring.retain(self)
+        return self
+
+    def release(self):
+        """Drop a reference; the slot is reused once nobody holds it"""
+        self.ring.release(self)
+
+
+class FrameRing:
+    """
+    Fixed set of reusable frame buffers shared by capture, decode, display and save
+
+    The capture thread acquires a free slot and reads the camera straight
+    into its buffer. Every queue or consumer that keeps the frame holds a
+    reference, and the slot becomes free for the next capture when the last
+    reference is released. Nothing copies the pixels, and once each slot has
+    been filled with a frame of the camera's size no more buffers are
+    allocated. If every slot is still in use, acquire() returns None and the
+    caller drops the frame rather than allocating.
+    """
+
+    def __init__(self, size=6):
+        """
+        Initialize the ring
+
+        Args:
+            size: Number of frame slots
+        """
+        self.size = size
+        self.slots = [FrameSlot(self, index) for index in range(size)]
+        # Number of times a slot needed a new buffer (first fill or a change of frame size)
+        self.allocations = 0
+        # Number of times acquire() found no free slot
+        self.exhausted = 0
+        self._free = list(reversed(self.slots))
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return a free slot holding one reference, or None if every slot is in use"""
+        with self._lock:
+            if not self._free:
+                self.exhausted += 1
+                return None
+            slot = self._free.pop()
+            slot.refs = 1
+            return slot
+
+    def retain(self, slot):
+        with self._lock:
+            slot.refs += 1
+
+    def release(self, slot):
+        with self._lock:
+            slot.refs -= 1
+            if slot.refs == 0:
+                self._free.append(slot)
+
+    def store(self, slot, image):
+        """Record the array a read returned, counting it if it is not the slot's buffer"""
+        if image is not slot.image:
+            self.allocations += 1
+            slot.image = image
+
+    def in_use(self):
+        """Number of slots currently held"""
+        with self._lock:
+            return self.size - len(self._free)
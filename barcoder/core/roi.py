@@ -0,0 +1,120 @@
+import threading
+
+
+def offset_barcodes(barcodes, dx, dy, scale=1.0):
+    """Map barcode rects and polygons from crop (or downscaled) coordinates to frame coordinates"""
+    if dx == 0 and dy == 0 and scale == 1.0:
+        return barcodes
+
+    def position(value, offset):
+        return int(round(value * scale)) + offset
+
+    moved = []
+    for barcode in barcodes:
+        rect = barcode.rect._replace(
+            left=position(barcode.rect.left, dx),
+            top=position(barcode.rect.top, dy),
+            width=position(barcode.rect.width, 0),
+            height=position(barcode.rect.height, 0)
+        )
+        polygon = [point._replace(x=position(point.x, dx), y=position(point.y, dy)) for point in barcode.polygon]
+        moved.append(barcode._replace(rect=rect, polygon=polygon))
+    return moved
+
+
+class RoiTracker:
+    """
+    Decodes a padded region around the last seen barcodes before the full frame
+
+    Barcodes barely move between consecutive frames, so most frames can be
+    decoded from a small crop. The full frame is scanned when the crop misses,
+    when nothing has been seen yet, and every full_scan_interval frames so
+    that new barcodes elsewhere in view are still picked up.
+    """
+
+    def __init__(self, padding=0.5, full_scan_interval=15, min_padding=32):
+        """
+        Initialize the tracker
+
+        Args:
+            padding: Padding added on each side, as a fraction of the barcode size
+            full_scan_interval: Force a full-frame scan after this many frames
+            min_padding: Minimum padding in pixels, to tolerate fast movement
+                         of small barcodes
+        """
+        self.padding = padding
+        self.full_scan_interval = full_scan_interval
+        self.min_padding = min_padding
+        self.roi_hits = 0
+        self.roi_misses = 0
+        self.full_scans = 0
+        self._region = None
+        self._frames_since_full = 0
+        # Several decode threads may share one tracker
+        self._lock = threading.Lock()
+
+    def decode(self, image, decode_fn, full_decode_fn=None):
+        """
+        Decode an image, trying the tracked region first
+
+        Args:
+            image: Frame as a NumPy array
+            decode_fn: Callable that takes an image and returns a list of barcodes
+            full_decode_fn: Optional callable used instead of decode_fn for
+                            full-frame scans (e.g. one that downscales first)
+
+        Returns:
+            List of barcodes in frame coordinates
+        """
+        with self._lock:
+            region = None
+            if self._frames_since_full < self.full_scan_interval:
+                region = self._region
+            self._frames_since_full += 1
+
+        if region is not None:
+            x0, y0, x1, y1 = region
+            barcodes = decode_fn(image[y0:y1, x0:x1])
+            if barcodes:
+                barcodes = offset_barcodes(barcodes, x0, y0)
+                self._track(barcodes, image.shape)
+                with self._lock:
+                    self.roi_hits += 1
+                return barcodes
+            with self._lock:
+                self.roi_misses += 1
+
+        barcodes = (full_decode_fn or decode_fn)(image)
+        self._track(barcodes, image.shape)
+        with self._lock:
+            self.full_scans += 1
+            self._frames_since_full = 0
+        return barcodes
+
+    def reset(self):
+        """Forget the tracked region, e.g. when the scene changes"""
+        with self._lock:
+            self._region = None
+            self._frames_since_full = 0
+
+    def _track(self, barcodes, shape):
+        """Set the tracked region to the padded union of the barcode rects"""
+        region = None
+        if barcodes:
+            left = min(barcode.rect.left for barcode in barcodes)
+            top = min(barcode.rect.top for barcode in barcodes)
+            right = max(barcode.rect.left + barcode.rect.width for barcode in barcodes)
+            bottom = max(barcode.rect.top + barcode.rect.height for barcode in barcodes)
+
+            pad_x = max(int((right - left) * self.padding), self.min_padding)
+            pad_y = max(int((bottom - top) * self.padding), self.min_padding)
+            height, width = shape[:2]
+            region = (
+                max(left - pad_x, 0),
+                max(top - pad_y, 0),
+                min(right + pad_x, width),
+                min(bottom + pad_y, height)
+            )
+
+        with self._lock:
+            self._region = region
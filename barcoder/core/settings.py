@@ -0,0 +1,34 @@
+import os
+import sys
+import json
+
+# Constants for file paths
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
+SETTINGS_PATH = os.path.join(CONFIG_DIR, "settings.json")
+
+
+def read_settings(path=SETTINGS_PATH):
+    """Load settings from a JSON file, returning an empty dict if it is missing or invalid"""
+    settings = {}
+
+    # Make sure config directory exists
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                settings = json.load(f)
+        except Exception as e:
+            # stderr, so the headless commands can stream results on stdout
+            print(f"Error loading settings: {e}", file=sys.stderr)
+
+    return settings
+
+
+def write_settings(settings, path=SETTINGS_PATH):
+    """Save settings to a JSON file"""
+    try:
+        with open(path, 'w') as f:
+            json.dump(settings, f, indent=2)
+    except Exception as e:
+        print(f"Error saving settings: {e}")
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+def sharpness(image, rect=None, max_size=320):
+    """
+    Return the variance of the Laplacian of an image region, higher for sharper images
+
+    Motion blur and defocus remove the fine detail the Laplacian responds
+    to, so among frames of the same scene the sharpest has the highest
+    score. The region is reduced to at most max_size pixels on its longest
+    side first, which keeps the cost to about a millisecond per frame.
+
+    Args:
+        image: BGR or grayscale image
+        rect: Optional (left, top, width, height) of the region to score
+        max_size: Longest side the region is reduced to
+    """
+    if rect is not None:
+        left, top, width, height = rect
+        image = image[max(0, top):max(0, top + height), max(0, left):max(0, left + width)]
+    height, width = image.shape[:2]
+    if height < 3 or width < 3:
+        return 0.0
+    factor = max(width, height) / max_size
+    if factor > 1:
+        image = cv2.resize(image, (max(3, int(width / factor)), max(3, int(height / factor))),
+                           interpolation=cv2.INTER_LINEAR)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, deviation = cv2.meanStdDev(cv2.Laplacian(image, cv2.CV_16S))
+    return float(deviation[0, 0]) ** 2
+
+
+def barcode_region(barcodes, shape, padding=0.25):
+    """Return the (left, top, width, height) around all barcodes, padded by a fraction of its size"""
+    left = min(barcode.rect[0] for barcode in barcodes)
+    top = min(barcode.rect[1] for barcode in barcodes)
+    right = max(barcode.rect[0] + barcode.rect[2] for barcode in barcodes)
+    bottom = max(barcode.rect[1] + barcode.rect[3] for barcode in barcodes)
+    pad_x = int((right - left) * padding)
+    pad_y = int((bottom - top) * padding)
+    left, top = max(0, left - pad_x), max(0, top - pad_y)
+    right, bottom = min(shape[1], right + pad_x), min(shape[0], bottom + pad_y)
+    return left, top, right - left, bottom - top
+
+
+class SharpnessHistory:
+    """
+    The recent frames of a camera that barcodes were read in, with their sharpness
+
+    Each decoded frame is scored once as it arrives, around the barcodes
+    read in it, and kept by retaining its ring slot. A frame that is no
+    sharper than a newer one with the same barcodes can never be picked, so
+    it is released straight away; otherwise frames are released once they
+    are older than max_age or more than max_frames are held. A capture can
+    then take the sharpest recent frame of its barcode instead of whichever
+    frame is on screen, which is often motion-blurred, without waiting for
+    anything.
+    """
+
+    def __init__(self, max_frames=4, max_age=1.0):
+        """
+        Initialize the history
+
+        Args:
+            max_frames: Maximum number of frames held (each holds a ring slot)
+            max_age: Seconds a frame stays eligible
+        """
+        self.max_frames = max(1, max_frames)
+        self.max_age = max_age
+        # (frame, barcode data set, score, time.monotonic() when added), oldest first
+        self._entries = deque()
+        self._lock = threading.Lock()
+
+    def add(self, frame, barcodes, now=None):
+        """
+        Score a frame barcodes were read in and keep it if it may be the sharpest
+
+        Must be called while frame.image is valid, e.g. from the pipeline's on_result.
+        """
+        if not barcodes:
+            return
+        if now is None:
+            now = time.monotonic()
+        image = frame.image
+        score = sharpness(image, barcode_region(barcodes, image.shape))
+        values = {barcode.data.decode('utf-8', errors='replace') for barcode in barcodes}
+        if frame.slot is not None:
+            frame.slot.retain()
+
+        with self._lock:
+            released = []
+            kept = deque()
+            for entry in self._entries:
+                if entry[2] <= score and entry[1] <= values:
+                    released.append(entry[0])
+                else:
+                    kept.append(entry)
+            kept.append((frame, values, score, now))
+            while len(kept) > self.max_frames or now - kept[0][3] > self.max_age:
+                released.append(kept.popleft()[0])
+            self._entries = kept
+        for old in released:
+            if old.slot is not None:
+                old.slot.release()
+
+    def best(self, data, now=None):
+        """
+        Return the sharpest recent frame a barcode was read in, or None
+
+        The frame's slot is retained for the caller, who must release it
+        (e.g. with release_frame) once the image is no longer needed.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            candidates = [entry for entry in self._entries if data in entry[1] and now - entry[3] <= self.max_age]
+            if not candidates:
+                return None
+            frame = max(candidates, key=lambda entry: entry[2])[0]
+            if frame.slot is not None:
+                frame.slot.retain()
+            return frame
+
+    def clear(self):
+        """Release every frame held"""
+        with self._lock:
+            entries, self._entries = self._entries, deque()
+        for frame, _, _, _ in entries:
+            if frame.slot is not None:
+                frame.slot.release()
@@ -0,0 +1,206 @@
+import time
+from collections import OrderedDict, deque, namedtuple
+
+# A barcode that has been read consistently enough to act on. confidence is
+# the fraction of recent frames it was read in; timestamp is wall-clock time.
+BarcodeEvent = namedtuple("BarcodeEvent", ["data", "type", "confidence", "timestamp", "barcode"])
+
+
+class BarcodeStabilizer:
+    """
+    Turns per-frame decode results into debounced barcode events
+
+    A barcode is reported once it has been read in at least min_hits of the
+    last window frames, and not again until it has been missing from all of
+    them. A read that flickers between two codes therefore produces one event
+    per code rather than one per flip, and single misreads never get through.
+    """
+
+    def __init__(self, window=5, min_hits=3):
+        """
+        Initialize the stabilizer
+
+        Args:
+            window: Number of recent frames considered
+            min_hits: Number of those frames a barcode must be read in
+        """
+        self.window = max(1, window)
+        self.min_hits = min(max(1, min_hits), self.window)
+        self._history = deque(maxlen=self.window)
+        self._hits = {}
+        self._stable = set()
+
+    def update(self, barcodes, timestamp=None):
+        """
+        Add the result of the next frame
+
+        Args:
+            barcodes: pyzbar results for the frame
+            timestamp: Wall-clock time of the frame (default: now)
+
+        Returns:
+            List of BarcodeEvents for barcodes that have just become stable
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        frame = {}
+        for barcode in barcodes:
+            frame.setdefault((barcode.data, barcode.type), barcode)
+
+        if len(self._history) == self.window:
+            for key in self._history[0]:
+                self._hits[key] -= 1
+                if self._hits[key] == 0:
+                    del self._hits[key]
+                    self._stable.discard(key)
+        self._history.append(frame.keys())
+        for key in frame:
+            self._hits[key] = self._hits.get(key, 0) + 1
+
+        events = []
+        for key, barcode in frame.items():
+            if key not in self._stable and self._hits[key] >= self.min_hits:
+                self._stable.add(key)
+                events.append(BarcodeEvent(
+                    key[0].decode('utf-8', errors='replace'), key[1], self.confidence(key), timestamp, barcode
+                ))
+        return events
+
+    def confidence(self, key):
+        """Fraction of the recent frames a (data, type) key was read in"""
+        return self._hits.get(key, 0) / self.window
+
+    def reset(self):
+        self._history.clear()
+        self._hits.clear()
+        self._stable.clear()
+
+
+class DedupCache:
+    """
+    Remembers recently seen keys for a time window, evicting the least recently used
+
+    seen() reports whether a key was already seen within the window and
+    refreshes it, so something seen continuously stays suppressed. The cache
+    holds at most max_size keys.
+    """
+
+    def __init__(self, window=10.0, max_size=256):
+        """
+        Initialize the cache
+
+        Args:
+            window: Seconds a key is remembered after it was last seen
+            max_size: Maximum number of keys kept
+        """
+        self.window = window
+        self.max_size = max_size
+        self.suppressed = 0
+        self._entries = OrderedDict()
+
+    def seen(self, key, now=None):
+        """Record key and return True if it had already been seen within the window"""
+        if now is None:
+            now = time.monotonic()
+
+        last = self._entries.pop(key, None)
+        self._entries[key] = now
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        duplicate = last is not None and now - last < self.window
+        if duplicate:
+            self.suppressed += 1
+        return duplicate
+
+    def forget(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AutoCaptureTrigger:
+    """
+    Decides when a barcode has been in view long enough to capture it without a key press
+
+    A barcode triggers once a camera has read it in min_frames decode results
+    spanning at least min_seconds, with no more than max_misses results in a
+    row without it. It then does not trigger again, from any camera, until
+    it has been out of view for cooldown seconds, so an item left in front
+    of the cameras is captured once.
+    """
+
+    def __init__(self, min_frames=5, min_seconds=0.0, cooldown=10.0, max_misses=2):
+        """
+        Initialize the trigger
+
+        Args:
+            min_frames: Number of decode results a barcode must be read in
+            min_seconds: Time a barcode must have been in view
+            cooldown: Seconds a captured barcode must be out of view before it triggers again
+            max_misses: Consecutive results without a read that do not interrupt a streak
+        """
+        self.min_frames = max(1, min_frames)
+        self.min_seconds = min_seconds
+        self.cooldown = cooldown
+        self.max_misses = max_misses
+        self.triggered = 0
+        # (source, data) -> [first read, results read in, consecutive misses]
+        self._streaks = {}
+        # data -> last time a captured barcode was seen
+        self._cooling = {}
+
+    def update(self, barcodes, source=0, now=None):
+        """
+        Add the decode result of the next frame from a camera
+
+        Args:
+            barcodes: pyzbar results for the frame
+            source: Index of the camera the frame came from
+            now: Current time.monotonic()
+
+        Returns:
+            List of barcode data strings to capture now
+        """
+        if now is None:
+            now = time.monotonic()
+
+        values = {barcode.data.decode('utf-8', errors='replace') for barcode in barcodes}
+        for data in values:
+            if data in self._cooling:
+                self._cooling[data] = now
+        for data, last in list(self._cooling.items()):
+            if now - last >= self.cooldown:
+                del self._cooling[data]
+
+        for key, streak in list(self._streaks.items()):
+            if key[0] == source and key[1] not in values:
+                streak[2] += 1
+                if streak[2] > self.max_misses:
+                    del self._streaks[key]
+
+        captures = []
+        for data in values:
+            if data in self._cooling:
+                continue
+            streak = self._streaks.setdefault((source, data), [now, 0, 0])
+            streak[1] += 1
+            streak[2] = 0
+            if streak[1] >= self.min_frames and now - streak[0] >= self.min_seconds:
+                captures.append(data)
+                self._cooling[data] = now
+                # Other cameras' streaks for this barcode are covered by the capture
+                for key in [key for key in self._streaks if key[1] == data]:
+                    del self._streaks[key]
+        self.triggered += len(captures)
+        return captures
+
+    def forget(self, data):
+        """Let a barcode trigger again without waiting for its cooldown, e.g. after a failed capture"""
+        self._cooling.pop(data, None)
+
+    def reset(self):
+        self._streaks.clear()
+        self._cooling.clear()
@@ -0,0 +1,77 @@
+import sys
+import time
+from contextlib import contextmanager
+
+# Reference point for start-up timings: when the barcoder command started loading
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """
+    Records how long each start-up stage takes and when the first frame appears
+
+    Stages are timed with stage(), and first_frame() records when the
+    camera image first appears, relative to PROCESS_START.
+    """
+
+    def __init__(self, budget_ms=None, verbose=False):
+        """
+        Initialize the profiler
+
+        Args:
+            budget_ms: Time-to-first-frame budget in milliseconds (None for no budget)
+            verbose: Print the report once the first frame has been shown
+        """
+        self.budget_ms = budget_ms
+        self.verbose = verbose
+        self.stages = []
+        self.first_frame_ms = None
+
+    @staticmethod
+    def elapsed_ms():
+        return 1000 * (time.perf_counter() - PROCESS_START)
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as a named start-up stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, 1000 * (time.perf_counter() - start)))
+
+    def first_frame(self):
+        """Record that the first frame has been shown; only the first call counts"""
+        if self.first_frame_ms is not None:
+            return
+        self.first_frame_ms = self.elapsed_ms()
+
+        from barcoder.core.metrics import REGISTRY
+        for name, duration in self.stages:
+            REGISTRY.gauge("barcoder_startup_stage_seconds", "Duration of each start-up stage",
+                           stage=name).set(duration / 1000)
+        REGISTRY.gauge("barcoder_time_to_first_frame_seconds",
+                       "Time from start-up to the first camera frame on screen").set(self.first_frame_ms / 1000)
+
+        if self.verbose:
+            self.report()
+        elif self.over_budget():
+            print(f"Time to first frame {self.first_frame_ms:.0f} ms exceeds the "
+                  f"{self.budget_ms:.0f} ms budget (run with --profile-startup for details)", file=sys.stderr)
+
+    def over_budget(self):
+        return (self.budget_ms is not None and self.first_frame_ms is not None
+                and self.first_frame_ms > self.budget_ms)
+
+    def report(self, file=None):
+        """Print the stage timings and the time to first frame, to stderr unless another file is given"""
+        # Looked up on each call, so a redirected sys.stderr is honoured
+        file = file or sys.stderr
+        print("Start-up timings:", file=file)
+        for name, duration in self.stages:
+            print(f"  {name:<28} {duration:8.1f} ms", file=file)
+        if self.first_frame_ms is not None:
+            line = f"  {'time to first frame':<28} {self.first_frame_ms:8.1f} ms"
+            if self.budget_ms is not None:
+                line += f" (budget {self.budget_ms:.0f} ms, {'over' if self.over_budget() else 'within'})"
+            print(line, file=file)
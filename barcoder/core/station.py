@@ -0,0 +1,184 @@
+import math
+
+from barcoder.core.camera import camera_from_settings
+from barcoder.core.decode_pool import DecodePool
+from barcoder.core.decoder import FrameDecoder
+from barcoder.core.metrics import REGISTRY
+from barcoder.core.pipeline import FramePipeline
+from barcoder.core.sharpness import SharpnessHistory
+from barcoder.core.stabilizer import BarcodeStabilizer, DedupCache
+
+
+def camera_settings(settings):
+    """
+    Return the settings for each camera of a station
+
+    The "cameras" setting is a list of dicts, each overriding the top-level
+    camera_* (and decode) settings for one camera and optionally giving it a
+    "name". Without it the station has the single camera configured at the
+    top level.
+    """
+    cameras = settings.get("cameras") or [{}]
+    configs = []
+    for index, camera in enumerate(cameras):
+        config = dict(settings)
+        config.pop("cameras", None)
+        config.update(camera)
+        config.setdefault("name", f"Camera {index + 1}")
+        configs.append(config)
+    return configs
+
+
+class CameraChannel:
+    """One camera of a ScanStation: its capture, its decoder state, its pipeline and its stabilizer"""
+
+    def __init__(self, index, name, cap, decoder, pipeline, stabilizer, history=None):
+        self.index = index
+        self.name = name
+        self.cap = cap
+        self.decoder = decoder
+        self.pipeline = pipeline
+        # Fed with results in frame order by the consumer of on_result
+        self.stabilizer = stabilizer
+        # Recent frames with barcodes and their sharpness, fed from the decode threads
+        self.history = history
+
+    def best_frame(self, data):
+        """
+        Return the sharpest recent frame a barcode was read in, or None
+
+        The frame's slot is retained for the caller, who must release it.
+        """
+        return self.history.best(data) if self.history is not None else None
+
+    def stats(self):
+        """Return cumulative frame counts and the current queue depths"""
+        pipeline = self.pipeline
+        return {
+            "captured": pipeline.capture_thread.frames_captured,
+            "decoded": sum(thread.frames_decoded for thread in pipeline.decode_threads),
+            "dropped": pipeline.decode_queue.dropped,
+            "decode_queue": pipeline.decode_queue.qsize(),
+            "ring_in_use": pipeline.ring.in_use()
+        }
+
+
+class ScanStation:
+    """
+    Several cameras scanned from one process
+
+    Each camera has its own capture thread, frame ring and decoder state
+    (change gate, ROI tracker, timings), but with decode_workers set they
+    all decode on one shared DecodePool. Barcode events from all cameras go
+    through one dedup cache, so a code seen by two cameras is reported once.
+    Captured images and uploads are handled once for the whole station by
+    the caller. Each camera keeps its sharpest recent frames with barcodes in
+    a SharpnessHistory, for captures to choose from.
+    """
+
+    def __init__(self, settings, on_result, on_frame=None):
+        """
+        Open the cameras of a station
+
+        Args:
+            settings: Application settings, see camera_settings()
+            on_result: Callback invoked with (camera index, frame, barcodes)
+                       from the decode threads
+            on_frame: Optional callback invoked with (camera index, frame) when
+                      a new frame is waiting in that camera's render queue
+        """
+        configs = camera_settings(settings)
+
+        self.pool = None
+        workers = settings.get("decode_workers", 0)
+        if workers > 0:
+            self.pool = DecodePool(workers=workers, max_in_flight=settings.get("decode_max_in_flight", 2))
+        # Split the pool's slots between the cameras; decodes beyond that simply wait for a slot
+        decode_threads = math.ceil(self.pool.max_in_flight / len(configs)) if self.pool is not None else 1
+
+        self.dedup = DedupCache(
+            window=settings.get("dedup_window", 2.0), max_size=settings.get("dedup_max_size", 256)
+        )
+
+        self._on_result = on_result
+        self.channels = []
+        for index, config in enumerate(configs):
+            history_frames = max(0, config.get("sharpness_history", 4))
+            history = None
+            if history_frames > 0:
+                history = SharpnessHistory(max_frames=history_frames, max_age=config.get("sharpness_max_age", 1.0))
+            decoder = FrameDecoder.from_settings(config, pool=self.pool)
+            pipeline = FramePipeline(
+                camera_from_settings(config),
+                decoder.decode,
+                on_result=lambda frame, barcodes, index=index: self._result(index, frame, barcodes),
+                on_frame=None if on_frame is None else lambda frame, index=index: on_frame(index, frame),
+                decode_threads=decode_threads,
+                labels={"camera": config["name"]},
+                held_frames=history_frames
+            )
+            stabilizer = BarcodeStabilizer(
+                window=config.get("stabilizer_window", 5), min_hits=config.get("stabilizer_min_hits", 3)
+            )
+            self.channels.append(
+                CameraChannel(index, config["name"], pipeline.cap, decoder, pipeline, stabilizer, history)
+            )
+
+        REGISTRY.register_collector("station", self.collect_metrics)
+
+    def collect_metrics(self, registry):
+        """Copy the cameras' frame counts and queue depths into the metrics registry"""
+        for channel in self.channels:
+            stats = channel.stats()
+            camera = channel.name
+            registry.counter("barcoder_frames_captured_total", "Frames read from the camera",
+                             camera=camera).set(stats["captured"])
+            registry.counter("barcoder_frames_decoded_total", "Frames decoded",
+                             camera=camera).set(stats["decoded"])
+            registry.counter("barcoder_frames_dropped_total", "Frames dropped before they could be decoded",
+                             camera=camera).set(stats["dropped"])
+            registry.counter("barcoder_frames_skipped_total", "Frames skipped because every buffer was in use",
+                             camera=camera).set(channel.pipeline.capture_thread.frames_skipped)
+            registry.gauge("barcoder_decode_queue_depth", "Frames waiting to be decoded",
+                           camera=camera).set(stats["decode_queue"])
+            registry.gauge("barcoder_frame_buffers_in_use", "Frame ring buffers in use",
+                           camera=camera).set(stats["ring_in_use"])
+        registry.counter("barcoder_duplicate_scans_total",
+                         "Barcode events suppressed as duplicates").set(self.dedup.suppressed)
+
+    def _result(self, index, frame, barcodes):
+        # Runs on a decode thread while frame.image is still valid
+        history = self.channels[index].history
+        if history is not None and barcodes:
+            history.add(frame, barcodes)
+        self._on_result(index, frame, barcodes)
+
+    def barcode_events(self, index, barcodes, timestamp=None):
+        """
+        Feed a camera's decode result to its stabilizer and return the new, non-duplicate events
+
+        Results must be passed in frame order; call this from the thread that
+        applies results, after discarding stale ones.
+        """
+        events = self.channels[index].stabilizer.update(barcodes, timestamp)
+        return [event for event in events if not self.dedup.seen((event.data, event.type))]
+
+    def start(self):
+        """Start capturing and decoding on every camera"""
+        for channel in self.channels:
+            channel.pipeline.start()
+
+    def stop(self):
+        """Stop every camera, release them and shut down the shared decode pool"""
+        REGISTRY.unregister_collector("station")
+        for channel in self.channels:
+            channel.pipeline.stop()
+        for channel in self.channels:
+            if channel.history is not None:
+                channel.history.clear()
+            channel.decoder.close()
+            if channel.cap.isOpened():
+                channel.cap.release()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
@@ -0,0 +1,334 @@
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import cv2
+
+from barcoder.core.fingerprint import dhash
+from barcoder.core.metrics import REGISTRY
+
+
+def write_atomic(path, data):
+    """
+    Write data to path so readers only ever see the complete file
+
+    The data goes to a hidden temporary file in the same directory, which is
+    then renamed over the destination. The temporary name does not end in an
+    image extension, so the Drive sync never picks up a half-written capture.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# File extension of each capture format
+CAPTURE_EXTENSIONS = {"jpeg": ".jpg", "webp": ".webp"}
+
+
+class EncodingProfile:
+    """
+    How captures are encoded, and which copy of them is uploaded
+
+    By default a capture is a single full-resolution file in the synced
+    folder. With upload_max_size set, the synced folder receives a copy
+    downscaled to fit that size instead, and the full-resolution original is
+    archived in a subfolder, which the sync does not upload.
+    """
+
+    def __init__(self, image_format="jpeg", quality=90, progressive=False, upload_max_size=0,
+                 upload_quality=None, archive_folder="archive"):
+        """
+        Initialize the encoding profile
+
+        Args:
+            image_format: "jpeg" or "webp"
+            quality: Encoding quality (0-100; above 100 makes WebP lossless)
+            progressive: Encode JPEGs progressively with optimized Huffman tables, which
+                         makes them a little smaller but several times slower to encode
+            upload_max_size: Longest side in pixels of the uploaded copy (0 uploads the original)
+            upload_quality: Encoding quality of the uploaded copy (None uses quality)
+            archive_folder: Subfolder of the synced folder the originals are kept in
+                            when a downscaled copy is uploaded
+        """
+        if image_format not in CAPTURE_EXTENSIONS:
+            print(f"Unknown capture format {image_format!r}, using JPEG")
+            image_format = "jpeg"
+        self.image_format = image_format
+        self.quality = quality
+        self.progressive = progressive
+        self.upload_max_size = upload_max_size
+        self.upload_quality = quality if upload_quality is None else upload_quality
+        self.archive_folder = archive_folder
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Create an encoding profile from the application settings"""
+        return cls(
+            image_format=settings.get("capture_format", "jpeg"),
+            quality=settings.get("capture_quality", 90),
+            progressive=settings.get("capture_progressive", False),
+            upload_max_size=settings.get("capture_upload_max_size", 0),
+            upload_quality=settings.get("capture_upload_quality", 85),
+            archive_folder=settings.get("capture_archive_folder", "archive")
+        )
+
+    @property
+    def extension(self):
+        return CAPTURE_EXTENSIONS[self.image_format]
+
+    def encode(self, image, quality=None):
+        """Return the image encoded with this profile's format, at quality or the profile's own"""
+        quality = self.quality if quality is None else quality
+        if self.image_format == "webp":
+            params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+        else:
+            params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+            if self.progressive:
+                params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        ok, encoded = cv2.imencode(self.extension, image, params)
+        if not ok:
+            raise ValueError(f"{self.image_format.upper()} encoding failed")
+        return encoded
+
+    def upload_copy(self, image):
+        """Return the image downscaled for upload, or None if the original is uploaded"""
+        height, width = image.shape[:2]
+        if not self.upload_max_size or max(width, height) <= self.upload_max_size:
+            return None
+        scale = self.upload_max_size / max(width, height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def archive_path(self, path):
+        """Return where the original of the capture uploaded from path is kept"""
+        directory, name = os.path.split(path)
+        return os.path.join(directory, self.archive_folder, name)
+
+
+class CaptureWriter:
+    """
+    Encodes and saves captured images on a pool of background threads
+
+    OpenCV releases the GIL while encoding, so the workers encode captures in
+    parallel. To report what the encoding profile saves, one capture in
+    compare_interval is also encoded as a full-resolution, default-quality
+    JPEG (what a plain cv2.imwrite writes), and the sizes and encoding times
+    of those samples are extrapolated to every capture.
+
+    With a CaptureIndex, captures are saved under versioned names instead of
+    overwriting each other, and repeats of an earlier capture are skipped.
+    """
+
+    def __init__(self, max_queue=16, profile=None, workers=2, compare_interval=20, index=None,
+                 on_saved=None, on_error=None, on_duplicate=None):
+        """
+        Initialize the capture writer
+
+        Args:
+            max_queue: Maximum number of captures waiting to be written
+            profile: EncodingProfile used to encode captures (defaults to quality 90 JPEG)
+            workers: Number of threads encoding and writing captures
+            compare_interval: Compare every this many captures with a plain JPEG (0 never compares)
+            index: Optional CaptureIndex that versions file names and spots repeated captures
+            on_saved: Optional callback invoked with the path of each saved image
+            on_error: Optional callback invoked with (path, error message) on failure
+            on_duplicate: Optional callback invoked with (path, path of the earlier
+                          capture) when a capture is skipped as a repeat
+        """
+        self.profile = profile or EncodingProfile()
+        self.compare_interval = compare_interval
+        self.on_saved = on_saved
+        self.on_error = on_error
+        self.on_duplicate = on_duplicate
+        self.index = index
+        self.saved = 0
+        self.failed = 0
+        self.duplicates = 0
+        # Bytes written per copy, and totals over the captures compared with a plain JPEG
+        self.disk_bytes = 0
+        self.upload_bytes = 0
+        self._submitted = 0
+        self._compared = {"captures": 0, "upload_bytes": 0, "seconds": 0.0, "plain_bytes": 0, "plain_seconds": 0.0}
+        self._lock = threading.Lock()
+        self.save_seconds = REGISTRY.histogram("barcoder_save_seconds", "Time to encode and write a capture")
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        for index in range(max(1, workers)):
+            thread = threading.Thread(target=self._worker, name=f"capture-writer-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        REGISTRY.register_collector("capture_writer", self.collect_metrics)
+
+    def collect_metrics(self, registry):
+        """Copy the capture counts, sizes and queue depth into the metrics registry"""
+        registry.counter("barcoder_captures_saved_total", "Captures written to disk").set(self.saved)
+        registry.counter("barcoder_captures_failed_total", "Captures that could not be written").set(self.failed)
+        registry.counter("barcoder_captures_duplicate_total", "Captures skipped as repeats of an earlier one").set(
+            self.duplicates)
+        registry.gauge("barcoder_save_queue_depth", "Captures waiting to be written").set(self.pending())
+        registry.counter("barcoder_capture_bytes_total", "Bytes of captures written", copy="disk").set(self.disk_bytes)
+        registry.counter("barcoder_capture_bytes_total", copy="upload").set(self.upload_bytes)
+        savings = self.savings()
+        if savings is not None:
+            registry.gauge("barcoder_capture_bytes_saved", "Estimated bytes saved compared with plain JPEGs",
+                           copy="disk").set(savings["disk_bytes_saved"])
+            registry.gauge("barcoder_capture_bytes_saved", copy="upload").set(savings["upload_bytes_saved"])
+
+    def submit(self, image, path, release=None):
+        """
+        Queue an image to be written to path
+
+        The image must not be modified after it has been submitted.
+
+        Args:
+            image: BGR image to encode
+            path: Destination of the uploaded copy, before versioning; its extension should be the profile's
+            release: Optional callable invoked once the image has been encoded,
+                     e.g. to hand a frame buffer back to its FrameRing
+
+        Returns:
+            False if the queue is full and the capture was not accepted
+        """
+        with self._lock:
+            compare = self.compare_interval > 0 and self._submitted % self.compare_interval == 0
+        try:
+            self._queue.put_nowait((image, path, release, compare))
+        except queue.Full:
+            return False
+        with self._lock:
+            self._submitted += 1
+        return True
+
+    def pending(self):
+        """Number of captures queued or being written"""
+        return self._queue.unfinished_tasks
+
+    def savings(self):
+        """
+        Estimate what the encoding profile has saved compared with plain JPEGs
+
+        Returns:
+            Dict with the bytes written to disk and for upload, the bytes
+            saved on each, and the encoding seconds saved (negative if the
+            profile is slower), or None before any capture was compared
+        """
+        with self._lock:
+            compared = dict(self._compared)
+            saved, disk_bytes, upload_bytes = self.saved, self.disk_bytes, self.upload_bytes
+        if not compared["captures"]:
+            return None
+        # Plain JPEGs for every capture, scaled up from the compared ones
+        scale = saved / compared["captures"]
+        plain_bytes = compared["plain_bytes"] * scale
+        return {
+            "captures": saved,
+            "disk_bytes": disk_bytes,
+            "upload_bytes": upload_bytes,
+            "disk_bytes_saved": plain_bytes - disk_bytes,
+            "upload_bytes_saved": plain_bytes - upload_bytes,
+            "upload_ratio": compared["upload_bytes"] / compared["plain_bytes"],
+            "encode_seconds_saved": (compared["plain_seconds"] - compared["seconds"]) * scale
+        }
+
+    def _worker(self):
+        """Worker thread that encodes and writes queued captures"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+
+            image, path, release, compare = item
+            try:
+                with self.save_seconds.time():
+                    saved_path, earlier_path = self._write(image, path, release, compare)
+                if earlier_path is not None:
+                    with self._lock:
+                        self.duplicates += 1
+                    if self.on_duplicate is not None:
+                        self.on_duplicate(path, earlier_path)
+                else:
+                    with self._lock:
+                        self.saved += 1
+                    if self.on_saved is not None:
+                        self.on_saved(saved_path)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"Failed to save {path}: {e}")
+                if self.on_error is not None:
+                    self.on_error(path, str(e))
+            finally:
+                self._queue.task_done()
+
+    def _write(self, image, path, release=None, compare=False):
+        """Encode and write a capture; returns (path written, None), or (None, earlier path) for a repeat"""
+        claimed_path = None
+        try:
+            try:
+                if self.index is not None:
+                    claimed_path, earlier_path = self.index.claim(path, dhash(image))
+                    if earlier_path is not None:
+                        return None, earlier_path
+
+                start = time.perf_counter()
+                upload_image = self.profile.upload_copy(image)
+                original = self.profile.encode(image)
+                if upload_image is not None:
+                    upload = self.profile.encode(upload_image, self.profile.upload_quality)
+                else:
+                    upload = original
+                seconds = time.perf_counter() - start
+                plain = plain_seconds = None
+                if compare:
+                    start = time.perf_counter()
+                    plain = cv2.imencode('.jpg', image)[1]
+                    plain_seconds = time.perf_counter() - start
+            finally:
+                if release is not None:
+                    release()
+
+            saved_path = claimed_path or path
+            os.makedirs(os.path.dirname(saved_path) or ".", exist_ok=True)
+            disk_bytes = len(original)
+            if upload is not original:
+                archive_path = self.profile.archive_path(saved_path)
+                os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+                write_atomic(archive_path, original)
+                disk_bytes += len(upload)
+            write_atomic(saved_path, upload)
+        except Exception:
+            if claimed_path is not None:
+                # Nothing was saved under the name, so a retry must not be taken for a repeat
+                self.index.unclaim(path, claimed_path)
+            raise
+
+        with self._lock:
+            self.disk_bytes += disk_bytes
+            self.upload_bytes += len(upload)
+            if plain is not None:
+                compared = self._compared
+                compared["captures"] += 1
+                compared["upload_bytes"] += len(upload)
+                compared["seconds"] += seconds
+                compared["plain_bytes"] += len(plain)
+                compared["plain_seconds"] += plain_seconds
+        return saved_path, None
+
+    def stop(self):
+        """Finish writing everything that is queued, then stop the workers"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
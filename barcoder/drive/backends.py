@@ -0,0 +1,445 @@
+import os
+import time
+import uuid
+import datetime
+import random
+import shutil
+import hashlib
+import mimetypes
+import threading
+from collections import Counter
+
+from barcoder.core.metrics import REGISTRY
+
+# Constants for file paths
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
+CLIENT_SECRETS_PATH = os.path.join(CONFIG_DIR, "client_secrets.json")
+CREDENTIALS_PATH = os.path.join(CONFIG_DIR, "mycreds.txt")
+
+# Resumable uploads send data in chunks, which must be a multiple of 256 KB
+UPLOAD_CHUNK_SIZE = 4 * 256 * 1024
+# Drive error reasons that are worth retrying even though they come with a 403
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+# Maximum number of calls Drive accepts in one batch request
+BATCH_SIZE = 100
+
+
+class StorageError(Exception):
+    """Error raised by storage backends, with an HTTP-like status code"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def is_retryable(error):
+    """Return True for rate limiting, server errors and network failures"""
+    if isinstance(error, (FileNotFoundError, PermissionError, IsADirectoryError)):
+        return False
+
+    # StorageError has a status, googleapiclient HttpError carries the response,
+    # pydrive2 ApiRequestError the decoded error body
+    status = getattr(error, 'status', None)
+    if status is None:
+        status = getattr(getattr(error, 'resp', None), 'status', None)
+    details = getattr(error, 'error', None)
+    if status is None and isinstance(details, dict):
+        status = details.get('code')
+    if status is None:
+        # No HTTP status: connection reset, timeout, DNS failure...
+        return True
+
+    status = int(status)
+    if status == 403 and isinstance(details, dict):
+        reasons = [item.get('reason') for item in details.get('errors', [])]
+        return any(reason in RATE_LIMIT_REASONS for reason in reasons)
+    return status == 429 or status >= 500
+
+
+class StorageBackend:
+    """
+    Interface between GoogleDriveSync and the remote storage
+
+    Backends implement authentication, folder lookup, listing and uploads;
+    retries, concurrency and bookkeeping stay in GoogleDriveSync. Every
+    remote call is counted in api_calls so sync behaviour can be measured.
+    Files are described by dicts with at least 'id' and 'title', plus
+    'md5Checksum' where the backend knows it.
+    """
+
+    def __init__(self):
+        self.api_calls = Counter()
+        self._calls_lock = threading.Lock()
+
+    def _count(self, operation):
+        with self._calls_lock:
+            self.api_calls[operation] += 1
+        REGISTRY.counter("barcoder_drive_api_calls_total", "Calls made to the storage backend",
+                         operation=operation).inc()
+
+    def authenticate(self):
+        """Prepare the backend for use; returns True on success"""
+        return True
+
+    def ensure_folder(self, folder_name):
+        """Return the ID of the named folder, creating it if needed"""
+        raise NotImplementedError
+
+    def list_files(self, folder_id):
+        """Return the files in a folder"""
+        raise NotImplementedError
+
+    def upload(self, file_path, folder_id=None):
+        """Upload a file and return its ID, raising on failure"""
+        raise NotImplementedError
+
+    def update(self, file_id, file_path):
+        """Upload new content for an existing file, which keeps its ID and gains a revision; returns the ID"""
+        raise NotImplementedError
+
+    def find_files(self, folder_id, titles):
+        """Return a dict of title to file for those titles that exist in the folder"""
+        titles = set(titles)
+        return {file['title']: file for file in self.list_files(folder_id) if file['title'] in titles}
+
+    def is_retryable(self, error):
+        """Return True if an error raised by this backend is worth retrying"""
+        return is_retryable(error)
+
+
+class GoogleDriveBackend(StorageBackend):
+    """Google Drive storage through pydrive2"""
+
+    def __init__(self, client_secrets_path=CLIENT_SECRETS_PATH, credentials_path=CREDENTIALS_PATH,
+                 resumable_threshold=5 * 1024 * 1024, chunk_retries=5, refresh_margin=300):
+        """
+        Initialize the Drive backend
+
+        Args:
+            client_secrets_path: OAuth client secrets file
+            credentials_path: File the OAuth credentials are saved to
+            resumable_threshold: Files larger than this (bytes) are uploaded in
+                                 resumable chunks that are retried individually
+            chunk_retries: Number of retries per chunk of a resumable upload
+            refresh_margin: Refresh the access token this many seconds before it expires
+        """
+        super().__init__()
+        self.client_secrets_path = client_secrets_path
+        self.credentials_path = credentials_path
+        self.resumable_threshold = resumable_threshold
+        self.chunk_retries = chunk_retries
+        self.refresh_margin = refresh_margin
+        self.gauth = None
+        self.drive = None
+        self._auth_lock = threading.Lock()
+
+    def authenticate(self):
+        """Authenticate with Google Drive, reusing the existing session if there is one"""
+        if self.drive is not None:
+            self.ensure_token()
+            return True
+
+        from pydrive2.auth import GoogleAuth
+        from pydrive2.drive import GoogleDrive
+
+        gauth = GoogleAuth()
+        # Try to load saved client credentials
+        gauth.LoadClientConfigFile(self.client_secrets_path)
+        gauth.LoadCredentialsFile(self.credentials_path)
+
+        if gauth.credentials is None:
+            # Authenticate if they're not there
+            # Set access_type to offline to get a refresh token
+            gauth.GetFlow()
+            gauth.flow.params.update({'access_type': 'offline'})
+            gauth.flow.params.update({'approval_prompt': 'force'})
+            gauth.LocalWebserverAuth()
+        elif gauth.access_token_expired:
+            # Refresh them if expired
+            gauth.Refresh()
+        else:
+            # Initialize the saved creds
+            gauth.Authorize()
+
+        # Batch requests need the service, which Refresh() does not build
+        if gauth.service is None:
+            gauth.Authorize()
+
+        # Save the current credentials to a file
+        gauth.SaveCredentialsFile(self.credentials_path)
+        self.gauth = gauth
+        self.drive = GoogleDrive(gauth)
+        return True
+
+    def ensure_token(self):
+        """
+        Refresh the access token shortly before it expires
+
+        Refreshing ahead of time keeps uploads from failing with a 401, and
+        keeps pydrive2 from starting an interactive browser login on a
+        background thread when it finds an expired token.
+        """
+        if not self._token_expiring():
+            return
+
+        with self._auth_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._token_expiring():
+                self._count('refresh')
+                self.gauth.Refresh()
+                self.gauth.SaveCredentialsFile(self.credentials_path)
+
+    def _token_expiring(self):
+        expiry = getattr(self.gauth.credentials, 'token_expiry', None)
+        if expiry is None:
+            return False
+        # oauth2client stores the expiry as a naive UTC datetime
+        remaining = expiry - datetime.datetime.utcnow()
+        return remaining.total_seconds() < self.refresh_margin
+
+    def _execute_batch(self, requests):
+        """
+        Send requests as Drive batch requests of up to BATCH_SIZE calls each
+
+        Args:
+            requests: List of (key, HttpRequest) pairs
+
+        Returns:
+            Dict of key to (response, exception)
+        """
+        results = {}
+        keys = {}
+
+        def callback(request_id, response, exception):
+            results[keys[request_id]] = (response, exception)
+
+        for start in range(0, len(requests), BATCH_SIZE):
+            batch = self.gauth.service.new_batch_http_request(callback=callback)
+            for index, (key, request) in enumerate(requests[start:start + BATCH_SIZE], start):
+                keys[str(index)] = key
+                batch.add(request, request_id=str(index))
+            self._count('batch')
+            batch.execute(http=self._thread_http())
+        return results
+
+    def find_files(self, folder_id, titles):
+        """Look up several titles in the folder with one batch request"""
+        self.ensure_token()
+        files = self.gauth.service.files()
+        requests = []
+        for title in set(titles):
+            escaped = title.replace("\\", "\\\\").replace("'", "\\'")
+            query = f"title='{escaped}' and '{folder_id}' in parents and trashed=false"
+            requests.append((title, files.list(q=query, fields='items(id,title,md5Checksum)', maxResults=1)))
+
+        found = {}
+        for title, (response, exception) in self._execute_batch(requests).items():
+            if exception is not None:
+                raise exception
+            items = response.get('items', [])
+            if items:
+                found[title] = items[0]
+        return found
+
+    def ensure_folder(self, folder_name):
+        self.ensure_token()
+        # Check if folder already exists
+        self._count('list')
+        folder_list = self.drive.ListFile({'q': f"title='{folder_name}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"}).GetList()
+
+        if folder_list:
+            return folder_list[0]['id']
+
+        # Create folder
+        folder_metadata = {
+            'title': folder_name,
+            'mimeType': FOLDER_MIME_TYPE
+        }
+        self._count('create_folder')
+        folder = self.drive.CreateFile(folder_metadata)
+        folder.Upload()
+        return folder['id']
+
+    def list_files(self, folder_id):
+        self.ensure_token()
+        self._count('list')
+        file_list = self.drive.ListFile({'q': f"'{folder_id}' in parents and trashed=false"}).GetList()
+        return [
+            {'id': file['id'], 'title': file['title'], 'md5Checksum': file.get('md5Checksum')}
+            for file in file_list
+        ]
+
+    def upload(self, file_path, folder_id=None):
+        file_name = os.path.basename(file_path)
+        file_metadata = {'title': file_name}
+
+        if folder_id:
+            file_metadata['parents'] = [{'id': folder_id}]
+
+        self.ensure_token()
+        self._count('upload')
+        if os.path.getsize(file_path) > self.resumable_threshold:
+            return self._upload_resumable(file_path, file_metadata)
+
+        file = self.drive.CreateFile(file_metadata)
+        file.SetContentFile(file_path)
+        file.Upload()
+        return file['id']
+
+    def update(self, file_id, file_path):
+        self.ensure_token()
+        self._count('update')
+        if os.path.getsize(file_path) > self.resumable_threshold:
+            return self._upload_resumable(file_path, {}, file_id=file_id)
+
+        file = self.drive.CreateFile({'id': file_id})
+        file.SetContentFile(file_path)
+        file.Upload()
+        return file['id']
+
+    def _upload_resumable(self, file_path, file_metadata, file_id=None):
+        """Upload a large file in chunks; a failed chunk is retried without restarting the file"""
+        from googleapiclient.http import MediaFileUpload
+
+        mime_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        media = MediaFileUpload(file_path, mimetype=mime_type, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+        files = self.drive.auth.service.files()
+        if file_id is not None:
+            request = files.update(fileId=file_id, body=file_metadata, media_body=media)
+        else:
+            request = files.insert(body=file_metadata, media_body=media)
+
+        response = None
+        while response is None:
+            _, response = request.next_chunk(http=self._thread_http(), num_retries=self.chunk_retries)
+        return response['id']
+
+    def _thread_http(self):
+        """Return this thread's authorized HTTP object (httplib2 is not thread-safe)"""
+        auth = self.drive.auth
+        if not getattr(auth.thread_local, "http", None):
+            auth.thread_local.http = auth.Get_Http_Object()
+        return auth.thread_local.http
+
+
+class LocalMockBackend(StorageBackend):
+    """
+    In-process stand-in for Drive that stores files in a local directory
+
+    Every call sleeps for a simulated round-trip latency, calls beyond
+    rate_limit per second fail with a 429, and a random failure_rate of
+    calls fail with a 503, so sync concurrency and retry behaviour can be
+    load-tested without credentials or network access.
+    """
+
+    def __init__(self, root, latency=0.05, jitter=0.5, rate_limit=None, failure_rate=0.0,
+                 bandwidth=None, seed=None):
+        """
+        Initialize the mock backend
+
+        Args:
+            root: Directory that plays the role of My Drive
+            latency: Mean simulated round-trip time per call, in seconds
+            jitter: Relative random variation of the latency (0.5 = +/-50%)
+            rate_limit: Maximum calls per second before 429 errors (None = unlimited)
+            failure_rate: Fraction of calls that fail with a transient 503
+            bandwidth: Simulated upload bandwidth in bytes per second (None = unlimited)
+            seed: Random seed, for reproducible runs
+        """
+        super().__init__()
+        self.root = root
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.failure_rate = failure_rate
+        self.bandwidth = bandwidth
+        self.errors = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        # File ID -> path, so listings return stable IDs
+        self._ids = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _call(self, operation, nbytes=0):
+        """Count a call and simulate its latency, rate limiting and random failures"""
+        self._count(operation)
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_calls = 0
+            self._window_calls += 1
+            limited = self.rate_limit is not None and self._window_calls > self.rate_limit
+            failed = self._random.random() < self.failure_rate
+            delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+
+        if self.bandwidth:
+            delay += nbytes / self.bandwidth
+        time.sleep(max(delay, 0))
+
+        if limited:
+            self.errors['rate_limited'] += 1
+            raise StorageError("Rate limit exceeded", status=429)
+        if failed:
+            self.errors['failed'] += 1
+            raise StorageError("Backend error", status=503)
+
+    def ensure_folder(self, folder_name):
+        self._call('list')
+        path = os.path.join(self.root, folder_name)
+        os.makedirs(path, exist_ok=True)
+        return f"folder:{folder_name}"
+
+    def _folder_path(self, folder_id):
+        return os.path.join(self.root, folder_id.split(':', 1)[1]) if folder_id else self.root
+
+    def list_files(self, folder_id):
+        self._call('list')
+        folder = self._folder_path(folder_id)
+        with self._lock:
+            ids = {path: file_id for file_id, path in self._ids.items()}
+
+        files = []
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                md5 = hashlib.md5(f.read()).hexdigest()
+            files.append({'id': ids.get(path, name), 'title': name, 'md5Checksum': md5})
+        return files
+
+    def find_files(self, folder_id, titles):
+        # Simulates a single batch request
+        self._call('batch')
+        folder = self._folder_path(folder_id)
+        with self._lock:
+            ids = {path: file_id for file_id, path in self._ids.items()}
+
+        found = {}
+        for title in set(titles):
+            path = os.path.join(folder, title)
+            if os.path.isfile(path):
+                found[title] = {'id': ids.get(path, title), 'title': title}
+        return found
+
+    def upload(self, file_path, folder_id=None):
+        self._call('upload', nbytes=os.path.getsize(file_path))
+        destination = os.path.join(self._folder_path(folder_id), os.path.basename(file_path))
+        shutil.copyfile(file_path, destination)
+        file_id = uuid.uuid4().hex
+        with self._lock:
+            self._ids[file_id] = destination
+        return file_id
+
+    def update(self, file_id, file_path):
+        self._call('update', nbytes=os.path.getsize(file_path))
+        with self._lock:
+            destination = self._ids.get(file_id)
+        if destination is None or not os.path.isfile(destination):
+            raise StorageError(f"File {file_id} not found", status=404)
+        shutil.copyfile(file_path, destination)
+        return file_id
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import threading
+
+# States an upload moves through. Finished uploads end in done, or in
+# removed if the local file disappeared first; compaction drops both.
+QUEUED = "queued"
+UPLOADING = "uploading"
+DONE = "done"
+FAILED = "failed"
+REMOVED = "removed"
+
+
+class UploadJournal:
+    """
+    Append-only log of the uploads waiting for, or in progress to, Drive
+
+    Every state change of a file is appended to a JSON lines file and
+    flushed before the change takes effect, so after a crash or power cut
+    replaying the file gives the state of every upload. Entries are keyed by
+    file name, which is also the upload's idempotency key on Drive: a file
+    left in the uploading state by a crash may or may not have reached
+    Drive, so it is looked up there by name before it is sent again, and a
+    copy that made it is recorded instead of uploaded twice. The MD5 logged
+    with each attempt tells which content the attempt carried.
+
+    The file is compacted, dropping finished uploads, when it is opened and
+    whenever it has grown well past the number of unfinished ones.
+    """
+
+    def __init__(self, path, compact_threshold=1000):
+        """
+        Open (or create) the journal and replay it
+
+        Args:
+            path: Path of the journal file
+            compact_threshold: Minimum number of lines before the journal is compacted
+        """
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        # File name -> latest entry, for uploads that are not done
+        self._entries = {}
+        self._lines = 0
+        self._closed = False
+        self._replay()
+        # Uploads that were in flight when the journal was last closed
+        self.interrupted = sorted(name for name, entry in self._entries.items() if entry["state"] == UPLOADING)
+        self._compact()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; everything before it is intact
+                    continue
+                self._lines += 1
+                self._apply(entry)
+
+    def _apply(self, entry):
+        if entry["state"] in (DONE, REMOVED):
+            self._entries.pop(entry["name"], None)
+        else:
+            self._entries[entry["name"]] = dict(self._entries.get(entry["name"], {}), **entry)
+
+    def _append(self, entries, durable=True):
+        """Write entries to the journal, then apply them; ignored once the journal is closed"""
+        if not entries:
+            return
+        data = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+        with self._lock:
+            if self._closed:
+                # An upload that outlived the sync; replaying the journal finds it unfinished
+                return
+            self._file.write(data)
+            self._file.flush()
+            if durable:
+                os.fsync(self._file.fileno())
+            self._lines += len(entries)
+            for entry in entries:
+                self._apply(entry)
+            if self._lines > max(self.compact_threshold, 4 * len(self._entries)):
+                self._file.close()
+                self._compact()
+                self._file = open(self.path, "a", encoding="utf-8")
+
+    def _compact(self):
+        """Rewrite the journal with only the latest entry of each unfinished upload"""
+        if self._lines <= len(self._entries):
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._lines = len(self._entries)
+
+    def queue(self, file_paths):
+        """Record files as waiting for upload, unless they already are"""
+        now = time.time()
+        entries = []
+        with self._lock:
+            queued = set(self._entries)
+        for path in file_paths:
+            name = os.path.basename(path)
+            if name in queued:
+                continue
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            queued.add(name)
+            entries.append({"name": name, "path": path, "state": QUEUED, "size": size, "queued_at": now, "time": now})
+        self._append(entries)
+
+    def uploading(self, file_path, md5, attempt=1):
+        """Record that an upload is starting, with the MD5 that identifies it"""
+        # Not synced to disk: losing this entry only means the upload is not known to have started
+        self._append([{"name": os.path.basename(file_path), "path": file_path, "state": UPLOADING,
+                       "md5": md5, "attempt": attempt, "time": time.time()}], durable=False)
+
+    def done(self, names, drive_ids=None):
+        """Record that files are on Drive"""
+        drive_ids = drive_ids or {}
+        now = time.time()
+        with self._lock:
+            names = [name for name in names if name in self._entries]
+        self._append([{"name": name, "state": DONE, "drive_id": drive_ids.get(name), "time": now}
+                      for name in names])
+
+    def remove(self, names):
+        """Record that files will not be uploaded because they no longer exist locally"""
+        now = time.time()
+        with self._lock:
+            names = [name for name in names if name in self._entries]
+        self._append([{"name": name, "state": REMOVED, "time": now} for name in names])
+
+    def failed(self, file_path, error):
+        """Record that an upload failed; it is retried by the next sync"""
+        self._append([{"name": os.path.basename(file_path), "path": file_path, "state": FAILED,
+                       "error": str(error), "time": time.time()}])
+
+    def pending(self):
+        """Return the entries of every upload that is not done"""
+        with self._lock:
+            return [dict(entry) for entry in self._entries.values()]
+
+    def backlog(self):
+        """Return the number and total size of the files waiting for upload, and how many have failed"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "files": len(entries),
+            "bytes": sum(entry.get("size", 0) for entry in entries),
+            "failed": sum(1 for entry in entries if entry["state"] == FAILED),
+            "oldest": min((entry.get("queued_at", entry["time"]) for entry in entries), default=None)
+        }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._file.close()
@@ -0,0 +1,170 @@
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+def file_md5(file_path, block_size=1024 * 1024):
+    """Return the MD5 hex digest of a file (the checksum Drive reports as md5Checksum)"""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SyncManifest:
+    """
+    Local record of the files that have been uploaded to Drive
+
+    Files are keyed by Drive folder ID and file name, and store the size,
+    modification time and MD5 of the local file along with its Drive ID.
+    Several names may share a Drive ID when their content is identical and
+    only one copy was uploaded.
+    Small key/value metadata such as cached folder IDs lives in a separate
+    table. A single connection is shared between threads behind a lock.
+    Once closed, lookups find nothing and changes are ignored, so uploads
+    still finishing after the sync stopped cannot fail on it.
+    """
+
+    def __init__(self, path):
+        """
+        Open (or create) the manifest database
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._closed = False
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " folder_id TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " size INTEGER,"
+                " mtime REAL,"
+                " md5 TEXT,"
+                " drive_id TEXT,"
+                " uploaded_at REAL,"
+                " PRIMARY KEY (folder_id, name))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS files_md5 ON files (folder_id, md5)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def files(self, folder_id):
+        """Return a dict of file name to row dict for every file recorded in a folder"""
+        with self._lock:
+            if self._closed:
+                return {}
+            rows = self._conn.execute(
+                "SELECT name, size, mtime, md5, drive_id, uploaded_at FROM files WHERE folder_id = ?",
+                (folder_id,)
+            ).fetchall()
+        return {
+            row[0]: {"size": row[1], "mtime": row[2], "md5": row[3], "drive_id": row[4], "uploaded_at": row[5]}
+            for row in rows
+        }
+
+    def known(self, folder_id, names):
+        """Return the subset of names that are recorded in a folder"""
+        names = list(names)
+        if not names:
+            return set()
+
+        placeholders = ", ".join("?" * len(names))
+        with self._lock:
+            if self._closed:
+                return set()
+            rows = self._conn.execute(
+                f"SELECT name FROM files WHERE folder_id = ? AND name IN ({placeholders})",
+                [folder_id] + names
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def records(self, folder_id, names):
+        """Return a dict of file name to row dict for those names that are recorded in a folder"""
+        names = list(names)
+        if not names:
+            return {}
+
+        placeholders = ", ".join("?" * len(names))
+        with self._lock:
+            if self._closed:
+                return {}
+            rows = self._conn.execute(
+                f"SELECT name, size, mtime, md5, drive_id, uploaded_at FROM files"
+                f" WHERE folder_id = ? AND name IN ({placeholders})",
+                [folder_id] + names
+            ).fetchall()
+        return {
+            row[0]: {"size": row[1], "mtime": row[2], "md5": row[3], "drive_id": row[4], "uploaded_at": row[5]}
+            for row in rows
+        }
+
+    def find_md5(self, folder_id, md5):
+        """Return (name, drive ID) of a file recorded in a folder with the given MD5, or None"""
+        with self._lock:
+            if self._closed:
+                return None
+            row = self._conn.execute(
+                "SELECT name, drive_id FROM files WHERE folder_id = ? AND md5 = ? AND drive_id IS NOT NULL LIMIT 1",
+                (folder_id, md5)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def drive_id_users(self, folder_id, drive_id):
+        """Return the number of files recorded in a folder that share a Drive file"""
+        with self._lock:
+            if self._closed:
+                return 0
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE folder_id = ? AND drive_id = ?", (folder_id, drive_id)
+            ).fetchone()[0]
+
+    def record(self, folder_id, name, size, mtime, md5, drive_id, uploaded_at=None):
+        """Insert or replace the record of an uploaded file"""
+        with self._lock:
+            if self._closed:
+                return
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (folder_id, name, size, mtime, md5, drive_id, uploaded_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (folder_id, name, size, mtime, md5, drive_id, uploaded_at or time.time())
+                )
+
+    def forget(self, folder_id, names):
+        """Remove records so the files are uploaded again"""
+        with self._lock:
+            if self._closed:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM files WHERE folder_id = ? AND name = ?",
+                    [(folder_id, name) for name in names]
+                )
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            if self._closed:
+                return default
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            if self._closed:
+                return
+            with self._conn:
+                if value is None:
+                    self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+                else:
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._conn.close()
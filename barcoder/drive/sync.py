@@ -1,18 +1,34 @@
 import os
 import time
+import shutil
+import random
 import threading
-from pydrive2.auth import GoogleAuth
-from pydrive2.drive import GoogleDrive
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from barcoder.core.metrics import REGISTRY
+from barcoder.drive.backends import GoogleDriveBackend, CONFIG_DIR, CLIENT_SECRETS_PATH, CREDENTIALS_PATH
+from barcoder.drive.journal import UploadJournal
+from barcoder.drive.manifest import SyncManifest, file_md5
+from barcoder.drive.watcher import FolderWatcher
 
 # Constants for file paths
-CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
-CLIENT_SECRETS_PATH = os.path.join(CONFIG_DIR, "client_secrets.json")
-CREDENTIALS_PATH = os.path.join(CONFIG_DIR, "mycreds.txt")
+MANIFEST_PATH = os.path.join(CONFIG_DIR, "sync_manifest.sqlite3")
+JOURNAL_PATH = os.path.join(CONFIG_DIR, "upload_journal.jsonl")
 IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "images")
+# Extensions of the capture formats the writer produces (see barcoder.core.writer)
+UPLOAD_EXTENSIONS = ('.jpg', '.webp')
+
+
+def _changed(stat, record):
+    """Return True if a file's stat differs from its manifest record"""
+    return stat.st_size != record["size"] or stat.st_mtime != record["mtime"]
+
 
 class GoogleDriveSync:
-    def __init__(self, folder_path=IMAGES_DIR, sync_interval=60, drive_folder_name="BarcoderImages"):
+    def __init__(self, folder_path=IMAGES_DIR, sync_interval=60, drive_folder_name="BarcoderImages",
+                 upload_workers=4, max_retries=5, retry_backoff=1.0, resumable_threshold=5 * 1024 * 1024,
+                 progress_callback=None, manifest_path=MANIFEST_PATH, reconcile_interval=3600,
+                 watch=True, debounce=2.0, backend=None, start_delay=0.0, journal_path=JOURNAL_PATH):
         """
         Initialize Google Drive sync functionality
 
@@ -20,50 +36,152 @@ class GoogleDriveSync:
             folder_path: Local folder to sync with Google Drive
             sync_interval: Sync interval in seconds
             drive_folder_name: Name of the folder to use in Google Drive
+            upload_workers: Number of files uploaded concurrently
+            max_retries: Number of retries per file after transient errors
+            retry_backoff: Initial retry delay in seconds, doubled on every retry
+            resumable_threshold: Files larger than this (bytes) are uploaded in
+                                 resumable chunks that are retried individually
+            progress_callback: Optional callable invoked with
+                               (uploaded, total, file_name, success) after each file
+            manifest_path: SQLite file recording what has been uploaded
+            reconcile_interval: Seconds between full listings of the Drive folder
+                                used to reconcile the manifest with Drive
+            watch: Upload new files as soon as they appear instead of waiting for
+                   the next poll; a full sync still runs every sync_interval
+            debounce: Seconds to collect new files into one batch before uploading
+            backend: StorageBackend to upload to (defaults to Google Drive)
+            start_delay: Seconds the sync thread waits before its first sync, so
+                         start-up work does not compete with opening the window
+            journal_path: Append-only log of pending and in-flight uploads
         """
         self.folder_path = folder_path
         self.sync_interval = sync_interval
         self.drive_folder_name = drive_folder_name
+        self.upload_workers = max(1, upload_workers)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.progress_callback = progress_callback
+        self.reconcile_interval = reconcile_interval
+        self.watch = watch
+        self.debounce = debounce
+        self.start_delay = start_delay
+        self.backend = backend or GoogleDriveBackend(resumable_threshold=resumable_threshold, chunk_retries=max_retries)
         self.authenticated = False
-        self.drive = None
         self.sync_thread = None
         self.stop_sync = False
+        self._stop_event = threading.Event()
+        # Set by notify_file (and stop) to wake the sync thread early
+        self._wake_event = threading.Event()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self.watcher = None
+        # Long-lived upload threads keep their authorized HTTP objects, and with
+        # them the open connections to Drive, from one batch to the next
+        self._executor = None
+        # Failed authentication is retried with exponential backoff
+        self._auth_failures = 0
+        self._auth_retry_at = 0.0
+        self.upload_seconds = REGISTRY.histogram(
+            "barcoder_upload_seconds", "Time to upload a file, including retries"
+        )
+        self.upload_bytes = REGISTRY.counter("barcoder_upload_bytes_total", "Bytes uploaded")
+        self.duplicates = REGISTRY.counter(
+            "barcoder_upload_duplicates_total", "Files not uploaded because identical content is already on Drive"
+        )
         # Ensure folder exists
         os.makedirs(folder_path, exist_ok=True)
         # Ensure config directory exists
         os.makedirs(CONFIG_DIR, exist_ok=True)
+        self.manifest = SyncManifest(manifest_path)
+        # Uploads pending or in flight survive restarts and crashes in the journal
+        self.journal = UploadJournal(journal_path)
+        # Interrupted uploads may have reached Drive; they are only sent again
+        # once a lookup on Drive has shown they did not
+        self._unverified = set(self.journal.interrupted)
+        REGISTRY.register_collector("drive_sync", self.collect_metrics)
 
-    def authenticate(self):
-        """Authenticate with Google Drive"""
+    def collect_metrics(self, registry):
+        """Copy the number of files waiting for upload into the metrics registry"""
+        with self._pending_lock:
+            pending = len(self._pending)
+        registry.gauge("barcoder_upload_queue_depth", "Files reported for upload and not yet synced").set(pending)
+        backlog = self.journal.backlog()
+        registry.gauge("barcoder_upload_backlog_files", "Files in the upload journal not yet on Drive").set(backlog["files"])
+        registry.gauge("barcoder_upload_backlog_bytes", "Size of the files not yet on Drive").set(backlog["bytes"])
+        registry.gauge("barcoder_upload_failed_files", "Files whose last upload attempt failed").set(backlog["failed"])
+
+    def backlog(self):
+        """
+        Return the upload backlog from the journal and the free space left for captures
+
+        Returns:
+            Dict with the number of files waiting for upload, their total size
+            in bytes, how many have failed, when the oldest was queued, and
+            the free bytes on the sync folder's disk
+        """
+        backlog = self.journal.backlog()
         try:
-            gauth = GoogleAuth()
-            # Try to load saved client credentials
-            gauth.LoadClientConfigFile(CLIENT_SECRETS_PATH)
-            gauth.LoadCredentialsFile(CREDENTIALS_PATH)
-
-            if gauth.credentials is None:
-                # Authenticate if they're not there
-                # Set access_type to offline to get a refresh token
-                gauth.GetFlow()
-                gauth.flow.params.update({'access_type': 'offline'})
-                gauth.flow.params.update({'approval_prompt': 'force'})
-                gauth.LocalWebserverAuth()
-            elif gauth.access_token_expired:
-                # Refresh them if expired
-                gauth.Refresh()
+            backlog["free_bytes"] = shutil.disk_usage(self.folder_path).free
+        except OSError:
+            backlog["free_bytes"] = None
+        return backlog
+
+    def resume(self):
+        """
+        Pick up the uploads recorded in the journal by an earlier run
+
+        Entries whose file has gone, has moved out of the sync folder or is
+        in the manifest unchanged are closed. The rest are found by the first
+        sync, which checks the interrupted ones against Drive first.
+        """
+        folder_id = self.manifest.get_meta(f"folder_id:{self.drive_folder_name}")
+        uploaded = self.manifest.files(folder_id) if folder_id else {}
+        folder = os.path.abspath(self.folder_path)
+
+        finished = []
+        stale = []
+        remaining = 0
+        for entry in self.journal.pending():
+            path = entry.get("path") or os.path.join(self.folder_path, entry["name"])
+            if os.path.dirname(os.path.abspath(path)) != folder or not os.path.isfile(path):
+                stale.append(entry["name"])
+            elif entry["name"] in uploaded and not _changed(os.stat(path), uploaded[entry["name"]]):
+                finished.append(entry["name"])
             else:
-                # Initialize the saved creds
-                gauth.Authorize()
+                remaining += 1
+        self.journal.done(finished)
+        self.journal.remove(stale)
 
-            # Save the current credentials to a file
-            gauth.SaveCredentialsFile(CREDENTIALS_PATH)
-            self.drive = GoogleDrive(gauth)
-            self.authenticated = True
-            return True
+        if remaining:
+            print(f"Resuming {remaining} uploads from the journal, {len(self._unverified)} of them interrupted")
+
+    def authenticate(self):
+        """
+        Authenticate with the storage backend
+
+        The backend keeps one authorized session for the lifetime of the sync
+        and refreshes its token before it expires, so this normally runs once.
+        After a failure further attempts are held off with exponential backoff
+        instead of being retried on every upload.
+        """
+        if time.time() < self._auth_retry_at:
+            return False
+
+        try:
+            self.authenticated = bool(self.backend.authenticate())
         except Exception as e:
             print(f"Authentication failed: {e}")
             self.authenticated = False
-            return False
+
+        if self.authenticated:
+            self._auth_failures = 0
+            self._auth_retry_at = 0.0
+        else:
+            self._count_error("authenticate")
+            delay = min(self.retry_backoff * (2 ** self._auth_failures), self.sync_interval)
+            self._auth_failures += 1
+            self._auth_retry_at = time.time() + delay
+        return self.authenticated
 
     def create_drive_folder(self, folder_name=None):
         """Create a folder in Google Drive if it doesn't exist"""
@@ -74,64 +192,322 @@ class GoogleDriveSync:
             if not self.authenticate():
                 return None
 
-        # Check if folder already exists
-        folder_list = self.drive.ListFile({'q': f"title='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"}).GetList()
+        return self.backend.ensure_folder(folder_name)
 
-        if folder_list:
-            return folder_list[0]['id']
-        else:
-            # Create folder
-            folder_metadata = {
-                'title': folder_name,
-                'mimeType': 'application/vnd.google-apps.folder'
-            }
-            folder = self.drive.CreateFile(folder_metadata)
-            folder.Upload()
-            return folder['id']
-
-    def upload_file(self, file_path, folder_id=None):
-        """Upload a file to Google Drive"""
+    def get_folder_id(self):
+        """Return the Drive folder ID, looking it up only if it is not cached in the manifest"""
+        key = f"folder_id:{self.drive_folder_name}"
+        folder_id = self.manifest.get_meta(key)
+        if folder_id is None:
+            folder_id = self.create_drive_folder()
+            if folder_id:
+                self.manifest.set_meta(key, folder_id)
+        return folder_id
+
+    def upload_file(self, file_path, folder_id=None, file_id=None):
+        """
+        Upload a file to Google Drive, retrying transient errors with exponential backoff
+
+        Args:
+            file_path: Local file to upload
+            folder_id: Drive folder to upload into
+            file_id: Drive file to upload the content to as a new revision; if it
+                     can no longer be updated, the content is uploaded as a new file
+
+        Returns:
+            The Drive file ID on success, None on failure
+        """
         if not self.authenticated:
             if not self.authenticate():
-                return False
+                return None
 
-        try:
-            file_name = os.path.basename(file_path)
-            file_metadata = {'title': file_name}
+        file_name = os.path.basename(file_path)
+        for attempt in range(self.max_retries + 1):
+            try:
+                if file_id is not None:
+                    return self.backend.update(file_id, file_path)
+                return self.backend.upload(file_path, folder_id)
+            except Exception as e:
+                self._count_error("upload")
+                if file_id is not None and not self.backend.is_retryable(e):
+                    # Deleted on Drive, most likely; the new content becomes a file of its own
+                    print(f"Failed to update {file_name} on Drive ({e}), uploading it as a new file")
+                    # The failed update does not use up one of the upload's retries
+                    return self.upload_file(file_path, folder_id)
+                if attempt == self.max_retries or not self.backend.is_retryable(e):
+                    print(f"Failed to upload {file_path}: {e}")
+                    return None
 
-            if folder_id:
-                file_metadata['parents'] = [{'id': folder_id}]
-
-            file = self.drive.CreateFile(file_metadata)
-            file.SetContentFile(file_path)
-            file.Upload()
-            return True
-        except Exception as e:
-            print(f"Failed to upload {file_path}: {e}")
-            return False
+                # Exponential backoff with jitter so parallel workers do not retry in lockstep
+                delay = self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"Upload of {file_name} failed ({e}), retrying in {delay:.1f}s")
+                if self._stop_event.wait(delay):
+                    return None
+        return None
 
     def sync_folder(self):
         """Sync the local folder with Google Drive"""
+        # Listing the whole Drive folder is expensive, so only do it occasionally
+        last_reconcile = float(self.manifest.get_meta(f"last_reconcile:{self.drive_folder_name}", 0))
+        reconcile_due = time.time() - last_reconcile >= self.reconcile_interval
+
+        # With the folder ID cached and nothing new to upload, Drive is not
+        # needed at all, so authentication waits until there is work to do
+        folder_id = self.manifest.get_meta(f"folder_id:{self.drive_folder_name}")
+        if folder_id and not reconcile_due:
+            pending = self._pending_files(folder_id)
+            if not pending:
+                return
+            # Journaled before authenticating, so files held up by a network outage show in the backlog
+            self.journal.queue(pending)
+
         if not self.authenticated:
             if not self.authenticate():
                 return
 
-        folder_id = self.create_drive_folder()
+        if reconcile_due:
+            folder_id = self.reconcile()
+        else:
+            folder_id = self.get_folder_id()
         if not folder_id:
             print("Failed to create or find Google Drive folder")
             return
 
-        # Get list of already uploaded files
-        file_list = self.drive.ListFile({'q': f"'{folder_id}' in parents and trashed=false"}).GetList()
-        uploaded_files = [file['title'] for file in file_list]
+        pending = self._pending_files(folder_id)
+        self.upload_files(self._skip_existing(pending, folder_id), folder_id)
+
+    def _pending_files(self, folder_id):
+        """Return the paths of local files that are not in the manifest for a folder, or have changed since"""
+        # A size or modification time that differs from the manifest means the
+        # file was replaced; its new content is uploaded as a new revision
+        uploaded_files = self.manifest.files(folder_id)
+        pending = []
+        with os.scandir(self.folder_path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(UPLOAD_EXTENSIONS) or not entry.is_file():
+                    continue
+                record = uploaded_files.get(entry.name)
+                if record is None or _changed(entry.stat(), record):
+                    pending.append(entry.path)
+        return pending
+
+    def _new_or_changed(self, folder_id, file_paths):
+        """Return the files that are not in the manifest for a folder, or have changed since"""
+        records = self.manifest.records(folder_id, [os.path.basename(path) for path in file_paths])
+        pending = []
+        for path in file_paths:
+            record = records.get(os.path.basename(path))
+            try:
+                if record is None or _changed(os.stat(path), record):
+                    pending.append(path)
+            except OSError:
+                continue
+        return pending
+
+    def notify_file(self, file_path):
+        """Queue a file that has just been written for upload after the debounce window"""
+        if os.path.dirname(os.path.abspath(file_path)) != os.path.abspath(self.folder_path):
+            return
+        with self._pending_lock:
+            self._pending.add(file_path)
+        self._wake_event.set()
+
+    def _take_pending(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+        return sorted(pending)
+
+    def sync_files(self, file_paths):
+        """Upload the given files if they are not in the manifest yet or have changed. Returns the number uploaded."""
+        file_paths = [path for path in file_paths if path.endswith(UPLOAD_EXTENSIONS) and os.path.isfile(path)]
+        if not file_paths:
+            return 0
+
+        # Journal the new files before authenticating, so they are in the backlog even while offline
+        cached_folder_id = self.manifest.get_meta(f"folder_id:{self.drive_folder_name}")
+        if cached_folder_id:
+            self.journal.queue(self._new_or_changed(cached_folder_id, file_paths))
 
-        # Upload new files
-        for file_name in os.listdir(self.folder_path):
-            if file_name.endswith('.jpg') and file_name not in uploaded_files:
-                file_path = os.path.join(self.folder_path, file_name)
-                if os.path.isfile(file_path):
-                    if self.upload_file(file_path, folder_id):
-                        print(f"Uploaded {file_name} to Google Drive")
+        if not self.authenticated:
+            if not self.authenticate():
+                return 0
+
+        folder_id = self.get_folder_id()
+        if not folder_id:
+            print("Failed to create or find Google Drive folder")
+            return 0
+
+        pending = self._new_or_changed(folder_id, file_paths)
+        return self.upload_files(self._skip_existing(pending, folder_id), folder_id)
+
+    def _skip_existing(self, file_paths, folder_id):
+        """
+        Record files that are already in the Drive folder and return the rest
+
+        All names are checked with one batch request, so files uploaded by an
+        earlier run that never reached the manifest are not uploaded twice.
+        Files in the manifest are already on Drive and are passed through, to
+        be uploaded as new revisions.
+        """
+        if not file_paths:
+            return file_paths
+
+        known = self.manifest.known(folder_id, [os.path.basename(path) for path in file_paths])
+        revised = [path for path in file_paths if os.path.basename(path) in known]
+        file_paths = [path for path in file_paths if os.path.basename(path) not in known]
+        if not file_paths:
+            return revised
+
+        try:
+            existing = self.backend.find_files(folder_id, [os.path.basename(path) for path in file_paths])
+        except Exception as e:
+            self._count_error("find_files")
+            # Files that are new for sure can still be uploaded, but interrupted
+            # uploads wait for the next cycle rather than risk a duplicate
+            print(f"Failed to check for existing files: {e}")
+            return revised + [path for path in file_paths if os.path.basename(path) not in self._unverified]
+
+        self._unverified.difference_update(os.path.basename(path) for path in file_paths)
+        pending = revised
+        adopted = {}
+        for path in file_paths:
+            remote = existing.get(os.path.basename(path))
+            if remote is None:
+                pending.append(path)
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self.manifest.record(folder_id, os.path.basename(path), stat.st_size, stat.st_mtime,
+                                 remote.get('md5Checksum'), remote['id'])
+            adopted[os.path.basename(path)] = remote['id']
+        self.journal.done(list(adopted), adopted)
+        return pending
+
+    def reconcile(self):
+        """
+        Bring the manifest in line with the files actually in the Drive folder
+
+        Files uploaded outside the manifest (or before it existed) are adopted,
+        and records of files that have disappeared from Drive are dropped so
+        they are uploaded again. The folder ID is looked up again as well, in
+        case the folder was deleted or recreated.
+
+        Returns:
+            The current folder ID, or None if the folder could not be found
+        """
+        self.manifest.set_meta(f"folder_id:{self.drive_folder_name}", None)
+        folder_id = self.get_folder_id()
+        if not folder_id:
+            return None
+
+        remote_files = {file['title']: file for file in self.backend.list_files(folder_id)}
+        known_files = self.manifest.files(folder_id)
+
+        # Names recorded against another name's Drive file (identical content) count as present
+        remote_ids = {file['id'] for file in remote_files.values()}
+        missing = [name for name, record in known_files.items()
+                   if name not in remote_files and record["drive_id"] not in remote_ids]
+        if missing:
+            self.manifest.forget(folder_id, missing)
+
+        adopted = {}
+        for name, remote in remote_files.items():
+            file_path = os.path.join(self.folder_path, name)
+            if name not in known_files and os.path.isfile(file_path):
+                stat = os.stat(file_path)
+                self.manifest.record(folder_id, name, stat.st_size, stat.st_mtime, remote.get('md5Checksum'), remote['id'])
+                adopted[name] = remote['id']
+        self.journal.done(list(adopted), adopted)
+        # The listing covers every interrupted upload
+        self._unverified.clear()
+
+        self.manifest.set_meta(f"last_reconcile:{self.drive_folder_name}", time.time())
+        return folder_id
+
+    @staticmethod
+    def _count_error(operation):
+        REGISTRY.counter("barcoder_drive_errors_total", "Failed storage operations, including retried ones",
+                         operation=operation).inc()
+
+    def _upload_and_record(self, file_path, folder_id):
+        """Upload a file and record it in the manifest. Returns True on success."""
+        file_name = os.path.basename(file_path)
+        if self._stop_event.is_set():
+            # Left queued in the journal for the next run
+            return False
+        try:
+            stat = os.stat(file_path)
+            md5 = file_md5(file_path)
+        except FileNotFoundError:
+            # Deleted since the folder was scanned; there is nothing left to upload
+            self.journal.remove([file_name])
+            return False
+        except OSError as e:
+            print(f"Failed to read {file_path}: {e}")
+            self.journal.failed(file_path, e)
+            return False
+
+        record = self.manifest.records(folder_id, [file_name]).get(file_name)
+        if record is not None and record["md5"] == md5:
+            # Touched but not changed; Drive already has this content
+            self.manifest.record(folder_id, file_name, stat.st_size, stat.st_mtime, md5, record["drive_id"])
+            self.journal.done([file_name], {file_name: record["drive_id"]})
+            return True
+
+        duplicate = self.manifest.find_md5(folder_id, md5) if record is None else None
+        if duplicate is not None:
+            # A new name for content already on Drive; a second copy would only cost an upload
+            name, drive_id = duplicate
+            print(f"{file_name} is identical to {name}, recorded without uploading it again")
+            self.manifest.record(folder_id, file_name, stat.st_size, stat.st_mtime, md5, drive_id)
+            self.journal.done([file_name], {file_name: drive_id})
+            self.duplicates.inc()
+            return True
+
+        # Changed content goes to the same Drive file as a new revision, unless
+        # that file also stands for other names with identical content
+        revision_of = None
+        if record is not None and record["drive_id"]:
+            if self.manifest.drive_id_users(folder_id, record["drive_id"]) == 1:
+                revision_of = record["drive_id"]
+
+        self.journal.uploading(file_path, md5)
+        start = time.perf_counter()
+        drive_id = self.upload_file(file_path, folder_id, file_id=revision_of)
+        if not drive_id:
+            self.journal.failed(file_path, "upload failed" if self.authenticated else "not authenticated")
+            return False
+        self.upload_seconds.observe(time.perf_counter() - start)
+        self.upload_bytes.inc(stat.st_size)
+        self.manifest.record(folder_id, file_name, stat.st_size, stat.st_mtime, md5, drive_id)
+        self.journal.done([file_name], {file_name: drive_id})
+        print(f"Uploaded {file_name} to Google Drive" + (" as a new revision" if drive_id == revision_of else ""))
+        return True
+
+    def upload_files(self, file_paths, folder_id):
+        """Upload files concurrently, reporting progress after each one. Returns the number uploaded."""
+        if not file_paths:
+            return 0
+
+        self.journal.queue(file_paths)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.upload_workers, thread_name_prefix="upload")
+
+        total = len(file_paths)
+        done = 0
+        uploaded = 0
+        futures = {self._executor.submit(self._upload_and_record, path, folder_id): path for path in file_paths}
+        for future in as_completed(futures):
+            file_name = os.path.basename(futures[future])
+            success = future.result()
+            done += 1
+            if success:
+                uploaded += 1
+            if self.progress_callback is not None:
+                self.progress_callback(done, total, file_name, success)
+        return uploaded
 
     def start_sync_thread(self):
         """Start background thread for periodic syncing"""
@@ -139,18 +515,84 @@ class GoogleDriveSync:
             return
 
         self.stop_sync = False
+        self._stop_event.clear()
         self.sync_thread = threading.Thread(target=self._sync_worker)
         self.sync_thread.daemon = True
         self.sync_thread.start()
 
+    def _start_watcher(self):
+        if self.watcher is None:
+            self.watcher = FolderWatcher(self.folder_path, self.notify_file, extensions=UPLOAD_EXTENSIONS)
+            if not self.watcher.start():
+                print("watchdog is not installed; new files are picked up from capture notifications and polling")
+
     def _sync_worker(self):
-        """Worker thread that syncs at regular intervals"""
+        """
+        Worker thread that uploads new files as they are reported and polls as a fallback
+
+        A full folder sync runs at start-up and then every sync_interval, even
+        while notifications keep arriving, so reconciling with Drive and
+        retrying failed uploads are never put off. A notification opens a
+        debounce window, and everything reported during it is uploaded as
+        one batch.
+        """
+        # Files reported during the delay are covered by the first full sync
+        if self._stop_event.wait(self.start_delay):
+            return
+        self.resume()
+        if self.watch and not self._stop_event.is_set():
+            # Started here rather than in start_sync_thread to keep watchdog off the start-up path
+            self._start_watcher()
+
+        full_sync = True
+        last_full_sync = time.monotonic()
         while not self.stop_sync:
-            self.sync_folder()
-            time.sleep(self.sync_interval)
+            try:
+                if full_sync:
+                    last_full_sync = time.monotonic()
+                    # The folder scan covers anything that was reported meanwhile
+                    self._take_pending()
+                    self.sync_folder()
+                else:
+                    self.sync_files(self._take_pending())
+            except Exception as e:
+                # Keep the thread alive through network errors; the next cycle retries
+                self._count_error("sync")
+                print(f"Sync failed: {e}")
+
+            remaining = self.sync_interval - (time.monotonic() - last_full_sync)
+            woke = remaining > 0 and self._wake_event.wait(remaining)
+            if self.stop_sync:
+                break
+            if woke:
+                self._stop_event.wait(self.debounce)
+                self._wake_event.clear()
+            full_sync = time.monotonic() - last_full_sync >= self.sync_interval
 
     def stop_sync_thread(self):
-        """Stop the sync thread"""
+        """
+        Stop the sync thread and close the journal and manifest without waiting for uploads
+
+        Called from the GUI thread, so it must not block on the network.
+        Uploads that have not started yet stay queued in the journal for the
+        next run. Uploads already in progress finish in the background, but
+        the closed journal and manifest ignore them, so the next run finds
+        them interrupted and looks them up on Drive before sending them again.
+        A new GoogleDriveSync on the same files can safely open them at once.
+        """
         self.stop_sync = True
+        self._stop_event.set()
+        self._wake_event.set()
         if self.sync_thread is not None:
             self.sync_thread.join(timeout=1)
+            self.sync_thread = None
+        # The sync thread starts the watcher, and does not once the stop event is set
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self._executor is not None:
+            # Queued uploads return at once on the stop event
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.journal.close()
+        self.manifest.close()
@@ -0,0 +1,74 @@
+import os
+import importlib.util
+
+
+def _new_file_handler(callback, extensions):
+    """Create a watchdog handler that forwards files appearing in the watched folder to a callback"""
+    from watchdog.events import FileSystemEventHandler
+
+    class NewFileHandler(FileSystemEventHandler):
+        def _forward(self, path):
+            if path.lower().endswith(extensions):
+                callback(path)
+
+        def on_created(self, event):
+            if not event.is_directory:
+                self._forward(event.src_path)
+
+        def on_moved(self, event):
+            # Captures are written to a temp file and renamed into place
+            if not event.is_directory:
+                self._forward(event.dest_path)
+
+        def on_closed(self, event):
+            if not event.is_directory:
+                self._forward(event.src_path)
+
+    return NewFileHandler()
+
+
+class FolderWatcher:
+    """
+    Watches a folder with inotify/FSEvents/ReadDirectoryChangesW through watchdog
+
+    watchdog is optional and only imported when watching starts; without it
+    sync falls back to notifications from the capture writer plus polling.
+    """
+
+    def __init__(self, folder_path, callback, extensions=('.jpg',)):
+        """
+        Initialize the watcher
+
+        Args:
+            folder_path: Folder to watch (not recursive)
+            callback: Callable invoked with the path of each new or replaced file
+            extensions: File extensions to report
+        """
+        self.folder_path = folder_path
+        self.callback = callback
+        self.extensions = tuple(extensions)
+        self._observer = None
+
+    @staticmethod
+    def available():
+        """Return True if watchdog is installed"""
+        return importlib.util.find_spec("watchdog") is not None
+
+    def start(self):
+        """Start watching; returns False if watchdog is not available"""
+        if not self.available():
+            return False
+        from watchdog.observers import Observer
+
+        os.makedirs(self.folder_path, exist_ok=True)
+        self._observer = Observer()
+        self._observer.schedule(_new_file_handler(self.callback, self.extensions), self.folder_path, recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        return True
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=1)
+            self._observer = None
@@ -1,58 +1,75 @@
-import cv2
 import base64
 import os
-import json
-from PyQt5.QtWidgets import QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QMessageBox
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QImage, QPixmap, QKeyEvent
-from pyzbar.pyzbar import decode
+import time
+from PyQt5.QtWidgets import QMainWindow, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QWidget
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QKeyEvent
 
 from barcoder.gui.dialogs import DriveSettingsDialog
-from barcoder.drive.sync import GoogleDriveSync, CONFIG_DIR
-
-# Path to settings file
-SETTINGS_PATH = os.path.join(CONFIG_DIR, "settings.json")
-# Path to images directory
-IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "images")
+from barcoder.gui.video import CameraView, format_latency
+from barcoder.drive.sync import GoogleDriveSync
+from barcoder.core.settings import SETTINGS_PATH, read_settings, write_settings
+from barcoder.core.pipeline import release_frame
+from barcoder.core.station import ScanStation, camera_settings
+from barcoder.core.stabilizer import AutoCaptureTrigger, DedupCache
+from barcoder.core.fingerprint import CaptureIndex, capture_name
+from barcoder.core.writer import CaptureWriter, EncodingProfile
+from barcoder.core.metrics import REGISTRY, LatencyWindow, MetricsExporter
+
+class WorkerSignals(QObject):
+    """Signals used to hand frames, decode results and progress from worker threads to the GUI thread"""
+    frame_ready = pyqtSignal(int)
+    barcodes_decoded = pyqtSignal(int, object, object)
+    image_saved = pyqtSignal(str)
+    image_save_failed = pyqtSignal(str, str)
+    image_duplicate = pyqtSignal(str, str)
+    upload_progress = pyqtSignal(int, int, str, bool)
 
 class BarcodeCameraApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup=None):
         super().__init__()
+        # StartupProfiler told when the first frame is shown, if start-up is being measured
+        self.startup = startup
         self.setWindowTitle("Barcode Scanner and Image Capture")
         self.setGeometry(100, 100, 700, 600)
 
         # Initialize variables
-        self.cap = cv2.VideoCapture(0)  # Use default camera (0)
         self.current_barcode = None
-        self.current_frame = None
+        # Index of the camera that saw current_barcode; captures are taken from it
+        self.current_camera = 0
 
         # Load settings if available
-        settings = self.load_settings()
+        self.settings = self.load_settings()
+        settings = self.settings
 
         # Drive sync settings
         self.drive_folder_name = settings.get("drive_folder_name", "BarcoderImages")
         sync_interval = settings.get("sync_interval", 60)
         local_folder = settings.get("local_folder", "images")
 
-        # Initialize Google Drive sync
-        self.drive_sync = GoogleDriveSync(
-            folder_path=local_folder,
-            sync_interval=sync_interval,
-            drive_folder_name=self.drive_folder_name
-        )
+        # Initialize Google Drive sync; upload progress is reported through a signal
+        self.signals = WorkerSignals()
+        self.signals.upload_progress.connect(self.handle_upload_progress)
+        self.drive_sync = self.create_drive_sync(local_folder, sync_interval)
 
         # Create central widget and layout
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         layout = QVBoxLayout(central_widget)
 
-        # Create UI elements
-        self.image_label = QLabel()
-        self.image_label.setMinimumSize(640, 480)
-        self.image_label.setAlignment(Qt.AlignCenter)
+        # Create UI elements, one view per camera of the station
+        self.camera_views = []
+        for index, config in enumerate(camera_settings(settings)):
+            view = CameraView(config["name"], scaling=config.get("display_scaling", "smooth"))
+            view.render_timer.timeout.connect(lambda index=index: self.update_frame(index))
+            self.camera_views.append(view)
+        if len(self.camera_views) == 1:
+            self.camera_views[0].video.setMinimumSize(640, 480)
 
         self.status_label = QLabel("Status: Waiting for barcode...")
         self.barcode_label = QLabel("Barcode: None")
+        self.stats_label = QLabel("Decode: -")
+        self.stats_label.setStyleSheet("color: gray;")
 
         self.capture_button = QPushButton("Capture Image")
         self.capture_button.setEnabled(False)
@@ -65,22 +82,97 @@ class BarcodeCameraApp(QMainWindow):
         self.settings_button.clicked.connect(self.show_drive_settings)
 
         # Create keyboard shortcut info label
-        self.shortcut_label = QLabel("Press SPACEBAR to capture image")
+        self.shortcut_label = QLabel("Press SPACEBAR to capture image, F4 to toggle auto-capture, F3 to show performance metrics")
         self.shortcut_label.setStyleSheet("color: blue;")
 
         # Add widgets to layout
-        layout.addWidget(self.image_label)
+        cameras_layout = QHBoxLayout()
+        for view in self.camera_views:
+            cameras_layout.addWidget(view)
+        layout.addLayout(cameras_layout, 1)
         layout.addWidget(self.status_label)
         layout.addWidget(self.barcode_label)
+        layout.addWidget(self.stats_label)
         layout.addWidget(self.shortcut_label)
         layout.addWidget(self.capture_button)
         layout.addWidget(self.sync_button)
         layout.addWidget(self.settings_button)
 
-        # Setup timer for video feed
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(10)  # Update every 10ms
+        # Rendering is capped at display_fps (0 = every frame), independently of capture and decode
+        display_fps = settings.get("display_fps", 30)
+        self.display_interval = 1.0 / display_fps if display_fps > 0 else 0.0
+
+        # Each camera is captured and decoded on its own worker threads, sharing
+        # one decode pool; results arrive through queued signals
+        self.signals.frame_ready.connect(self.update_frame)
+        self.signals.barcodes_decoded.connect(self.handle_barcodes)
+        self.station = ScanStation(
+            settings,
+            on_result=self.signals.barcodes_decoded.emit,
+            on_frame=lambda index, frame: self.signals.frame_ready.emit(index)
+        )
+        self.station.start()
+
+        # Captures are encoded and written on a background thread
+        self.signals.image_saved.connect(self.handle_image_saved)
+        self.signals.image_save_failed.connect(self.handle_image_save_failed)
+        self.signals.image_duplicate.connect(self.handle_image_duplicate)
+        # Captures are versioned per barcode, and repeats of an earlier capture are
+        # not saved unless capture_skip_duplicates is off
+        dedup_distance = settings.get("capture_dedup_distance", 5)
+        if not settings.get("capture_skip_duplicates", True):
+            dedup_distance = None
+        self.writer = CaptureWriter(
+            max_queue=settings.get("capture_queue_size", 16),
+            profile=EncodingProfile.from_settings(settings),
+            workers=settings.get("capture_encode_workers", 2),
+            compare_interval=settings.get("capture_compare_interval", 20),
+            index=CaptureIndex(max_distance=dedup_distance),
+            on_saved=self.signals.image_saved.emit,
+            on_error=self.signals.image_save_failed.emit,
+            on_duplicate=self.signals.image_duplicate.emit
+        )
+        # Captures of a barcode repeated within capture_dedup_window seconds are skipped
+        self.capture_dedup = DedupCache(window=settings.get("capture_dedup_window", 10.0))
+        self.queue_label = QLabel("Save queue: 0")
+        self.statusBar().addPermanentWidget(self.queue_label)
+
+        # Uploads waiting in the journal; past these limits the backlog is flagged,
+        # and captures stop when the disk is about to fill up
+        self.backlog_warn_files = settings.get("upload_backlog_warn_files", 200)
+        self.backlog_warn_bytes = settings.get("upload_backlog_warn_mb", 500) * 1024 * 1024
+        self.capture_min_free_bytes = settings.get("capture_min_free_mb", 200) * 1024 * 1024
+        self.disk_full = False
+        self.backlog_label = QLabel("Upload backlog: 0")
+        self.statusBar().addPermanentWidget(self.backlog_label)
+        # What the encoding profile saves compared with plain full-resolution JPEGs
+        self.savings_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.savings_label)
+
+        # Hands-free capture of barcodes held steady in view, toggled with F4
+        self.auto_capture = settings.get("auto_capture", False)
+        self.auto_trigger = AutoCaptureTrigger(
+            min_frames=settings.get("auto_capture_frames", 5),
+            min_seconds=settings.get("auto_capture_ms", 300) / 1000,
+            cooldown=settings.get("auto_capture_cooldown", 10.0)
+        )
+
+        # Stage latencies and Drive activity drawn over the video, toggled with F3
+        self.metrics_overlay = settings.get("metrics_overlay", False)
+        self._overlay_latency = {
+            stage: LatencyWindow(REGISTRY.histogram(f"barcoder_{stage}_seconds"))
+            for stage in ("save", "upload")
+        }
+
+        # Metrics are exported to a file and/or a local endpoint for dashboards, if configured
+        self.metrics_exporter = MetricsExporter.from_settings(settings)
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.start()
+
+        # Refresh the per-camera rates and decode timings once a second
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_stats)
+        self.stats_timer.start(1000)
 
         # Start background sync
         self.drive_sync.start_sync_thread()
@@ -88,55 +180,242 @@ class BarcodeCameraApp(QMainWindow):
         # Enable key event capture
         self.setFocusPolicy(Qt.StrongFocus)
 
-    def update_frame(self):
-        ret, frame = self.cap.read()
-        if ret:
-            self.current_frame = frame.copy()
-
-            # Try to detect barcode
-            barcodes = decode(frame)
-            if barcodes:
-                # Found a barcode
-                for barcode in barcodes:
-                    barcode_data = barcode.data.decode('utf-8')
-
-                    # Draw rectangle around barcode
-                    (x, y, w, h) = barcode.rect
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-                    # Update barcode data if changed
-                    if self.current_barcode != barcode_data:
-                        self.current_barcode = barcode_data
-
-                        # Convert to base64
-                        encoded_barcode = base64.b64encode(barcode_data.encode()).decode()
-                        self.status_label.setText("Status: Barcode detected!")
-                        self.barcode_label.setText(f"Barcode: {barcode_data} (Base64: {encoded_barcode})")
-
-                        # Enable capture button
-                        self.capture_button.setEnabled(True)
-
-            # Convert frame for display
-            height, width, channel = frame.shape
-            bytes_per_line = 3 * width
-            q_image = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
-            self.image_label.setPixmap(QPixmap.fromImage(q_image).scaled(
-                self.image_label.width(), self.image_label.height(),
-                Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    def update_frame(self, index):
+        """Render the newest frame captured by a camera (runs on the GUI thread)"""
+        view = self.camera_views[index]
+        # Frames arriving faster than display_fps are not rendered; the timer
+        # makes sure the newest one is shown once the interval has passed
+        wait = view.last_render + self.display_interval - time.monotonic()
+        if wait > 0:
+            if not view.render_timer.isActive():
+                view.render_timer.start(int(wait * 1000) + 1)
+            return
+
+        frame = self.station.channels[index].pipeline.latest_frame()
+        if frame is None:
+            return
+
+        # Keep the frame on screen for capture_image; its ring slot is not
+        # reused until the next frame replaces it
+        release_frame(view.current_frame)
+        view.current_frame = frame
+        view.last_render = time.monotonic()
+        with view.render_seconds.time():
+            view.video.show_frame(frame.image, view.last_barcodes)
+        if self.startup is not None:
+            self.startup.first_frame()
+            self.startup = None
+
+    def handle_barcodes(self, index, frame, barcodes):
+        """Apply a decode result from a camera's decode worker (runs on the GUI thread)"""
+        view = self.camera_views[index]
+        # Never let a result from an older frame replace a newer one
+        if frame.seq < view.last_result_seq:
+            return
+        view.last_result_seq = frame.seq
+        view.last_barcodes = barcodes
+
+        # Only barcodes read consistently over several frames, and not just
+        # reported by any camera, update the current barcode
+        for event in self.station.barcode_events(index, barcodes):
+            barcode_data = event.data
+
+            # Update barcode data if changed
+            if self.current_barcode != barcode_data:
+                self.current_barcode = barcode_data
+                self.current_camera = index
+
+                # Convert to base64
+                encoded_barcode = base64.b64encode(barcode_data.encode()).decode()
+                self.status_label.setText(f"Status: Barcode detected! (confidence {event.confidence:.0%})")
+                self.barcode_label.setText(f"Barcode: {barcode_data} (Base64: {encoded_barcode})")
+
+                # Enable capture button
+                self.capture_button.setEnabled(True)
+
+        # Barcodes held in view long enough are captured without a key press
+        if self.auto_capture:
+            for barcode_data in self.auto_trigger.update(barcodes, source=index):
+                if not self.save_capture(index, barcode_data, trigger="auto"):
+                    # Nothing was saved; let the barcode trigger again
+                    self.auto_trigger.forget(barcode_data)
+
+    def update_stats(self):
+        """Show each camera's throughput and queues, and the decode timings of the active camera"""
+        now = time.monotonic()
+        for view, channel in zip(self.camera_views, self.station.channels):
+            view.update_stats(channel.stats(), now)
+        if self.metrics_overlay:
+            self.update_overlay()
+
+        channel = self.station.channels[self.current_camera]
+        summary = channel.decoder.timings.summary()
+        if summary:
+            prefix = f"Decode ({channel.name})" if len(self.station.channels) > 1 else "Decode"
+            self.stats_label.setText(f"{prefix}: {summary}")
+        self.update_queue_depth()
+        self.update_backlog()
+        self.update_savings()
+
+    def update_backlog(self):
+        """Show how many files wait for upload, and warn once the backlog or the disk passes its limit"""
+        backlog = self.drive_sync.backlog()
+        megabytes = backlog["bytes"] / (1024 * 1024)
+        text = f"Upload backlog: {backlog['files']} ({megabytes:.0f} MB)"
+        if backlog["failed"]:
+            text += f", {backlog['failed']} failed"
+
+        free = backlog["free_bytes"]
+        self.disk_full = free is not None and free < self.capture_min_free_bytes
+        over = backlog["files"] >= self.backlog_warn_files or backlog["bytes"] >= self.backlog_warn_bytes
+        if self.disk_full:
+            text += f" - disk almost full ({free / (1024 * 1024):.0f} MB free), captures paused"
+        elif over:
+            text += " - uploads are falling behind, check the connection"
+        self.backlog_label.setText(text)
+        self.backlog_label.setStyleSheet("color: red;" if self.disk_full or over else "")
+
+    def update_savings(self):
+        """Show the disk space, upload bytes and time the encoding profile has saved"""
+        savings = self.writer.savings()
+        if savings is None:
+            return
+        text = (f"Encoding saved {savings['disk_bytes_saved'] / (1024 * 1024):.1f} MB on disk, "
+                f"{savings['upload_bytes_saved'] / (1024 * 1024):.1f} MB of uploads "
+                f"({100 * (1 - savings['upload_ratio']):.0f}% smaller)")
+        # Upload time saved, at the upload rate measured so far
+        upload_seconds = REGISTRY.histogram("barcoder_upload_seconds").sum
+        uploaded = REGISTRY.counter("barcoder_upload_bytes_total").value
+        if upload_seconds > 0 and uploaded > 0:
+            text += f", ~{savings['upload_bytes_saved'] * upload_seconds / uploaded:.0f} s of upload time"
+        self.savings_label.setText(text)
+
+    def update_overlay(self):
+        """Draw each camera's stage latencies over its video, and the save and upload figures over the first"""
+        # Runs the collectors, so the totals below are current
+        REGISTRY.collect()
+        shared = [f"{stage:<8} {format_latency(*window.quantiles(0.5, 0.95))}"
+                  for stage, window in self._overlay_latency.items()]
+        shared.append(f"Drive calls {REGISTRY.total('barcoder_drive_api_calls_total')}, "
+                      f"errors {REGISTRY.total('barcoder_drive_errors_total')}, "
+                      f"upload queue {REGISTRY.total('barcoder_upload_queue_depth')}")
+
+        for index, (view, channel) in enumerate(zip(self.camera_views, self.station.channels)):
+            view.update_overlay(channel.stats(), shared if index == 0 else ())
+
+    def toggle_auto_capture(self):
+        self.auto_capture = not self.auto_capture
+        # Only streaks that start from now count
+        self.auto_trigger.reset()
+        self.status_label.setText(f"Status: Auto-capture {'on' if self.auto_capture else 'off'}")
+
+    def toggle_overlay(self):
+        self.metrics_overlay = not self.metrics_overlay
+        if self.metrics_overlay:
+            self.update_overlay()
+        else:
+            for view in self.camera_views:
+                view.clear_overlay()
 
     def capture_image(self):
-        if self.current_frame is not None and self.current_barcode is not None:
-            # Make safe filename (remove invalid characters)
-            safe_filename = self.current_barcode.replace('/', '_').replace('\\', '_').replace(':', '_')
+        """Capture the current barcode from the camera that read it"""
+        if self.current_barcode is not None:
+            self.save_capture(self.current_camera, self.current_barcode)
+
+    def save_capture(self, index, barcode_data, trigger="manual"):
+        """
+        Queue a camera's sharpest recent frame of a barcode to be saved under it
+
+        Frames are scored as they are decoded, so picking one costs nothing
+        here. Without a recent frame of the barcode, the frame on screen is saved.
+
+        Args:
+            index: Index of the camera whose frame is saved
+            barcode_data: Barcode the image is named after
+            trigger: "manual" for the capture key or button, "auto" for auto-capture
+
+        Returns:
+            False if no image could be queued and the capture is worth retrying
+        """
+        if self.camera_views[index].current_frame is None:
+            return False
+        prefix = "Auto-capture: " if trigger == "auto" else ""
+
+        # Captures waiting for upload would fill the disk; keep the space for the backlog
+        if self.disk_full:
+            self.status_label.setText(f"Status: {prefix}Disk almost full, image not captured until uploads catch up")
+            return False
+
+        # Saving the same barcode again straight away is almost always a repeated key press
+        if self.capture_dedup.seen(barcode_data):
+            self.status_label.setText(f"Status: {prefix}{barcode_data} was just captured, not saved again")
+            return True
+
+        # Make safe filename (remove invalid characters and the version separator)
+        safe_filename = capture_name(barcode_data)
+
+        # Queue image for saving into the synced folder; the writer creates it if needed
+        output_filename = os.path.join(self.drive_sync.folder_path, safe_filename + self.writer.profile.extension)
+        # The writer encodes straight from the frame's ring slot and releases it when done
+        frame = self.station.channels[index].best_frame(barcode_data)
+        if frame is None:
+            frame = self.camera_views[index].current_frame
+            if frame.slot is not None:
+                frame.slot.retain()
+        release = frame.slot.release if frame.slot is not None else None
+        queued = self.writer.submit(frame.image, output_filename, release=release)
+        if queued:
+            REGISTRY.counter("barcoder_captures_requested_total", "Captures queued for saving",
+                             trigger=trigger).inc()
+            self.status_label.setText(f"Status: {prefix}Saving {os.path.basename(output_filename)}...")
+        else:
+            if release is not None:
+                release()
+            self.capture_dedup.forget(barcode_data)
+            self.status_label.setText(f"Status: {prefix}Save queue full, image not captured")
+        self.update_queue_depth()
+        return queued
+
+    def handle_image_saved(self, path):
+        """Confirm a completed capture without interrupting the operator"""
+        self.status_label.setText(f"Status: Image saved as: {path}")
+        # Upload it right away rather than waiting for the next sync cycle
+        self.drive_sync.notify_file(path)
+        self.update_queue_depth()
+
+    def handle_image_save_failed(self, path, error):
+        self.status_label.setText(f"Status: Failed to save {os.path.basename(path)} - {error}")
+        self.update_queue_depth()
+
+    def handle_image_duplicate(self, path, earlier_path):
+        self.status_label.setText(
+            f"Status: Same as the earlier capture {os.path.basename(earlier_path)}, not saved again"
+        )
+        self.update_queue_depth()
 
-            # Create images directory if it doesn't exist
-            os.makedirs(IMAGES_DIR, exist_ok=True)
+    def update_queue_depth(self):
+        self.queue_label.setText(f"Save queue: {self.writer.pending()}")
 
-            # Save image
-            output_filename = os.path.join(IMAGES_DIR, f"{safe_filename}.jpg")
-            cv2.imwrite(output_filename, self.current_frame)
+    def create_drive_sync(self, local_folder, sync_interval):
+        """Create a GoogleDriveSync configured from the current settings"""
+        return GoogleDriveSync(
+            folder_path=local_folder,
+            sync_interval=sync_interval,
+            drive_folder_name=self.drive_folder_name,
+            upload_workers=self.settings.get("upload_workers", 4),
+            max_retries=self.settings.get("upload_max_retries", 5),
+            resumable_threshold=self.settings.get("upload_resumable_threshold", 5 * 1024 * 1024),
+            progress_callback=self.signals.upload_progress.emit,
+            reconcile_interval=self.settings.get("sync_reconcile_interval", 3600),
+            watch=self.settings.get("sync_mode", "watch") == "watch",
+            debounce=self.settings.get("sync_debounce", 2.0),
+            start_delay=self.settings.get("sync_start_delay", 5.0)
+        )
 
-            QMessageBox.information(self, "Image Captured", f"Image saved as: {output_filename}")
+    def handle_upload_progress(self, uploaded, total, file_name, success):
+        """Show Drive upload progress in the status bar"""
+        result = "uploaded" if success else "failed"
+        self.statusBar().showMessage(f"Drive upload {uploaded}/{total}: {file_name} {result}", 5000)
 
     def sync_to_drive(self):
         """Manually trigger Google Drive sync"""
@@ -166,11 +445,7 @@ class BarcodeCameraApp(QMainWindow):
             self.drive_sync.stop_sync_thread()
 
             # Restart with new settings
-            self.drive_sync = GoogleDriveSync(
-                folder_path=self.drive_sync.folder_path,
-                sync_interval=self.drive_sync.sync_interval,
-                drive_folder_name=self.drive_folder_name
-            )
+            self.drive_sync = self.create_drive_sync(self.drive_sync.folder_path, self.drive_sync.sync_interval)
             self.drive_sync.start_sync_thread()
 
             # Save updated settings
@@ -182,12 +457,20 @@ class BarcodeCameraApp(QMainWindow):
         # Save settings before closing
         self.save_settings()
 
+        # Finish writing queued captures before stopping the sync
+        self.writer.stop()
+
         # Stop sync thread
         self.drive_sync.stop_sync_thread()
 
-        # Release camera on exit
-        if self.cap.isOpened():
-            self.cap.release()
+        # Stop capture and decode workers, then release the cameras they read from
+        for view in self.camera_views:
+            view.render_timer.stop()
+        self.station.stop()
+
+        # Write the final figures before exiting
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
         event.accept()
 
     def keyPressEvent(self, event: QKeyEvent):
@@ -195,37 +478,30 @@ class BarcodeCameraApp(QMainWindow):
         # Capture image when spacebar is pressed and a barcode is detected
         if event.key() == Qt.Key_Space and self.current_barcode is not None:
             self.capture_image()
+        elif event.key() == Qt.Key_F3:
+            self.toggle_overlay()
+        elif event.key() == Qt.Key_F4:
+            self.toggle_auto_capture()
         # Pass any other key events to the parent class
         else:
             super().keyPressEvent(event)
 
     def load_settings(self):
         """Load settings from settings.json if it exists"""
-        settings = {}
-
-        # Make sure config directory exists
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-
-        if os.path.exists(SETTINGS_PATH):
-            try:
-                with open(SETTINGS_PATH, 'r') as f:
-                    settings = json.load(f)
-                print(f"Loaded settings from {SETTINGS_PATH}")
-            except Exception as e:
-                print(f"Error loading settings: {e}")
-
+        settings = read_settings()
+        if settings:
+            print(f"Loaded settings from {SETTINGS_PATH}")
         return settings
 
     def save_settings(self):
         """Save current settings to settings.json"""
-        settings = {
+        # Start from the loaded settings so keys not edited in the UI are preserved
+        settings = dict(self.settings)
+        settings.update({
             "drive_folder_name": self.drive_folder_name,
             "sync_interval": self.drive_sync.sync_interval,
-            "local_folder": self.drive_sync.folder_path
-        }
-
-        try:
-            with open(SETTINGS_PATH, 'w') as f:
-                json.dump(settings, f, indent=2)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
+            "local_folder": self.drive_sync.folder_path,
+            "metrics_overlay": self.metrics_overlay,
+            "auto_capture": self.auto_capture
+        })
+        write_settings(settings)
@@ -0,0 +1,211 @@
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QImage, QPainter, QColor, QFont
+
+from barcoder.core.metrics import REGISTRY, LatencyWindow
+
+# Qt 5.14+ can display BGR data directly, which saves the colour conversion
+if hasattr(QImage, "Format_BGR888"):
+    DISPLAY_FORMAT = QImage.Format_BGR888
+else:
+    DISPLAY_FORMAT = QImage.Format_RGB888
+
+
+class VideoWidget(QWidget):
+    """
+    Displays camera frames scaled to fit the widget
+
+    Each frame is resized with OpenCV straight into a buffer that backs a
+    preallocated QImage, which is painted as is. There is no per-frame
+    QImage, QPixmap or Qt rescale; the buffers are only reallocated when the
+    widget changes size.
+
+    In smooth mode INTER_AREA does the bulk of the downscale by a whole
+    factor, which OpenCV handles an order of magnitude faster than a
+    fractional one, and INTER_LINEAR covers the remaining factor below 2.
+    Fast mode uses nearest-neighbour sampling.
+    """
+
+    def __init__(self, parent=None, scaling="smooth"):
+        """
+        Initialize the video widget
+
+        Args:
+            parent: Parent widget
+            scaling: "smooth" (area averaging) or "fast" (nearest neighbour)
+        """
+        super().__init__(parent)
+        self.fast = scaling == "fast"
+        self.rendered = 0
+        # Lines of text drawn over the top-left corner of the video (empty for none)
+        self.overlay = []
+        self._buffer = None
+        self._image = None
+        self._reduced = None
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def _fit(self, width, height):
+        """Return the largest size with the frame's aspect ratio that fits the widget"""
+        scale = min(self.width() / width, self.height() / height)
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    def _target(self, width, height):
+        """Return the display buffer for the given size, reallocating it only on a size change"""
+        if self._buffer is None or self._buffer.shape[:2] != (height, width):
+            self._buffer = np.empty((height, width, 3), dtype=np.uint8)
+            self._image = QImage(self._buffer.data, width, height, 3 * width, DISPLAY_FORMAT)
+        return self._buffer
+
+    def _resize(self, image, buffer):
+        """Scale image into buffer, which has the display size"""
+        height, width = image.shape[:2]
+        size = (buffer.shape[1], buffer.shape[0])
+        if self.fast:
+            cv2.resize(image, size, dst=buffer, interpolation=cv2.INTER_NEAREST)
+            return
+
+        factor = min(width // size[0], height // size[1])
+        if factor < 2:
+            cv2.resize(image, size, dst=buffer, interpolation=cv2.INTER_AREA)
+            return
+
+        reduced_shape = (height // factor, width // factor, 3)
+        if self._reduced is None or self._reduced.shape != reduced_shape:
+            self._reduced = np.empty(reduced_shape, dtype=np.uint8)
+        cv2.resize(image, (reduced_shape[1], reduced_shape[0]), dst=self._reduced, interpolation=cv2.INTER_AREA)
+        cv2.resize(self._reduced, size, dst=buffer, interpolation=cv2.INTER_LINEAR)
+
+    def show_frame(self, image, barcodes=()):
+        """
+        Scale a BGR frame into the display buffer and schedule a repaint
+
+        Args:
+            image: BGR frame; it is only read
+            barcodes: Barcodes whose rectangles are outlined, in frame coordinates
+        """
+        height, width = image.shape[:2]
+        display_width, display_height = self._fit(width, height)
+        buffer = self._target(display_width, display_height)
+        self._resize(image, buffer)
+        if DISPLAY_FORMAT == QImage.Format_RGB888:
+            cv2.cvtColor(buffer, cv2.COLOR_BGR2RGB, dst=buffer)
+
+        # Outline barcodes on the scaled copy, so the frame itself is left untouched
+        scale_x = display_width / width
+        scale_y = display_height / height
+        for barcode in barcodes:
+            (x, y, w, h) = barcode.rect
+            cv2.rectangle(buffer, (int(x * scale_x), int(y * scale_y)),
+                          (int((x + w) * scale_x), int((y + h) * scale_y)), (0, 255, 0), 2)
+
+        self.rendered += 1
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self._image is not None:
+            x = (self.width() - self._image.width()) // 2
+            y = (self.height() - self._image.height()) // 2
+            painter.drawImage(x, y, self._image)
+        if self.overlay:
+            self._paint_overlay(painter)
+        painter.end()
+
+    def _paint_overlay(self, painter):
+        painter.setFont(QFont("monospace", 9))
+        metrics = painter.fontMetrics()
+        line_height = metrics.height()
+        width = max(metrics.width(line) for line in self.overlay) + 12
+        painter.fillRect(4, 4, width, line_height * len(self.overlay) + 8, QColor(0, 0, 0, 160))
+        painter.setPen(Qt.white)
+        for index, line in enumerate(self.overlay):
+            painter.drawText(10, 8 + metrics.ascent() + index * line_height, line)
+
+
+class CameraView(QWidget):
+    """A camera's video with a line of throughput and queue statistics below it"""
+
+    def __init__(self, name, parent=None, scaling="smooth"):
+        super().__init__(parent)
+        self.name = name
+        self.video = VideoWidget(scaling=scaling)
+        self.video.setMinimumSize(320, 240)
+        self.stats_label = QLabel(f"{name}: -")
+        self.stats_label.setStyleSheet("color: gray;")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.video, 1)
+        layout.addWidget(self.stats_label)
+
+        # Frame on screen (holding its ring slot) and the newest decode result applied to it
+        self.current_frame = None
+        self.last_barcodes = []
+        self.last_result_seq = 0
+        self.last_render = 0.0
+        # Fires when a frame held back by the display_fps cap is due
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_seconds = REGISTRY.histogram(
+            "barcoder_render_seconds", "Time to scale and draw a frame for display", camera=name
+        )
+
+        # Cumulative counts at the previous statistics update, to turn them into rates
+        self._last_counts = {}
+        self._last_stats_time = None
+        # Stage latencies shown in the metrics overlay, over the last update interval
+        self._latency = {
+            stage: LatencyWindow(REGISTRY.histogram(f"barcoder_{stage}_seconds", camera=name))
+            for stage in ("capture", "decode", "render")
+        }
+
+    def update_stats(self, stats, now):
+        """
+        Show per-second rates and queue depths
+
+        Args:
+            stats: Cumulative counts from CameraChannel.stats()
+            now: Current time.monotonic()
+        """
+        counts = dict(stats, rendered=self.video.rendered)
+        if self._last_stats_time is not None:
+            elapsed = max(now - self._last_stats_time, 1e-6)
+            rate = {key: (counts[key] - self._last_counts.get(key, 0)) / elapsed
+                    for key in ("captured", "decoded", "rendered")}
+            self.stats_label.setText(
+                f"{self.name}: capture {rate['captured']:.0f} fps, decode {rate['decoded']:.0f} fps, "
+                f"display {rate['rendered']:.0f} fps | decode queue {stats['decode_queue']}, "
+                f"dropped {stats['dropped']}, buffers in use {stats['ring_in_use']}"
+            )
+        self._last_counts = counts
+        self._last_stats_time = now
+
+    def update_overlay(self, stats, extra=()):
+        """
+        Show stage latencies and frame losses over the video
+
+        Args:
+            stats: Cumulative counts from CameraChannel.stats()
+            extra: Further lines to show below the camera's own
+        """
+        lines = []
+        for stage, window in self._latency.items():
+            lines.append(f"{stage:<8} {format_latency(*window.quantiles(0.5, 0.95))}")
+        lines.append(f"dropped {stats['dropped']}, decode queue {stats['decode_queue']}, "
+                     f"buffers {stats['ring_in_use']}")
+        self.video.overlay = lines + list(extra)
+        self.video.update()
+
+    def clear_overlay(self):
+        self.video.overlay = []
+        self.video.update()
+
+
+def format_latency(p50, p95):
+    """Format a median and 95th percentile given in seconds"""
+    if p50 is None:
+        return "-"
+    return f"p50 {1000 * p50:6.1f} ms  p95 {1000 * p95:6.1f} ms"
@@ -1,7 +1,13 @@
 import os
+import sys
 import ctypes
+import ctypes.util
 import platform
-import sys
+import contextlib
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
+# Path of the ZBar library found on a previous run
+ZBAR_PATH_CACHE = os.path.join(CONFIG_DIR, "zbar_path.txt")
 
 def find_zbar_library():
     """Find the zbar shared library."""
@@ -45,6 +51,7 @@ def find_zbar_library():
             '/usr/local/lib',
             '/usr/lib',
             '/usr/lib/x86_64-linux-gnu',
+            '/usr/lib/aarch64-linux-gnu',
         ])
 
     # Deduplicate paths
@@ -70,42 +77,59 @@ def find_zbar_library():
 
     return None
 
-def load_zbar_library():
-    """Load the ZBar library for use with pyzbar."""
+def resolve_zbar_library():
+    """
+    Return the path of the ZBar library, using the path cached in the config dir when it is still valid
+
+    Searching the library paths (and pyzbar's own ctypes.util.find_library,
+    which runs ldconfig or gcc on Linux) is only done when there is no cached
+    path or the cached library no longer loads.
+    """
     try:
-        # For macOS
-        if sys.platform == 'darwin':
-            zbar_path = '/opt/homebrew/lib/libzbar.dylib'
-            if os.path.exists(zbar_path):
-                # Load the library
-                ctypes.cdll.LoadLibrary(zbar_path)
-                # Set environment variables for pyzbar
-                os.environ['DYLD_LIBRARY_PATH'] = '/opt/homebrew/lib:' + os.environ.get('DYLD_LIBRARY_PATH', '')
-                os.environ['LD_LIBRARY_PATH'] = '/opt/homebrew/lib:' + os.environ.get('LD_LIBRARY_PATH', '')
-                # For pyzbar on macOS
-                os.environ['DYLD_FALLBACK_LIBRARY_PATH'] = '/opt/homebrew/lib:' + os.environ.get('DYLD_FALLBACK_LIBRARY_PATH', '')
-        # For Windows
-        elif sys.platform == 'win32':
-            for dir_path in [
-                os.path.join(os.environ.get('ProgramFiles', ''), 'ZBar', 'bin'),
-                os.path.join(os.environ.get('ProgramFiles(x86)', ''), 'ZBar', 'bin')
-            ]:
-                zbar_path = os.path.join(dir_path, 'libzbar-0.dll')
-                if os.path.exists(zbar_path):
-                    ctypes.cdll.LoadLibrary(zbar_path)
-                    break
-
-        # Force pyzbar to reload the library dynamically
+        with open(ZBAR_PATH_CACHE) as f:
+            cached = f.read().strip()
+    except OSError:
+        cached = None
+
+    if cached:
         try:
-            from pyzbar import zbar_library
-            zbar_library._lib = None
-            zbar_library._dependencies = None
-        except ImportError:
+            ctypes.cdll.LoadLibrary(cached)
+            return cached
+        except OSError:
             pass
 
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        path = find_zbar_library()
+    if path is None:
+        path = ctypes.util.find_library('zbar')
+    if path is None:
+        return None
+
+    try:
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+        with open(ZBAR_PATH_CACHE, 'w') as f:
+            f.write(path)
+    except OSError as e:
+        print(f"Warning: Failed to cache ZBar library path: {e}", file=sys.stderr)
+    return path
+
+def load_zbar_library():
+    """Load the ZBar library for use with pyzbar."""
+    try:
+        path = resolve_zbar_library()
+        if path is None:
+            print("Warning: ZBar library not found, continuing with pyzbar's default loading mechanism...", file=sys.stderr)
+            return
+
+        # Hand the library to pyzbar, which otherwise searches for it again
+        # when pyzbar.pyzbar is first imported
+        libzbar = ctypes.cdll.LoadLibrary(path)
+        from pyzbar import zbar_library
+        zbar_library.load = lambda: (libzbar, [])
+
     except Exception as e:
-        print(f"Warning: Failed to manually load ZBar library: {e}")
-        print("Continuing with pyzbar's default loading mechanism...")
+        print(f"Warning: Failed to manually load ZBar library: {e}", file=sys.stderr)
+        print("Continuing with pyzbar's default loading mechanism...", file=sys.stderr)
 
 if __name__ == "__main__":
     result = find_zbar_library()
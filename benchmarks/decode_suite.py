@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Decode benchmark suite
+
+Generates a reproducible corpus of synthetic barcode frames and decodes it
+with FrameDecoder in each pipeline mode, reporting decode latency and recall
+(the fraction of the barcodes in the corpus that were read) overall and per
+symbology, resolution, blur, rotation, noise level and codes per frame.
+
+The corpus is drawn from a seeded random generator, so the same --seed and
+--count always produce the same frames. EAN-13 and Code 39 symbols are drawn
+directly and QR codes come from OpenCV's QR encoder, so no extra packages are
+needed. --save-corpus writes the frames as PNG files with a corpus.json
+manifest, and --corpus benchmarks such a directory instead, e.g. one that
+also holds real camera frames labelled the same way.
+
+Modes:
+    full        full-frame scan at native resolution
+    roi         ROI tracking: each frame is decoded several times in a row,
+                as consecutive camera frames of a still scene would be
+    downscaled  full-frame scan at --scale, without the native retry
+    pooled      full-frame scans on a DecodePool, --workers processes
+
+Results are printed as a table and can be written as JSON. With --baseline
+the run is compared against an earlier JSON result and the exit status is 1
+if recall dropped or latency rose beyond the given tolerances.
+
+Usage:
+    python benchmarks/decode_suite.py --count 120 --json decode_results.json
+    python benchmarks/decode_suite.py --modes full roi --baseline decode_results.json
+    python benchmarks/decode_suite.py --save-corpus corpus/
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barcoder.core.decoder import FrameDecoder
+from barcoder.utils.zbar_finder import load_zbar_library
+
+# Values the corpus parameters are drawn from
+SYMBOLOGIES = ("EAN13", "CODE39", "QRCODE")
+RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080))
+BLURS = (0.0, 1.0, 2.0)
+ROTATIONS = (0, 10, 30, 90)
+NOISE_LEVELS = (0, 5, 15)
+CODES_PER_FRAME = (1, 2, 4)
+# Columns of the per-condition breakdown
+FACTORS = ("symbology", "resolution", "blur", "rotation", "noise", "codes")
+
+MODES = {
+    "full": dict(roi_tracking=False),
+    "roi": dict(roi_tracking=True),
+    "downscaled": dict(roi_tracking=False, retry_native=False),
+    "pooled": dict(roi_tracking=False)
+}
+
+# EAN-13 digit patterns; R codes are the complement of L and G codes R reversed
+EAN_L = ("0001101", "0011001", "0010011", "0111101", "0100011",
+         "0110001", "0101111", "0111011", "0110111", "0001011")
+# Parity of digits 2-7, selected by the first digit
+EAN_PARITY = ("LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+              "LGGLLG", "LGGGLG", "LGLGLG", "LGLGGL", "LGGLGL")
+
+# Code 39: each character is five bars and four spaces, three of them wide.
+# The wide bars give the character's value within its group, the wide space the group.
+CODE39_BARS = ("nnwwn", "wnnnw", "nwnnw", "wwnnn", "nnwnw", "wnwnn", "nwwnn", "nnnww", "wnnwn", "nwnwn")
+CODE39_GROUPS = ("1234567890", "ABCDEFGHIJ", "KLMNOPQRST", "UVWXYZ-. *")
+CODE39_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-"
+
+
+def ean13_checksum(digits):
+    """Return the check digit for the first 12 digits of an EAN-13"""
+    total = sum(int(digit) * (3 if index % 2 else 1) for index, digit in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def ean13_modules(code):
+    """Return the modules (1 = bar) of a 13-digit EAN-13, without quiet zones"""
+    parity = EAN_PARITY[int(code[0])]
+    modules = "101"
+    for digit, side in zip(code[1:7], parity):
+        pattern = EAN_L[int(digit)]
+        if side == "G":
+            pattern = "".join("1" if bit == "0" else "0" for bit in pattern)[::-1]
+        modules += pattern
+    modules += "01010"
+    for digit in code[7:]:
+        modules += "".join("1" if bit == "0" else "0" for bit in EAN_L[int(digit)])
+    modules += "101"
+    return [int(bit) for bit in modules]
+
+
+def code39_pattern(char):
+    """Return the narrow/wide pattern of a Code 39 character, bars and spaces alternating"""
+    for group, chars in enumerate(CODE39_GROUPS):
+        if char in chars:
+            bars = CODE39_BARS[(chars.index(char) + 1) % 10]
+            spaces = ["n"] * 4
+            spaces[(group + 1) % 4] = "w"
+            return "".join(bar + space for bar, space in zip(bars, spaces)) + bars[4]
+    raise ValueError(f"Character {char!r} cannot be encoded in Code 39")
+
+
+def code39_modules(text, wide=3):
+    """Return the modules of a Code 39 symbol with start and stop characters, without quiet zones"""
+    modules = []
+    for char in f"*{text}*":
+        for index, element in enumerate(code39_pattern(char)):
+            modules += [1 - index % 2] * (wide if element == "w" else 1)
+        # Narrow gap between characters
+        modules.append(0)
+    return modules[:-1]
+
+
+def linear_symbol(modules, quiet, height):
+    """Draw 1D modules as a one-pixel-per-module image with quiet zones"""
+    row = np.array([0] * quiet + modules + [0] * quiet, dtype=np.uint8)
+    return np.repeat(((1 - row) * 255)[np.newaxis, :], height, axis=0)
+
+
+def qr_symbol(text):
+    """Draw a QR code as a one-pixel-per-module image with a four module quiet zone"""
+    image = cv2.QRCodeEncoder.create().encode(text)
+    # The encoder leaves a two module border; ZBar wants the full four
+    return cv2.copyMakeBorder(image, 2, 2, 2, 2, cv2.BORDER_CONSTANT, value=255)
+
+
+def random_symbol(symbology, rng):
+    """Return (data, image at one pixel per module) for a random barcode of a symbology"""
+    if symbology == "EAN13":
+        digits = "".join(str(digit) for digit in rng.integers(0, 10, 12))
+        data = digits + ean13_checksum(digits)
+        return data, linear_symbol(ean13_modules(data), quiet=11, height=70)
+    if symbology == "CODE39":
+        data = "".join(rng.choice(list(CODE39_ALPHABET), int(rng.integers(6, 11))))
+        modules = code39_modules(data)
+        return data, linear_symbol(modules, quiet=10, height=max(40, len(modules) // 4))
+    data = "BC-" + "".join(rng.choice(list(CODE39_ALPHABET[:36]), 8))
+    return data, qr_symbol(data)
+
+
+def make_cases(count, seed):
+    """Draw the parameters of count corpus frames"""
+    rng = np.random.default_rng(seed)
+    cases = []
+    for index in range(count):
+        width, height = RESOLUTIONS[rng.integers(len(RESOLUTIONS))]
+        cases.append({
+            "id": f"frame_{index:04d}",
+            "seed": int(rng.integers(2 ** 31)),
+            "symbology": SYMBOLOGIES[index % len(SYMBOLOGIES)],
+            "resolution": f"{width}x{height}",
+            "blur": float(rng.choice(BLURS)),
+            "rotation": int(rng.choice(ROTATIONS)),
+            "noise": int(rng.choice(NOISE_LEVELS)),
+            "codes": int(rng.choice(CODES_PER_FRAME))
+        })
+    return cases
+
+
+def render_case(case):
+    """
+    Render a corpus frame
+
+    Returns:
+        (BGR image, list of expected [type, data] pairs)
+    """
+    rng = np.random.default_rng(case["seed"])
+    width, height = (int(value) for value in case["resolution"].split("x"))
+
+    # Light background with a gentle gradient, as under uneven lighting
+    gradient = np.linspace(180, 220, width, dtype=np.float32)
+    frame = gradient[np.newaxis, :] + rng.normal(0, 3, (height, 1)).astype(np.float32)
+
+    columns = int(np.ceil(np.sqrt(case["codes"])))
+    rows = int(np.ceil(case["codes"] / columns))
+    cell_width, cell_height = width // columns, height // rows
+
+    expected = []
+    for index in range(case["codes"]):
+        data, symbol = random_symbol(case["symbology"], rng)
+        expected.append([case["symbology"], data])
+
+        # Largest whole module size, up to four pixels, that still fits the cell once rotated
+        angle = np.radians(case["rotation"])
+        cos, sin = abs(np.cos(angle)), abs(np.sin(angle))
+        rotated_width = symbol.shape[1] * cos + symbol.shape[0] * sin
+        rotated_height = symbol.shape[1] * sin + symbol.shape[0] * cos
+        fit = min(0.8 * cell_width / rotated_width, 0.8 * cell_height / rotated_height)
+        module = int(max(1, min(4, fit)))
+        symbol = cv2.resize(symbol, None, fx=module, fy=module, interpolation=cv2.INTER_NEAREST)
+
+        # Rotate about the symbol's centre into a canvas that holds all of it
+        h, w = symbol.shape
+        box_width = int(w * cos + h * sin) + 2
+        box_height = int(w * sin + h * cos) + 2
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), case["rotation"], 1.0)
+        matrix[0, 2] += box_width / 2 - w / 2
+        matrix[1, 2] += box_height / 2 - h / 2
+        rotated = cv2.warpAffine(symbol, matrix, (box_width, box_height), flags=cv2.INTER_LINEAR, borderValue=255)
+        mask = cv2.warpAffine(np.ones_like(symbol), matrix, (box_width, box_height), flags=cv2.INTER_NEAREST)
+
+        # Random position within the symbol's cell, clipped to the frame
+        cell_x = (index % columns) * cell_width
+        cell_y = (index // columns) * cell_height
+        x = cell_x + int(rng.integers(0, max(1, cell_width - box_width)))
+        y = cell_y + int(rng.integers(0, max(1, cell_height - box_height)))
+        box_width, box_height = min(box_width, width - x), min(box_height, height - y)
+        region = frame[y:y + box_height, x:x + box_width]
+        mask = mask[:box_height, :box_width].astype(bool)
+        region[mask] = rotated[:box_height, :box_width][mask]
+
+    if case["blur"] > 0:
+        frame = cv2.GaussianBlur(frame, (0, 0), case["blur"])
+    if case["noise"] > 0:
+        frame += rng.normal(0, case["noise"], frame.shape).astype(np.float32)
+    gray = np.clip(frame, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), expected
+
+
+def generate_corpus(count, seed):
+    """Return the corpus as a list of (case, image, expected)"""
+    corpus = []
+    for case in make_cases(count, seed):
+        image, expected = render_case(case)
+        corpus.append((case, image, expected))
+    return corpus
+
+
+def save_corpus(corpus, directory):
+    """Write the corpus frames as PNG files with a corpus.json manifest"""
+    os.makedirs(directory, exist_ok=True)
+    manifest = []
+    for case, image, expected in corpus:
+        file_name = f"{case['id']}.png"
+        cv2.imwrite(os.path.join(directory, file_name), image)
+        manifest.append(dict(case, file=file_name, expected=expected))
+    with open(os.path.join(directory, "corpus.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_corpus(directory):
+    """
+    Read a corpus written by save_corpus
+
+    Entries need "file" and "expected"; the generator's parameters are
+    optional and only used for the breakdown.
+    """
+    with open(os.path.join(directory, "corpus.json")) as f:
+        manifest = json.load(f)
+
+    corpus = []
+    for entry in manifest:
+        image = cv2.imread(os.path.join(directory, entry["file"]))
+        if image is None:
+            print(f"Skipping unreadable corpus image {entry['file']}")
+            continue
+        corpus.append((entry, image, entry["expected"]))
+    return corpus
+
+
+def create_decoder(mode, args):
+    """Create the FrameDecoder for a mode; the change gate is off so every frame is decoded"""
+    options = dict(MODES[mode], change_gate=False)
+    if mode == "downscaled":
+        options["scale"] = args.scale
+    if mode == "pooled":
+        options.update(workers=args.workers, max_in_flight=args.workers)
+    return FrameDecoder(**options)
+
+
+def decode_frame(decoder, image):
+    """Decode one frame, returning (seconds, set of (type, data))"""
+    start = time.perf_counter()
+    barcodes = decoder.decode(image)
+    elapsed = time.perf_counter() - start
+    return elapsed, {(barcode.type, barcode.data.decode("utf-8", errors="replace")) for barcode in barcodes}
+
+
+def run_mode(mode, corpus, args):
+    """
+    Decode the corpus in one mode
+
+    Returns:
+        List of per-frame records with the case, latency and hits
+    """
+    decoder = create_decoder(mode, args)
+    records = []
+    try:
+        # One untimed decode so imports and worker start-up are not counted
+        decoder.decode(corpus[0][1])
+
+        jobs = [(case, image, expected) for case, image, expected in corpus for _ in range(args.frames)]
+        if mode == "pooled":
+            # The pool only pays off with several frames in flight, as the decode threads keep it
+            with ThreadPoolExecutor(max_workers=decoder.max_in_flight) as executor:
+                start = time.perf_counter()
+                results = list(executor.map(lambda job: decode_frame(decoder, job[1]), jobs))
+                wall = time.perf_counter() - start
+        else:
+            start = time.perf_counter()
+            results = []
+            for case, image, expected in jobs:
+                if decoder.tracker is not None and results and jobs[len(results) - 1][0] is not case:
+                    # A new scene: forget the previous frame's barcode location
+                    decoder.tracker.reset()
+                results.append(decode_frame(decoder, image))
+            wall = time.perf_counter() - start
+    finally:
+        decoder.close()
+
+    for (case, image, expected), (seconds, found) in zip(jobs, results):
+        expected_set = {tuple(item) for item in expected}
+        records.append({
+            "case": case,
+            "seconds": seconds,
+            "expected": len(expected_set),
+            "hits": len(expected_set & found),
+            "false_positives": len(found - expected_set)
+        })
+    return records, wall
+
+
+def summarize(records, wall=None):
+    """Return recall, latency percentiles and throughput for a set of frame records"""
+    latencies = np.array([record["seconds"] for record in records])
+    expected = sum(record["expected"] for record in records)
+    summary = {
+        "frames": len(records),
+        "recall": round(sum(record["hits"] for record in records) / expected, 4) if expected else None,
+        "false_positives": sum(record["false_positives"] for record in records),
+        "latency_ms": {
+            "mean": round(1000 * float(latencies.mean()), 3),
+            "p50": round(1000 * float(np.percentile(latencies, 50)), 3),
+            "p95": round(1000 * float(np.percentile(latencies, 95)), 3),
+            "max": round(1000 * float(latencies.max()), 3)
+        }
+    }
+    if wall is not None:
+        summary["frames_per_second"] = round(len(records) / wall, 1)
+    return summary
+
+
+def breakdown(records):
+    """Summarize the records per value of each corpus parameter"""
+    result = {}
+    for factor in FACTORS:
+        groups = defaultdict(list)
+        for record in records:
+            if factor in record["case"]:
+                groups[str(record["case"][factor])].append(record)
+        if groups:
+            result[factor] = {value: summarize(group) for value, group in sorted(groups.items())}
+    return result
+
+
+def environment():
+    """Describe what the results were measured with, so runs can be compared"""
+    commit = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+
+def compare(results, baseline, max_recall_drop, max_latency_increase):
+    """Return descriptions of the regressions of results against a baseline"""
+    regressions = []
+    for mode, current in results["modes"].items():
+        previous = baseline.get("modes", {}).get(mode)
+        if previous is None:
+            continue
+        if current["recall"] is not None and previous["recall"] is not None:
+            drop = previous["recall"] - current["recall"]
+            if drop > max_recall_drop:
+                regressions.append(f"{mode}: recall {previous['recall']:.3f} -> {current['recall']:.3f}")
+        before, after = previous["latency_ms"]["p50"], current["latency_ms"]["p50"]
+        if before > 0 and (after - before) / before > max_latency_increase:
+            regressions.append(f"{mode}: p50 latency {before:.2f} ms -> {after:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=90, help="Number of frames in the generated corpus")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of the generated corpus")
+    parser.add_argument("--corpus", help="Benchmark a corpus directory written by --save-corpus instead")
+    parser.add_argument("--save-corpus", help="Write the generated corpus to this directory and exit")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES), help="Modes to run")
+    parser.add_argument("--frames", type=int, default=3, help="Consecutive decodes of each corpus frame")
+    parser.add_argument("--scale", type=float, default=0.5, help="Downscale factor of the downscaled mode")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)),
+                        help="Decode processes of the pooled mode")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier JSON results to check for regressions")
+    parser.add_argument("--max-recall-drop", type=float, default=0.02,
+                        help="Recall drop against the baseline counted as a regression (default: 0.02)")
+    parser.add_argument("--max-latency-increase", type=float, default=0.25,
+                        help="Relative p50 latency increase counted as a regression (default: 0.25)")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = generate_corpus(args.count, args.seed)
+    if args.save_corpus:
+        save_corpus(corpus, args.save_corpus)
+        print(f"Wrote {len(corpus)} frames to {args.save_corpus}")
+        return
+    if not corpus:
+        sys.exit("The corpus is empty")
+
+    load_zbar_library()
+    args.frames = max(1, args.frames)
+    results = {
+        "corpus": {"source": args.corpus or "generated", "frames": len(corpus), "seed": args.seed,
+                   "decodes_per_frame": args.frames},
+        "environment": environment(),
+        "modes": {}
+    }
+    for mode in args.modes:
+        records, wall = run_mode(mode, corpus, args)
+        results["modes"][mode] = dict(summarize(records, wall), breakdown=breakdown(records))
+        summary = results["modes"][mode]
+        print(
+            f"{mode:<11} recall {summary['recall']:.3f}  p50 {summary['latency_ms']['p50']:7.2f} ms  "
+            f"p95 {summary['latency_ms']['p95']:7.2f} ms  {summary['frames_per_second']:7.1f} frames/s  "
+            f"false positives {summary['false_positives']}"
+        )
+        for factor, groups in summary["breakdown"].items():
+            print("    " + f"{factor:<11}" + "  ".join(
+                f"{value} {group['recall']:.2f}" for value, group in groups.items() if group["recall"] is not None
+            ))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_recall_drop, args.max_latency_increase)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Sync throughput benchmark
+
+Uploads a generated backlog of files through GoogleDriveSync against the
+LocalMockBackend, for several upload worker counts, and reports files per
+second and the API calls made by the upload cycle and by an idle cycle.
+
+Usage:
+    python benchmarks/sync_throughput.py --files 500 --workers 1 4 8 --latency 0.05
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barcoder.drive.sync import GoogleDriveSync
+from barcoder.drive.backends import LocalMockBackend
+
+
+def make_backlog(folder, count, size):
+    """Create count distinct .jpg files of size bytes each"""
+    os.makedirs(folder, exist_ok=True)
+    payload = os.urandom(size)
+    for index in range(count):
+        # Unique content, or sync would skip the files as duplicates of each other
+        with open(os.path.join(folder, f"capture_{index:06d}.jpg"), 'wb') as f:
+            f.write(index.to_bytes(8, "big") + payload[8:])
+
+
+def run_case(workdir, args, workers):
+    """Run one upload cycle and one idle cycle with the given number of workers"""
+    local = os.path.join(workdir, f"local_{workers}")
+    make_backlog(local, args.files, args.size)
+
+    backend = LocalMockBackend(
+        os.path.join(workdir, f"remote_{workers}"),
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        failure_rate=args.failure_rate,
+        bandwidth=args.bandwidth,
+        seed=args.seed
+    )
+    sync = GoogleDriveSync(
+        folder_path=local,
+        upload_workers=workers,
+        retry_backoff=args.latency,
+        manifest_path=os.path.join(workdir, f"manifest_{workers}.sqlite3"),
+        journal_path=os.path.join(workdir, f"journal_{workers}.jsonl"),
+        watch=False,
+        backend=backend
+    )
+
+    start = time.perf_counter()
+    sync.sync_folder()
+    elapsed = time.perf_counter() - start
+    upload_calls = dict(backend.api_calls)
+
+    backend.api_calls.clear()
+    sync.sync_folder()
+    idle_calls = dict(backend.api_calls)
+
+    uploaded = len(sync.manifest.files(sync.get_folder_id()))
+    sync.stop_sync_thread()
+    return {
+        "workers": workers,
+        "files": args.files,
+        "uploaded": uploaded,
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(uploaded / elapsed, 1) if elapsed > 0 else 0.0,
+        "upload_cycle_api_calls": upload_calls,
+        "idle_cycle_api_calls": idle_calls,
+        "errors": dict(backend.errors)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200, help="Number of files in the backlog")
+    parser.add_argument("--size", type=int, default=200 * 1024, help="File size in bytes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Upload worker counts to compare")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated round-trip latency in seconds")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Simulated calls per second before 429s")
+    parser.add_argument("--failure-rate", type=float, default=0.01, help="Fraction of calls failing with a 503")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Simulated upload bandwidth in bytes/s")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="barcoder_sync_bench_")
+    results = []
+    try:
+        for workers in args.workers:
+            result = run_case(workdir, args, workers)
+            results.append(result)
+            print(
+                f"workers={workers:<3} {result['uploaded']}/{result['files']} files in {result['seconds']:.2f} s "
+                f"({result['files_per_second']} files/s), upload cycle calls {sum(result['upload_cycle_api_calls'].values())}, "
+                f"idle cycle calls {sum(result['idle_cycle_api_calls'].values())}, errors {result['errors']}"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
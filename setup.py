@@ -6,22 +6,27 @@ setup(
     packages=find_packages(),
     install_requires=[
         "opencv-python>=4.8.0,<5.0.0",
+        "numpy",
         "pyzbar>=0.1.9",
         "PyQt5>=5.15.9",
         "pydrive2>=1.15.0",
     ],
+    extras_require={
+        # Filesystem notifications for event-driven Drive sync
+        "watch": ["watchdog>=2.0"],
+    },
     entry_points={
         'console_scripts': [
-            'barcoder=barcoder.core.main:run_application',
+            'barcoder=barcoder.core.cli:main',
         ],
     },
     author="",
     author_email="",
     description="Barcode Scanner and Image Capture Application",
     keywords="barcode, scanner, image, capture, google drive",
-    python_requires=">=3.6",
+    python_requires=">=3.8",
     include_package_data=True,
     package_data={
-        'barcoder': ['config/*', 'images/*'],
+        'barcoder': ['config/*.json', 'images/*'],
     },
 )
@@ -0,0 +1,198 @@
+import datetime
+import os
+import threading
+
+import pytest
+
+from barcoder.drive.backends import GoogleDriveBackend, LocalMockBackend, StorageError, is_retryable
+from barcoder.drive.sync import GoogleDriveSync
+
+
+class HttpError(Exception):
+    """Error shaped like googleapiclient's HttpError, with the status on its response"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Response", (), {"status": status})()
+
+
+class ApiRequestError(Exception):
+    """Error shaped like pydrive2's ApiRequestError, with the decoded error body"""
+
+    def __init__(self, code, reasons=()):
+        super().__init__(f"API error {code}")
+        self.error = {"code": code, "errors": [{"reason": reason} for reason in reasons]}
+
+
+def make_file(folder, name, data=b"data"):
+    path = os.path.join(str(folder), name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_is_retryable():
+    assert is_retryable(StorageError("Rate limit exceeded", status=429))
+    assert is_retryable(HttpError(503))
+    assert is_retryable(ApiRequestError(403, ["userRateLimitExceeded"]))
+    assert is_retryable(ConnectionResetError())
+    assert not is_retryable(ApiRequestError(403, ["insufficientPermissions"]))
+    assert not is_retryable(StorageError("File not found", status=404))
+    assert not is_retryable(FileNotFoundError())
+
+
+def test_mock_backend_stores_files(tmp_path):
+    backend = LocalMockBackend(str(tmp_path / "remote"), latency=0)
+    folder_id = backend.ensure_folder("Images")
+    file_id = backend.upload(make_file(tmp_path, "a.jpg", b"first"), folder_id)
+
+    files = backend.list_files(folder_id)
+    assert [(file["id"], file["title"]) for file in files] == [(file_id, "a.jpg")]
+    assert backend.find_files(folder_id, ["a.jpg", "b.jpg"]) == {"a.jpg": {"id": file_id, "title": "a.jpg"}}
+
+    assert backend.update(file_id, make_file(tmp_path, "a.jpg", b"second")) == file_id
+    assert (tmp_path / "remote" / "Images" / "a.jpg").read_bytes() == b"second"
+    with pytest.raises(StorageError) as error:
+        backend.update("missing", make_file(tmp_path, "a.jpg"))
+    assert error.value.status == 404
+    assert backend.api_calls == {"list": 2, "upload": 1, "batch": 1, "update": 2}
+
+
+def test_mock_backend_rate_limit(tmp_path):
+    backend = LocalMockBackend(str(tmp_path / "remote"), latency=0, rate_limit=2)
+    backend.ensure_folder("Images")
+    backend.ensure_folder("Images")
+    with pytest.raises(StorageError) as error:
+        backend.ensure_folder("Images")
+    assert error.value.status == 429
+    assert backend.errors["rate_limited"] == 1
+
+
+def test_sync_retries_transient_failures(tmp_path):
+    folder = tmp_path / "images"
+    folder.mkdir()
+    backend = LocalMockBackend(str(tmp_path / "remote"), latency=0, seed=1)
+    sync = GoogleDriveSync(
+        folder_path=str(folder), manifest_path=str(tmp_path / "manifest.sqlite3"),
+        journal_path=str(tmp_path / "journal.jsonl"), watch=False, backend=backend,
+        max_retries=20, retry_backoff=0.001
+    )
+    sync.authenticated = True
+    folder_id = backend.ensure_folder("BarcoderImages")
+    backend.failure_rate = 0.5
+    paths = [make_file(folder, f"{index}.jpg", bytes([index])) for index in range(10)]
+
+    assert sync.upload_files(paths, folder_id) == 10
+    assert backend.errors["failed"] > 0
+    assert sorted(os.listdir(tmp_path / "remote" / "BarcoderImages")) == sorted(os.listdir(folder))
+    sync.stop_sync_thread()
+
+
+class FakeRequest:
+    def __init__(self, query, remote):
+        self.query = query
+        self.remote = remote
+
+
+class FakeBatch:
+    def __init__(self, callback, executed):
+        self.callback = callback
+        self.executed = executed
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        self.executed.append(len(self.requests))
+        for request_id, request in self.requests:
+            title = request.query.split("'")[1]
+            if title == "error":
+                self.callback(request_id, None, HttpError(500))
+            else:
+                items = [request.remote[title]] if title in request.remote else []
+                self.callback(request_id, {"items": items}, None)
+
+
+class FakeService:
+    """Drive v2 service stand-in answering title queries from a dict"""
+
+    def __init__(self, remote):
+        self.remote = remote
+        self.queries = []
+        self.executed = []
+
+    def files(self):
+        return self
+
+    def list(self, q, fields, maxResults):
+        self.queries.append(q)
+        return FakeRequest(q, self.remote)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback, self.executed)
+
+
+class FakeAuth:
+    def __init__(self, expires_in=3600, remote=None):
+        expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in) if expires_in is not None else None
+        self.credentials = type("Credentials", (), {"token_expiry": expiry})()
+        self.service = FakeService(remote or {})
+        self.thread_local = threading.local()
+        self.refreshed = 0
+
+    def Refresh(self):
+        self.refreshed += 1
+        self.credentials.token_expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+    def SaveCredentialsFile(self, path):
+        pass
+
+    def Get_Http_Object(self):
+        return object()
+
+
+def make_drive_backend(tmp_path, gauth):
+    backend = GoogleDriveBackend(credentials_path=str(tmp_path / "creds.txt"))
+    backend.gauth = gauth
+    backend.drive = type("Drive", (), {"auth": gauth})()
+    return backend
+
+
+def test_find_files_batches_the_lookups(tmp_path):
+    remote = {f"{index}.jpg": {"id": f"id-{index}", "title": f"{index}.jpg"} for index in range(0, 150, 2)}
+    gauth = FakeAuth(remote=remote)
+    backend = make_drive_backend(tmp_path, gauth)
+
+    found = backend.find_files("folder", [f"{index}.jpg" for index in range(150)])
+    assert found == remote
+    assert sorted(gauth.service.executed) == [50, 100]
+    assert backend.api_calls == {"batch": 2}
+
+
+def test_find_files_escapes_titles_and_raises_errors(tmp_path):
+    gauth = FakeAuth()
+    backend = make_drive_backend(tmp_path, gauth)
+    assert backend.find_files("folder", ["it's.jpg"]) == {}
+    assert gauth.service.queries == ["title='it\\'s.jpg' and 'folder' in parents and trashed=false"]
+    with pytest.raises(HttpError):
+        backend.find_files("folder", ["error"])
+
+
+def test_token_is_refreshed_before_it_expires(tmp_path):
+    gauth = FakeAuth(expires_in=600)
+    backend = make_drive_backend(tmp_path, gauth)
+    backend.ensure_token()
+    assert gauth.refreshed == 0
+
+    gauth.credentials.token_expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=60)
+    backend.ensure_token()
+    backend.ensure_token()
+    assert gauth.refreshed == 1
+    assert backend.api_calls == {"refresh": 1}
+
+
+def test_token_without_expiry_is_not_refreshed(tmp_path):
+    gauth = FakeAuth(expires_in=None)
+    make_drive_backend(tmp_path, gauth).ensure_token()
+    assert gauth.refreshed == 0
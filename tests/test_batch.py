@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+import random
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from barcoder.core import batch
+
+Decoded = namedtuple("Decoded", "data type rect")
+
+
+class BrightnessDecoder:
+    """Stand-in decoder that reports each frame's brightness as a barcode, taking a random time"""
+
+    max_in_flight = 3
+
+    def __init__(self, **options):
+        self.options = options
+
+    @classmethod
+    def from_settings(cls, settings, **overrides):
+        decoder = cls(**overrides)
+        BrightnessDecoder.created.append(decoder)
+        return decoder
+
+    def decode(self, image):
+        time.sleep(random.uniform(0, 0.01))
+        return [Decoded(str(round(image.mean() / 40)).encode(), "QRCODE", (1, 2, 3, 4))]
+
+    def close(self):
+        pass
+
+
+def write_video(path, frames=6):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for index in range(frames):
+        writer.write(np.full((48, 64, 3), index * 40, np.uint8))
+    writer.release()
+
+
+def test_source_kind():
+    assert batch.source_kind("a/b.JPG") == "image"
+    assert batch.source_kind("clip.mp4") == "video"
+    assert batch.source_kind("notes.txt") is None
+
+
+def test_expand_inputs(tmp_path):
+    for name in ["b.png", "a.jpg", "c.txt", "sub/d.mp4"]:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"")
+    assert batch.expand_inputs([str(tmp_path)]) == [
+        str(tmp_path / "a.jpg"), str(tmp_path / "b.png"), str(tmp_path / "sub" / "d.mp4")
+    ]
+    assert batch.expand_inputs([str(tmp_path / "*.png"), str(tmp_path / "missing.jpg")]) == [str(tmp_path / "b.png")]
+
+
+def test_runs_keep_input_order():
+    runs = list(batch._runs(["a.jpg", "b.png", "c.mp4", "d.jpg"]))
+    assert runs == [("image", ["a.jpg", "b.png"]), ("video", ["c.mp4"]), ("image", ["d.jpg"])]
+
+
+def test_barcode_record():
+    record = batch.barcode_record(Decoded(b"12\xff", "EAN13", (1, 2, 3, 4)))
+    assert record == {"data": "12\ufffd", "type": "EAN13", "rect": [1, 2, 3, 4]}
+
+
+def test_csv_writer_rows():
+    stream = io.StringIO()
+    writer = batch.CsvWriter(stream)
+    writer.write({"source": "a.jpg", "frame": 0, "timestamp": None, "barcodes": []})
+    writer.write({"source": "b.jpg", "frame": 0, "timestamp": None, "error": "unreadable image"})
+    writer.write({"source": "c.mp4", "frame": 3, "timestamp": 0.3,
+                  "barcodes": [{"data": "1", "type": "QRCODE", "rect": [1, 2, 3, 4]}]})
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert [row["source"] for row in rows] == ["a.jpg", "b.jpg", "c.mp4"]
+    assert rows[1]["error"] == "unreadable image"
+    assert (rows[2]["data"], rows[2]["left"], rows[2]["height"]) == ("1", "1", "4")
+
+
+def test_decode_video_yields_frames_in_order(tmp_path):
+    path = tmp_path / "clip.avi"
+    write_video(path)
+    records = list(batch.decode_video(str(path), BrightnessDecoder(), frame_step=2))
+    assert [record["frame"] for record in records] == [0, 2, 4]
+    assert [record["timestamp"] for record in records] == [0.0, 0.2, 0.4]
+    assert [record["barcodes"][0]["data"] for record in records] == ["0", "2", "4"]
+
+
+def test_unreadable_video(tmp_path):
+    path = tmp_path / "broken.mp4"
+    path.write_bytes(b"not a video")
+    assert list(batch.decode_video(str(path), BrightnessDecoder())) == [
+        {"source": str(path), "frame": 0, "timestamp": None, "error": "unreadable video"}
+    ]
+
+
+def test_run_batch_decodes_video_without_frame_to_frame_state(tmp_path, monkeypatch):
+    path = tmp_path / "clip.avi"
+    write_video(path)
+    output = tmp_path / "out.jsonl"
+    BrightnessDecoder.created = []
+    monkeypatch.setattr(batch, "FrameDecoder", BrightnessDecoder)
+
+    stats = batch.run_batch([str(path)], output=str(output), workers=2)
+
+    options = BrightnessDecoder.created[0].options
+    assert options["roi_tracking"] is False
+    assert options["change_gate"] is False
+    assert stats["frames"] == 6
+    with open(output) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["barcodes"][0]["data"] for record in records] == ["0", "1", "2", "3", "4", "5"]
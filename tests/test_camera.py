@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+
+from barcoder.core import camera as camera_module
+from barcoder.core.camera import (camera_from_settings, fourcc_code, fourcc_string, measure_camera, open_camera,
+                                  parse_device, probe_modes)
+
+# Modes the fake camera supports, by pixel format
+MODES = {"MJPG": [(640, 480), (1280, 720)], "YUYV": [(640, 480)]}
+
+
+class FakeCapture:
+    """VideoCapture stand-in that falls back to the nearest supported mode, like a V4L2 driver"""
+
+    opened = []
+
+    def __init__(self, device, backend=cv2.CAP_ANY):
+        self.device = device
+        self.backend = backend
+        self.calls = []
+        self.props = {cv2.CAP_PROP_FOURCC: fourcc_code("YUYV"), cv2.CAP_PROP_FRAME_WIDTH: 640,
+                      cv2.CAP_PROP_FRAME_HEIGHT: 480, cv2.CAP_PROP_FPS: 30.0, cv2.CAP_PROP_BUFFERSIZE: 4}
+        self.released = False
+        FakeCapture.opened.append(self)
+
+    def isOpened(self):
+        return self.device != "missing"
+
+    def set(self, prop, value):
+        self.calls.append(prop)
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            fourcc = fourcc_string(self.props[cv2.CAP_PROP_FOURCC])
+            width, height = self.props[cv2.CAP_PROP_FRAME_WIDTH], self.props[cv2.CAP_PROP_FRAME_HEIGHT]
+            fits = [(w, h) for w, h in MODES[fourcc] if w <= width and h <= height] or MODES[fourcc][:1]
+            return max(fits)[0 if prop == cv2.CAP_PROP_FRAME_WIDTH else 1]
+        return self.props.get(prop, 0)
+
+    def getBackendName(self):
+        return "FAKE"
+
+    def read(self):
+        return True, np.zeros((4, 4, 3), np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+def use_fake_camera(monkeypatch):
+    FakeCapture.opened = []
+    monkeypatch.setattr(camera_module.cv2, "VideoCapture", FakeCapture)
+    monkeypatch.setattr(camera_module.time, "sleep", lambda seconds: None)
+
+
+def test_parse_device():
+    assert parse_device("2") == 2
+    assert parse_device(1) == 1
+    assert parse_device("/dev/video2") == "/dev/video2"
+
+
+def test_fourcc_round_trip():
+    assert fourcc_string(fourcc_code("MJPG")) == "MJPG"
+    assert fourcc_string(float(fourcc_code("YUYV"))) == "YUYV"
+
+
+def test_fourcc_is_set_before_the_resolution(monkeypatch):
+    use_fake_camera(monkeypatch)
+    cap = open_camera("0", backend="v4l2", width=1280, height=720, fps=30, fourcc="MJPG", buffer_size=1)
+    assert cap.device == 0 and cap.backend == cv2.CAP_V4L2
+    assert cap.calls == [cv2.CAP_PROP_FOURCC, cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT,
+                         cv2.CAP_PROP_FPS, cv2.CAP_PROP_BUFFERSIZE]
+    assert (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (1280, 720)
+
+
+def test_defaults_leave_the_camera_alone(monkeypatch, capsys):
+    use_fake_camera(monkeypatch)
+    cap = camera_from_settings({"camera_device": "/dev/video2", "camera_backend": "unknown"})
+    assert cap.device == "/dev/video2" and cap.backend == cv2.CAP_ANY
+    assert cap.calls == []
+    assert "Unknown camera backend" in capsys.readouterr().out
+
+
+def test_measure_camera(monkeypatch):
+    use_fake_camera(monkeypatch)
+    result = measure_camera(FakeCapture(0), frames=10, warmup=0, pause=0)
+    assert set(result) == {"measured_fps", "read_ms", "buffered_frames", "buffer_latency_ms"}
+    assert result["measured_fps"] > 0
+
+    class BrokenCapture(FakeCapture):
+        def read(self):
+            return False, None
+
+    assert measure_camera(BrokenCapture(0), frames=10, warmup=0) is None
+
+
+def test_probe_measures_each_distinct_mode_once(monkeypatch):
+    use_fake_camera(monkeypatch)
+    modes = probe_modes(0, frames=3, resolutions=((640, 480), (1280, 720), (1920, 1080)))
+    assert [(mode["fourcc"], mode["width"], mode["height"]) for mode in modes] == [
+        ("MJPG", 640, 480), ("MJPG", 1280, 720), ("YUYV", 640, 480)
+    ]
+    assert all(mode["backend"] == "FAKE" and "measured_fps" in mode for mode in modes)
+    assert all(cap.released for cap in FakeCapture.opened)
+
+
+def test_probe_of_a_missing_camera(monkeypatch):
+    use_fake_camera(monkeypatch)
+    assert probe_modes("missing", frames=3) == []
@@ -0,0 +1,30 @@
+import numpy as np
+
+from barcoder.core.decode_pool import DecodePool, _SharedSlot
+
+
+def test_shared_slot_grows_to_fit_the_frame():
+    slot = _SharedSlot(16)
+    image = np.arange(64 * 48, dtype=np.uint8).reshape(48, 64)
+    slot.write(image)
+    assert slot.shm.size >= image.nbytes
+    view = np.ndarray(image.shape, dtype=image.dtype, buffer=slot.shm.buf)
+    assert np.array_equal(view, image)
+    slot.release()
+
+
+def test_slot_is_freed_whether_decoding_succeeds_or_fails():
+    pool = DecodePool(workers=1, max_in_flight=1)
+    try:
+        for seq in range(2):
+            result = pool.submit(seq, np.zeros((48, 64), np.uint8))
+            try:
+                decoded_seq, _ = result.get(timeout=60)
+            except ImportError:
+                # Without ZBar installed the worker fails, and get() re-raises its error
+                pass
+            else:
+                assert decoded_seq == seq
+            assert pool._free_slots.qsize() == 1
+    finally:
+        pool.close()
@@ -0,0 +1,95 @@
+import os
+
+import cv2
+import numpy as np
+
+from barcoder.core import writer as writer_module
+from barcoder.core.fingerprint import CaptureIndex, capture_name, dhash, hamming
+from barcoder.core.writer import CaptureWriter
+
+
+def make_image(seed):
+    return np.random.default_rng(seed).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+
+
+def test_dhash_is_stable_under_recompression():
+    image = cv2.GaussianBlur(make_image(1), (9, 9), 0)
+    reencoded = cv2.imdecode(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 70])[1], cv2.IMREAD_COLOR)
+    assert hamming(dhash(image), dhash(reencoded)) <= 5
+    assert hamming(dhash(image), dhash(make_image(2))) > 5
+
+
+def test_claim_versions_new_captures_and_skips_repeats(tmp_path):
+    index = CaptureIndex(max_distance=5)
+    path = str(tmp_path / "123.jpg")
+
+    assert index.claim(path, 0) == (path, None)
+    assert index.claim(path, 0xFFFFFFFF) == (str(tmp_path / "123~v2.jpg"), None)
+    assert index.claim(path, 1) == (None, path)
+
+
+def test_existing_captures_are_loaded(tmp_path):
+    image = make_image(3)
+    cv2.imwrite(str(tmp_path / "123.jpg"), image)
+    cv2.imwrite(str(tmp_path / "123~v4.jpg"), make_image(4))
+
+    index = CaptureIndex(max_distance=5)
+    path = str(tmp_path / "123.jpg")
+    assert index.claim(path, dhash(make_image(5))) == (str(tmp_path / "123~v5.jpg"), None)
+
+
+def test_a_barcode_ending_like_a_version_is_its_own_barcode(tmp_path):
+    image = cv2.GaussianBlur(make_image(7), (9, 9), 0)
+    cv2.imwrite(str(tmp_path / "ABC_v2.jpg"), image)
+    cv2.imwrite(str(tmp_path / "ABC~v2.jpg"), make_image(8))
+
+    index = CaptureIndex(max_distance=5)
+    assert index.claim(str(tmp_path / "ABC.jpg"), dhash(image)) == (str(tmp_path / "ABC~v3.jpg"), None)
+    path = str(tmp_path / "ABC_v2.jpg")
+    assert index.claim(path, dhash(image)) == (None, path)
+
+
+def test_capture_name_replaces_the_version_separator():
+    assert capture_name("a/b\\c:d~v2") == "a_b_c_d_v2"
+
+
+def test_repeats_are_saved_as_versions_when_skipping_is_off(tmp_path):
+    index = CaptureIndex(max_distance=None)
+    path = str(tmp_path / "123.jpg")
+    assert index.claim(path, 0) == (path, None)
+    assert index.claim(path, 0) == (str(tmp_path / "123~v2.jpg"), None)
+
+
+def test_unclaim_frees_the_name(tmp_path):
+    index = CaptureIndex()
+    path = str(tmp_path / "123.jpg")
+    claimed, _ = index.claim(path, 0)
+    index.unclaim(path, claimed)
+    assert index.claim(path, 0) == (path, None)
+
+
+def test_failed_write_can_be_retried(tmp_path, monkeypatch):
+    saved, duplicates, errors = [], [], []
+    writer = CaptureWriter(
+        workers=1, index=CaptureIndex(), on_saved=saved.append,
+        on_duplicate=lambda path, earlier: duplicates.append(path),
+        on_error=lambda path, error: errors.append(error)
+    )
+    path = str(tmp_path / "123.jpg")
+    image = make_image(6)
+    write_atomic = writer_module.write_atomic
+
+    def fail(path, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(writer_module, "write_atomic", fail)
+    writer.submit(image, path)
+    writer._queue.join()
+    monkeypatch.setattr(writer_module, "write_atomic", write_atomic)
+    writer.submit(image, path)
+    writer.stop()
+
+    assert errors == ["disk full"]
+    assert duplicates == []
+    assert saved == [path]
+    assert os.listdir(tmp_path) == ["123.jpg"]
@@ -0,0 +1,130 @@
+import os
+import threading
+
+from barcoder.drive.backends import LocalMockBackend
+from barcoder.drive.journal import UploadJournal
+from barcoder.drive.sync import GoogleDriveSync
+
+
+def make_file(folder, name, data=b"data"):
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_replay_keeps_unfinished_uploads(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    a = make_file(tmp_path, "a.jpg")
+    b = make_file(tmp_path, "b.jpg", b"bb")
+    c = make_file(tmp_path, "c.jpg", b"ccc")
+
+    journal = UploadJournal(journal_path)
+    journal.queue([a, b, c])
+    journal.uploading(b, "md5-b")
+    journal.failed(c, "boom")
+    journal.done(["a.jpg"], {"a.jpg": "id-a"})
+    journal.close()
+
+    journal = UploadJournal(journal_path)
+    entries = {entry["name"]: entry for entry in journal.pending()}
+    assert sorted(entries) == ["b.jpg", "c.jpg"]
+    assert entries["c.jpg"]["error"] == "boom"
+    assert journal.interrupted == ["b.jpg"]
+    assert journal.backlog()["files"] == 2
+    assert journal.backlog()["bytes"] == 5
+    assert journal.backlog()["failed"] == 1
+    journal.close()
+
+
+def test_queue_ignores_queued_and_missing_files(tmp_path):
+    journal = UploadJournal(str(tmp_path / "journal.jsonl"))
+    a = make_file(tmp_path, "a.jpg")
+    journal.queue([a, str(tmp_path / "missing.jpg")])
+    journal.queue([a])
+    assert [entry["name"] for entry in journal.pending()] == ["a.jpg"]
+    journal.close()
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    journal = UploadJournal(journal_path)
+    journal.queue([make_file(tmp_path, "a.jpg")])
+    journal.close()
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"name":"b.jpg","sta')
+
+    journal = UploadJournal(journal_path)
+    assert [entry["name"] for entry in journal.pending()] == ["a.jpg"]
+    journal.close()
+
+
+def test_compaction_drops_finished_uploads(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    journal = UploadJournal(journal_path, compact_threshold=10)
+    paths = [make_file(tmp_path, f"{index}.jpg") for index in range(8)]
+    journal.queue(paths)
+    journal.done([os.path.basename(path) for path in paths[:6]])
+    # 14 lines written, more than the threshold and four times the 2 left
+    with open(journal_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    journal.close()
+
+    journal = UploadJournal(journal_path)
+    assert sorted(entry["name"] for entry in journal.pending()) == ["6.jpg", "7.jpg"]
+    journal.close()
+
+
+class BlockingBackend(LocalMockBackend):
+    """Mock backend whose uploads wait until released"""
+
+    def __init__(self, root):
+        super().__init__(root, latency=0)
+        self.started = threading.Event()
+        self.proceed = threading.Event()
+
+    def upload(self, file_path, folder_id=None):
+        self.started.set()
+        self.proceed.wait(5)
+        return super().upload(file_path, folder_id)
+
+
+def test_stop_does_not_wait_for_uploads(tmp_path):
+    folder = tmp_path / "images"
+    folder.mkdir()
+    b = make_file(str(folder), "b.jpg")
+    c = make_file(str(folder), "c.jpg")
+    backend = BlockingBackend(str(tmp_path / "remote"))
+    options = dict(
+        folder_path=str(folder), manifest_path=str(tmp_path / "manifest.sqlite3"),
+        journal_path=str(tmp_path / "journal.jsonl"), watch=False, backend=backend, upload_workers=1
+    )
+    sync = GoogleDriveSync(**options)
+    sync.authenticated = True
+    folder_id = sync.get_folder_id()
+    uploader = threading.Thread(target=sync.upload_files, args=([b, c], folder_id))
+    uploader.start()
+    assert backend.started.wait(5)
+
+    stopper = threading.Thread(target=sync.stop_sync_thread)
+    stopper.start()
+    stopper.join(1)
+    assert not stopper.is_alive()
+
+    # The upload in flight is interrupted and the one not started is still queued
+    restarted = GoogleDriveSync(**options)
+    assert restarted.journal.interrupted == ["b.jpg"]
+    assert {entry["name"]: entry["state"] for entry in restarted.journal.pending()} == {
+        "b.jpg": "uploading", "c.jpg": "queued"
+    }
+
+    # Finishing after the stop writes nothing to the closed journal or manifest
+    backend.proceed.set()
+    uploader.join(5)
+    assert not uploader.is_alive()
+    assert len(restarted.journal.pending()) == 2
+    restarted.stop_sync_thread()
+
+    journal = UploadJournal(options["journal_path"])
+    assert journal.interrupted == ["b.jpg"]
+    journal.close()
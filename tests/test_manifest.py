@@ -0,0 +1,60 @@
+import hashlib
+
+from barcoder.drive.manifest import SyncManifest, file_md5
+
+
+def test_file_md5(tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"x" * 3000)
+    assert file_md5(str(path), block_size=1024) == hashlib.md5(b"x" * 3000).hexdigest()
+
+
+def test_records_are_kept_per_folder(tmp_path):
+    manifest = SyncManifest(str(tmp_path / "manifest.sqlite3"))
+    manifest.record("folder", "a.jpg", 10, 1.5, "md5-a", "id-a", uploaded_at=100.0)
+    manifest.record("folder", "b.jpg", 20, 2.5, "md5-b", "id-b")
+    manifest.record("other", "c.jpg", 30, 3.5, "md5-c", "id-c")
+
+    files = manifest.files("folder")
+    assert sorted(files) == ["a.jpg", "b.jpg"]
+    assert files["a.jpg"] == {"size": 10, "mtime": 1.5, "md5": "md5-a", "drive_id": "id-a", "uploaded_at": 100.0}
+    assert manifest.known("folder", ["a.jpg", "c.jpg", "d.jpg"]) == {"a.jpg"}
+    assert manifest.known("folder", []) == set()
+    assert list(manifest.records("folder", ["b.jpg", "c.jpg"])) == ["b.jpg"]
+
+    manifest.forget("folder", ["a.jpg"])
+    assert list(manifest.files("folder")) == ["b.jpg"]
+    manifest.close()
+
+
+def test_record_replaces_the_previous_one(tmp_path):
+    manifest = SyncManifest(str(tmp_path / "manifest.sqlite3"))
+    manifest.record("folder", "a.jpg", 10, 1.5, "md5-a", "id-a")
+    manifest.record("folder", "a.jpg", 11, 2.5, "md5-a2", "id-a")
+    assert manifest.files("folder")["a.jpg"]["md5"] == "md5-a2"
+    manifest.close()
+
+
+def test_files_sharing_content(tmp_path):
+    manifest = SyncManifest(str(tmp_path / "manifest.sqlite3"))
+    manifest.record("folder", "a.jpg", 10, 1.5, "same", "id-a")
+    manifest.record("folder", "b.jpg", 10, 1.5, "same", "id-a")
+    assert manifest.find_md5("folder", "same") in [("a.jpg", "id-a"), ("b.jpg", "id-a")]
+    assert manifest.find_md5("other", "same") is None
+    assert manifest.drive_id_users("folder", "id-a") == 2
+    manifest.close()
+
+
+def test_meta_survives_reopening(tmp_path):
+    path = str(tmp_path / "manifest.sqlite3")
+    manifest = SyncManifest(path)
+    manifest.set_meta("folder_id:Images", "abc")
+    manifest.set_meta("last_reconcile:Images", 12.5)
+    manifest.close()
+
+    manifest = SyncManifest(path)
+    assert manifest.get_meta("folder_id:Images") == "abc"
+    assert float(manifest.get_meta("last_reconcile:Images")) == 12.5
+    manifest.set_meta("folder_id:Images", None)
+    assert manifest.get_meta("folder_id:Images", "missing") == "missing"
+    manifest.close()
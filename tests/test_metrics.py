@@ -0,0 +1,169 @@
+import json
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+from barcoder.core.metrics import Counter, Gauge, Histogram, LatencyWindow, MetricsExporter, MetricsRegistry, quantile
+
+
+def test_quantile_interpolates_within_the_bucket():
+    buckets = (1.0, 2.0, 4.0)
+    assert quantile(buckets, [2, 2, 0, 0], 0.5) == 1.0
+    assert quantile(buckets, [2, 2, 0, 0], 0.75) == 1.5
+    assert quantile(buckets, [2, 2, 0, 0], 1.0) == 2.0
+    assert quantile(buckets, [0, 0, 4, 0], 0.25) == 2.5
+
+
+def test_quantile_edge_cases():
+    assert quantile((1.0, 2.0), [0, 0, 0], 0.5) is None
+    # Nothing to interpolate towards above the last bound
+    assert quantile((1.0, 2.0), [0, 0, 3], 0.5) == 2.0
+
+
+def test_counter_and_gauge():
+    counter = Counter()
+    counter.inc()
+    counter.inc(4)
+    assert counter.value == 5
+    counter.set(2)
+    assert counter.value == 2
+
+    gauge = Gauge()
+    gauge.set(7)
+    assert gauge.value == 7
+
+
+def test_histogram_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(seconds)
+    # A value on a bound belongs to that bound's bucket, as le means less or equal
+    assert histogram.counts() == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(3.65)
+    assert histogram.quantile(0.5) == 0.1
+
+    with histogram.time():
+        pass
+    assert histogram.count == 5
+
+
+def test_latency_window_covers_new_observations_only():
+    histogram = Histogram(buckets=(1.0, 2.0))
+    histogram.observe(0.5)
+    window = LatencyWindow(histogram)
+    histogram.observe(1.5)
+    histogram.observe(1.5)
+    assert window.quantiles(0.5, 1.0) == [1.5, 2.0]
+    assert window.quantiles(0.5) == [None]
+
+
+def test_same_series_is_the_same_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("errors_total", operation="a") is registry.counter("errors_total", operation="a")
+    assert registry.counter("errors_total", operation="a") is not registry.counter("errors_total", operation="b")
+    with pytest.raises(ValueError):
+        registry.gauge("errors_total")
+
+
+def test_collectors(capsys):
+    registry = MetricsRegistry()
+    registry.register_collector("queue", lambda r: r.gauge("depth").set(1))
+    registry.register_collector("queue", lambda r: r.gauge("depth").set(2))
+    registry.register_collector("broken", lambda r: 1 / 0)
+    registry.collect()
+    assert registry.gauge("depth").value == 2
+    assert "Metrics collector failed" in capsys.readouterr().out
+
+    registry.unregister_collector("queue")
+    registry.gauge("depth").set(0)
+    registry.collect()
+    assert registry.gauge("depth").value == 0
+
+
+def test_total_sums_every_label():
+    registry = MetricsRegistry()
+    registry.counter("frames_total", camera="0").inc(3)
+    registry.counter("frames_total", camera="1").inc(4)
+    assert registry.total("frames_total") == 7
+    assert registry.total("missing") == 0
+
+
+def make_registry():
+    registry = MetricsRegistry()
+    registry.gauge("depth", "Queue depth").set(3)
+    registry.counter("errors_total", "Failed operations", operation='say "hi"\n').inc(2)
+    registry.counter("errors_total", operation="a\\b").inc()
+    histogram = registry.histogram("latency_seconds", buckets=(0.1, 1.0), stage="decode")
+    for seconds in (0.25, 0.5, 2.0):
+        histogram.observe(seconds)
+    return registry
+
+
+def test_prometheus_output():
+    assert make_registry().to_prometheus() == (
+        "# HELP depth Queue depth\n"
+        "# TYPE depth gauge\n"
+        "depth 3\n"
+        "# HELP errors_total Failed operations\n"
+        "# TYPE errors_total counter\n"
+        'errors_total{operation="a\\\\b"} 1\n'
+        'errors_total{operation="say \\"hi\\"\\n"} 2\n'
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{stage="decode",le="0.1"} 0\n'
+        'latency_seconds_bucket{stage="decode",le="1.0"} 2\n'
+        'latency_seconds_bucket{stage="decode",le="+Inf"} 3\n'
+        'latency_seconds_sum{stage="decode"} 2.75\n'
+        'latency_seconds_count{stage="decode"} 3\n'
+    )
+
+
+def test_json_output():
+    data = json.loads(make_registry().to_json())
+    metrics = data["metrics"]
+    assert metrics["depth"] == {"type": "gauge", "help": "Queue depth", "series": [{"labels": {}, "value": 3}]}
+    assert [series["value"] for series in metrics["errors_total"]["series"]] == [1, 2]
+    histogram = metrics["latency_seconds"]["series"][0]
+    assert histogram["labels"] == {"stage": "decode"}
+    assert histogram["value"] == {
+        "count": 3, "sum": 2.75, "buckets": {"0.1": 0, "1.0": 2, "+Inf": 1}, "p50": pytest.approx(0.775), "p95": 1.0
+    }
+
+
+def test_exporter_from_settings():
+    assert MetricsExporter.from_settings({}) is None
+    exporter = MetricsExporter.from_settings({"metrics_export_path": "metrics.prom", "metrics_export_format": "json"})
+    assert (exporter.path, exporter.file_format, exporter.port) == ("metrics.prom", "json", 0)
+
+
+def test_exporter_writes_the_file_on_stop(tmp_path):
+    path = tmp_path / "metrics.prom"
+    exporter = MetricsExporter(make_registry(), path=str(path), interval=60)
+    exporter.start()
+    exporter.stop()
+    assert path.read_text() == make_registry().to_prometheus()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_exporter_serves_metrics():
+    exporter = MetricsExporter(make_registry(), port=free_port())
+    exporter.start()
+    try:
+        base = f"http://127.0.0.1:{exporter.port}"
+        with urllib.request.urlopen(base + "/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read().decode() == make_registry().to_prometheus()
+        with urllib.request.urlopen(base + "/metrics.json", timeout=5) as response:
+            assert "depth" in json.loads(response.read())["metrics"]
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(base + "/other", timeout=5)
+        assert error.value.code == 404
+    finally:
+        exporter.stop()
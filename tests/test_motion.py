@@ -0,0 +1,82 @@
+import numpy as np
+
+from barcoder.core import motion
+from barcoder.core.motion import ChangeGate
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def scene(seed=0):
+    image = np.zeros((480, 640, 3), np.uint8)
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        x, y = rng.integers(0, 600), rng.integers(0, 440)
+        image[y:y + 40, x:x + 40] = rng.integers(0, 256, 3)
+    return image
+
+
+def test_first_frame_always_passes():
+    gate = ChangeGate()
+    assert gate.changed(scene()) is True
+    assert (gate.passed, gate.skipped) == (1, 0)
+
+
+def test_identical_frames_are_skipped():
+    gate = ChangeGate(threshold=4.0, refresh_interval=0)
+    image = scene()
+    gate.changed(image)
+    assert gate.changed(image.copy()) is False
+    assert gate.changed(image.copy()) is False
+    assert gate.skipped == 2
+
+
+def test_sensor_noise_stays_under_the_threshold():
+    gate = ChangeGate(threshold=4.0, refresh_interval=0)
+    image = scene()
+    gate.changed(image)
+    rng = np.random.default_rng(1)
+    noisy = np.clip(image.astype(np.int16) + rng.integers(-3, 4, image.shape), 0, 255).astype(np.uint8)
+    assert gate.changed(noisy) is False
+
+
+def test_clearly_changed_frames_pass():
+    gate = ChangeGate(threshold=4.0, refresh_interval=0)
+    gate.changed(scene(0))
+    assert gate.changed(scene(1)) is True
+    assert gate.passed == 2
+
+
+def test_slow_drift_accumulates_against_the_last_passed_frame():
+    gate = ChangeGate(threshold=4.0, refresh_interval=0)
+    image = np.full((480, 640), 100, np.uint8)
+    gate.changed(image)
+    results = [gate.changed(np.full((480, 640), 100 + step, np.uint8)) for step in range(1, 6)]
+    # Each frame is only 1 level brighter than the previous one, but the fifth is 5 from the reference
+    assert results == [False, False, False, True, False]
+
+
+def test_unchanged_scene_is_let_through_after_the_refresh_interval(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(motion.time, "monotonic", clock)
+    gate = ChangeGate(refresh_interval=5.0)
+    image = scene()
+    assert gate.changed(image) is True
+    clock.now += 4.9
+    assert gate.changed(image) is False
+    clock.now += 0.1
+    assert gate.changed(image) is True
+    clock.now += 1.0
+    assert gate.changed(image) is False
+
+
+def test_frame_size_change_passes():
+    gate = ChangeGate(refresh_interval=0, size=(64, 48))
+    gate.changed(scene())
+    gate.size = (32, 24)
+    assert gate.changed(scene()) is True
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import numpy as np
+
+from barcoder.core.pipeline import DecodeThread, DropOldestQueue, Frame, FramePipeline, release_frame
+from barcoder.core.ring import FrameRing
+
+
+def test_put_drops_the_oldest_item_when_full():
+    dropped = []
+    frame_queue = DropOldestQueue(maxsize=2, on_drop=dropped.append)
+    assert frame_queue.put(1) is False
+    assert frame_queue.put(2) is False
+    assert frame_queue.put(3) is True
+    assert dropped == [1]
+    assert frame_queue.dropped == 1
+    assert frame_queue.qsize() == 2
+    assert frame_queue.get() == 2
+    assert frame_queue.get_nowait() == 3
+    assert frame_queue.get_nowait() is None
+
+
+def test_get_times_out_when_empty():
+    assert DropOldestQueue().get(timeout=0.01) is None
+
+
+def test_close_wakes_waiting_consumers_and_drops_queued_items():
+    dropped = []
+    frame_queue = DropOldestQueue(maxsize=2, on_drop=dropped.append)
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(frame_queue.get(timeout=5)))
+    consumer.start()
+    frame_queue.close()
+    consumer.join(1)
+    assert not consumer.is_alive()
+    assert results == [None]
+
+    frame_queue = DropOldestQueue(maxsize=2, on_drop=dropped.append)
+    frame_queue.put("a")
+    frame_queue.put("b")
+    frame_queue.close()
+    assert dropped == ["a", "b"]
+    assert frame_queue.get(timeout=5) is None
+
+
+class FakeCamera:
+    """Camera that fills the buffer it is given with a counter, like cv2.VideoCapture.read(image)"""
+
+    def __init__(self, delay=0.002):
+        self.delay = delay
+        self.frames = 0
+
+    def read(self, image=None):
+        time.sleep(self.delay)
+        self.frames += 1
+        if image is None or image.shape != (48, 64, 3):
+            image = np.empty((48, 64, 3), np.uint8)
+        image[:] = self.frames % 256
+        return True, image
+
+    def grab(self):
+        time.sleep(self.delay)
+        return True
+
+
+def test_ring_reuses_released_slots():
+    ring = FrameRing(2)
+    first = ring.acquire()
+    second = ring.acquire()
+    assert ring.acquire() is None
+    assert ring.exhausted == 1
+
+    first.retain()
+    first.release()
+    assert ring.in_use() == 2
+    first.release()
+    assert ring.in_use() == 1
+    assert ring.acquire() is first
+    second.release()
+    first.release()
+    assert ring.in_use() == 0
+
+
+def test_ring_counts_new_buffers_only():
+    ring = FrameRing(1)
+    slot = ring.acquire()
+    image = np.zeros((4, 4), np.uint8)
+    ring.store(slot, image)
+    ring.store(slot, image)
+    assert ring.allocations == 1
+    slot.release()
+
+
+def test_pipeline_releases_every_slot():
+    decoded = []
+    held = []
+
+    def on_result(frame, barcodes):
+        decoded.append(frame.seq)
+        # Keep every fifth frame past the callback, as a capture would
+        if frame.seq % 5 == 0 and len(held) < 2:
+            frame.slot.retain()
+            held.append(frame)
+
+    pipeline = FramePipeline(FakeCamera(), lambda image: [], on_result, decode_threads=2, held_frames=2)
+    pipeline.start()
+    deadline = time.monotonic() + 5
+    rendered = 0
+    while rendered < 20 and time.monotonic() < deadline:
+        frame = pipeline.latest_frame()
+        if frame is None:
+            time.sleep(0.001)
+            continue
+        rendered += 1
+        release_frame(frame)
+    pipeline.stop()
+
+    assert rendered == 20
+    assert decoded
+    assert pipeline.ring.allocations <= pipeline.ring.size
+    assert pipeline.ring.in_use() == len(held)
+    for frame in held:
+        release_frame(frame)
+    assert pipeline.ring.in_use() == 0
+
+
+def test_put_after_close_drops_the_item():
+    dropped = []
+    frame_queue = DropOldestQueue(maxsize=2, on_drop=dropped.append)
+    frame_queue.close()
+    assert frame_queue.put("late") is True
+    assert dropped == ["late"]
+    assert frame_queue.qsize() == 0
+
+
+def test_decode_errors_are_counted_and_release_the_frame(capsys):
+    ring = FrameRing(2)
+    slot = ring.acquire()
+    frame_queue = DropOldestQueue(maxsize=1)
+    frame_queue.put(Frame(1, 0.0, np.zeros((4, 4), np.uint8), slot))
+    results = []
+
+    def decode(image):
+        raise RuntimeError("worker died")
+
+    thread = DecodeThread(frame_queue, decode, lambda frame, barcodes: results.append(barcodes),
+                          labels={"camera": "test-errors"})
+    errors = thread.errors.value
+    thread.start()
+    deadline = time.monotonic() + 5
+    while thread.errors.value == errors and time.monotonic() < deadline:
+        time.sleep(0.01)
+    thread.stop()
+    thread.join(1)
+
+    assert thread.errors.value == errors + 1
+    assert results == []
+    assert ring.in_use() == 0
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "worker died" in captured.err
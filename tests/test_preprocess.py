@@ -0,0 +1,81 @@
+from collections import namedtuple
+
+import numpy as np
+
+from barcoder.core.preprocess import Preprocessor, StageTimings
+
+Rect = namedtuple("Rect", "left top width height")
+Point = namedtuple("Point", "x y")
+Decoded = namedtuple("Decoded", "data type rect polygon")
+
+
+def scaled_decoder(calls):
+    """Reports one barcode at full-resolution (400, 300, 200, 100), in the coordinates of the image it gets"""
+
+    def decode(image):
+        calls.append(image.shape)
+        scale = image.shape[1] / 1280
+        left, top = round(400 * scale), round(300 * scale)
+        width, height = round(200 * scale), round(100 * scale)
+        polygon = [Point(left, top), Point(left + width, top + height)]
+        return [Decoded(b"123", "EAN13", Rect(left, top, width, height), polygon)]
+    return decode
+
+
+def test_downscaled_results_are_mapped_back_to_full_resolution():
+    calls = []
+    preprocessor = Preprocessor(scale=0.5)
+    barcodes = preprocessor.decode(np.zeros((720, 1280), np.uint8), scaled_decoder(calls))
+    assert calls == [(360, 640)]
+    assert barcodes[0].rect == Rect(400, 300, 200, 100)
+    assert barcodes[0].polygon == [Point(400, 300), Point(600, 400)]
+
+
+def test_non_integer_scale_maps_back_within_a_pixel():
+    preprocessor = Preprocessor(scale=0.3)
+    rect = preprocessor.decode(np.zeros((720, 1280), np.uint8), scaled_decoder([]))[0].rect
+    assert abs(rect.left - 400) <= 2 and abs(rect.top - 300) <= 2
+    assert abs(rect.width - 200) <= 2 and abs(rect.height - 100) <= 2
+
+
+def test_miss_is_retried_at_native_resolution():
+    calls = []
+
+    def decode(image):
+        calls.append(image.shape)
+        return ["found"] if image.shape == (720, 1280) else []
+
+    preprocessor = Preprocessor(scale=0.5)
+    assert preprocessor.decode(np.zeros((720, 1280), np.uint8), decode) == ["found"]
+    assert calls == [(360, 640), (720, 1280)]
+    assert preprocessor.retries == 1
+
+    calls.clear()
+    preprocessor = Preprocessor(scale=0.5, retry_native=False)
+    assert preprocessor.decode(np.zeros((720, 1280), np.uint8), decode) == []
+    assert calls == [(360, 640)]
+
+
+def test_full_scale_passes_the_image_through():
+    image = np.zeros((10, 10), np.uint8)
+    assert Preprocessor(scale=1.0).decode(image, lambda frame: [frame]) == [image]
+
+
+def test_to_gray_reuses_its_buffer():
+    preprocessor = Preprocessor()
+    image = np.full((48, 64, 3), 100, np.uint8)
+    first = preprocessor.to_gray(image)
+    second = preprocessor.to_gray(image)
+    assert first.shape == (48, 64) and first is second
+    assert (first == 100).all()
+    gray = np.zeros((4, 4), np.uint8)
+    assert preprocessor.to_gray(gray) is gray
+    assert Preprocessor(grayscale=False).to_gray(image) is image
+
+
+def test_stage_timings_are_smoothed():
+    timings = StageTimings(smoothing=0.5)
+    timings.record("decode", 0.010)
+    timings.record("decode", 0.020)
+    assert abs(timings.averages_ms()["decode"] - 15.0) < 1e-9
+    assert timings.summary() == "decode 15.0 ms"
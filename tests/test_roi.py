@@ -0,0 +1,120 @@
+from collections import namedtuple
+
+import numpy as np
+
+from barcoder.core.roi import RoiTracker, offset_barcodes
+
+Rect = namedtuple("Rect", "left top width height")
+Point = namedtuple("Point", "x y")
+Decoded = namedtuple("Decoded", "data type rect polygon")
+
+
+def barcode(left, top, width, height):
+    polygon = [Point(left, top), Point(left + width, top), Point(left + width, top + height)]
+    return Decoded(b"123", "EAN13", Rect(left, top, width, height), polygon)
+
+
+class FakeDecoder:
+    """Reports a barcode at a fixed position of a frame if it lies inside the crop it is given"""
+
+    def __init__(self, rect, frame):
+        self.rect = rect
+        self.frame = frame
+        self.calls = []
+
+    def __call__(self, image):
+        self.calls.append(image.shape)
+        # Crops are views into the frame, so their offset gives their origin
+        offset = image.__array_interface__["data"][0] - self.frame.__array_interface__["data"][0]
+        dy, dx = divmod(offset, self.frame.strides[0])
+        left, top, width, height = self.rect
+        inside = (left >= dx and top >= dy
+                  and left + width <= dx + image.shape[1] and top + height <= dy + image.shape[0])
+        return [barcode(left - dx, top - dy, width, height)] if inside else []
+
+
+def test_offset_barcodes_moves_rects_and_polygons():
+    moved = offset_barcodes([barcode(10, 20, 30, 40)], 100, 200)
+    assert moved[0].rect == Rect(110, 220, 30, 40)
+    assert moved[0].polygon[0] == Point(110, 220)
+    assert moved[0].data == b"123"
+
+
+def test_offset_barcodes_scales_before_offsetting():
+    moved = offset_barcodes([barcode(10, 20, 30, 40)], 5, 0, scale=2.0)
+    assert moved[0].rect == Rect(25, 40, 60, 80)
+    assert moved[0].polygon[2] == Point(85, 120)
+
+
+def test_offset_barcodes_without_change_returns_the_input():
+    barcodes = [barcode(1, 2, 3, 4)]
+    assert offset_barcodes(barcodes, 0, 0) is barcodes
+
+
+def test_tracked_region_is_padded():
+    tracker = RoiTracker(padding=0.5, min_padding=10)
+    tracker._track([barcode(100, 100, 100, 40)], (480, 640))
+    assert tracker._region == (50, 80, 250, 160)
+
+
+def test_tracked_region_is_clamped_to_the_frame():
+    tracker = RoiTracker(padding=0.5, min_padding=32)
+    tracker._track([barcode(5, 440, 100, 30), barcode(600, 10, 30, 20)], (480, 640))
+    assert tracker._region == (0, 0, 640, 480)
+
+    tracker._track([barcode(600, 450, 40, 30)], (480, 640))
+    assert tracker._region == (568, 418, 640, 480)
+
+
+def test_crop_hits_are_returned_in_frame_coordinates():
+    image = np.zeros((480, 640), np.uint8)
+    decode = FakeDecoder((300, 200, 80, 40), image)
+    tracker = RoiTracker(padding=0.5, full_scan_interval=15, min_padding=16)
+
+    first = tracker.decode(image, decode)
+    assert first[0].rect == Rect(300, 200, 80, 40)
+    assert tracker.full_scans == 1
+
+    x0, y0, x1, y1 = tracker._region
+    second = tracker.decode(image, decode)
+    assert decode.calls[-1] == (y1 - y0, x1 - x0)
+    assert second[0].rect == Rect(300, 200, 80, 40)
+    assert second[0].polygon[0] == Point(300, 200)
+    assert tracker.roi_hits == 1
+
+
+def test_crop_miss_falls_back_to_a_full_scan():
+    image = np.zeros((480, 640), np.uint8)
+    tracker = RoiTracker()
+    tracker._track([barcode(10, 10, 20, 20)], image.shape)
+    full_scans = []
+    barcodes = tracker.decode(image, lambda crop: [], full_decode_fn=lambda frame: full_scans.append(1) or [])
+    assert barcodes == []
+    assert full_scans == [1]
+    assert tracker.roi_misses == 1
+    assert tracker._region is None
+
+
+def test_full_frame_is_rescanned_every_interval():
+    image = np.zeros((480, 640), np.uint8)
+    decode = FakeDecoder((300, 200, 80, 40), image)
+    tracker = RoiTracker(full_scan_interval=3, min_padding=16)
+    for _ in range(8):
+        assert tracker.decode(image, decode)[0].rect == Rect(300, 200, 80, 40)
+    full_frames = [shape for shape in decode.calls if shape == image.shape]
+    # Frames 1 and 5 scan the full frame; 2-4 and 6-8 use the crop
+    assert len(full_frames) == 2
+    assert tracker.full_scans == 2
+    assert tracker.roi_hits == 6
+
+
+def test_crop_at_the_frame_edge():
+    image = np.zeros((480, 640), np.uint8)
+    decode = FakeDecoder((600, 450, 40, 30), image)
+    tracker = RoiTracker(padding=0.5, min_padding=32)
+    tracker.decode(image, decode)
+    assert tracker._region == (568, 418, 640, 480)
+    barcodes = tracker.decode(image, decode)
+    assert decode.calls[-1] == (62, 72)
+    assert barcodes[0].rect == Rect(600, 450, 40, 30)
+    assert tracker.roi_hits == 1
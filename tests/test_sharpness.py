@@ -0,0 +1,108 @@
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from barcoder.core.pipeline import Frame
+from barcoder.core.ring import FrameRing
+from barcoder.core.sharpness import SharpnessHistory, barcode_region, sharpness
+
+Decoded = namedtuple("Decoded", "data type rect")
+
+
+def pattern(blur=0):
+    image = np.zeros((240, 320), np.uint8)
+    image[:, ::8] = 255
+    image[::8, :] = 255
+    if blur:
+        image = cv2.GaussianBlur(image, (0, 0), blur)
+    return image
+
+
+def make_frame(ring, seq, image):
+    slot = ring.acquire()
+    ring.store(slot, image)
+    return Frame(seq, float(seq), image, slot)
+
+
+def barcode(data, rect=(40, 40, 200, 120)):
+    return Decoded(data.encode(), "EAN13", rect)
+
+
+def test_blur_lowers_sharpness():
+    assert sharpness(pattern()) > sharpness(pattern(blur=2)) > sharpness(pattern(blur=6))
+    assert sharpness(pattern(), rect=(0, 0, 2, 2)) == 0.0
+
+
+def test_barcode_region_is_padded_and_clipped():
+    barcodes = [barcode("a", (10, 20, 100, 40)), barcode("b", (150, 30, 50, 50))]
+    assert barcode_region(barcodes, (480, 640), padding=0.0) == (10, 20, 190, 60)
+    assert barcode_region(barcodes, (70, 200), padding=0.25) == (0, 5, 200, 65)
+
+
+def test_best_returns_the_sharpest_frame_and_retains_it():
+    ring = FrameRing(6)
+    history = SharpnessHistory(max_frames=4, max_age=1.0)
+    # The sharp frame comes first, so the blurrier ones do not replace it
+    for seq, blur in enumerate([0, 3, 5], 1):
+        frame = make_frame(ring, seq, pattern(blur))
+        history.add(frame, [barcode("123")], now=seq * 0.1)
+        frame.slot.release()
+
+    best = history.best("123", now=0.35)
+    assert best.seq == 1
+    assert history.best("456", now=0.35) is None
+    history.clear()
+    # Only the caller's reference is left
+    assert ring.in_use() == 1
+    best.slot.release()
+    assert ring.in_use() == 0
+
+
+def test_dominated_frames_are_released_at_once():
+    ring = FrameRing(6)
+    history = SharpnessHistory(max_frames=4)
+    for seq, blur in enumerate([5, 3, 0], 1):
+        frame = make_frame(ring, seq, pattern(blur))
+        history.add(frame, [barcode("123")], now=seq * 0.1)
+        frame.slot.release()
+    assert ring.in_use() == 1
+    best = history.best("123", now=0.3)
+    assert best.seq == 3
+    best.slot.release()
+    history.clear()
+    assert ring.in_use() == 0
+
+
+def test_frames_with_other_barcodes_are_kept():
+    ring = FrameRing(6)
+    history = SharpnessHistory(max_frames=4)
+    first = make_frame(ring, 1, pattern(3))
+    history.add(first, [barcode("123"), barcode("456", (60, 60, 100, 50))], now=0.0)
+    second = make_frame(ring, 2, pattern())
+    history.add(second, [barcode("123")], now=0.1)
+    first.slot.release()
+    second.slot.release()
+
+    assert ring.in_use() == 2
+    best = history.best("456", now=0.2)
+    assert best.seq == 1
+    best.slot.release()
+    history.clear()
+    assert ring.in_use() == 0
+
+
+def test_old_and_excess_frames_are_released():
+    ring = FrameRing(6)
+    history = SharpnessHistory(max_frames=2, max_age=1.0)
+    for seq, blur in enumerate([0, 1, 2], 1):
+        frame = make_frame(ring, seq, pattern(blur))
+        history.add(frame, [barcode("123")], now=seq * 0.1)
+        frame.slot.release()
+    assert ring.in_use() == 2
+    best = history.best("123", now=0.3)
+    assert best.seq == 2
+    best.slot.release()
+    assert history.best("123", now=5.0) is None
+    history.clear()
+    assert ring.in_use() == 0
@@ -0,0 +1,106 @@
+from collections import namedtuple
+
+from barcoder.core.stabilizer import AutoCaptureTrigger, BarcodeStabilizer, DedupCache
+
+Decoded = namedtuple("Decoded", "data type")
+
+A = Decoded(b"123", "EAN13")
+B = Decoded(b"456", "EAN13")
+
+
+def test_barcode_is_reported_once_it_is_stable():
+    stabilizer = BarcodeStabilizer(window=5, min_hits=3)
+    assert stabilizer.update([A], timestamp=1.0) == []
+    assert stabilizer.update([A], timestamp=2.0) == []
+    events = stabilizer.update([A, A], timestamp=3.0)
+    assert [(event.data, event.type, event.timestamp) for event in events] == [("123", "EAN13", 3.0)]
+    assert events[0].confidence == 3 / 5
+    assert stabilizer.update([A]) == []
+
+
+def test_single_misreads_never_get_through():
+    stabilizer = BarcodeStabilizer(window=5, min_hits=3)
+    events = []
+    for frame in [[A], [B], [A], [], [A]]:
+        events += stabilizer.update(frame)
+    assert [event.data for event in events] == ["123"]
+
+
+def test_barcode_is_reported_again_after_leaving_the_window():
+    stabilizer = BarcodeStabilizer(window=3, min_hits=2)
+    events = []
+    for frame in [[A], [A], [], [], [], [A], [A]]:
+        events += stabilizer.update(frame)
+    assert [event.data for event in events] == ["123", "123"]
+
+
+def test_dedup_cache_suppresses_within_the_window():
+    cache = DedupCache(window=2.0)
+    assert cache.seen("a", now=0.0) is False
+    assert cache.seen("a", now=1.5) is True
+    # Seeing it again refreshes the window
+    assert cache.seen("a", now=3.0) is True
+    assert cache.seen("a", now=5.5) is False
+    assert cache.suppressed == 2
+
+
+def test_dedup_cache_evicts_least_recently_used():
+    cache = DedupCache(window=10.0, max_size=2)
+    cache.seen("a", now=0.0)
+    cache.seen("b", now=1.0)
+    cache.seen("a", now=2.0)
+    cache.seen("c", now=3.0)
+    assert len(cache) == 2
+    assert cache.seen("b", now=4.0) is False
+    cache.forget("c")
+    assert cache.seen("c", now=5.0) is False
+
+
+def test_auto_capture_triggers_after_enough_frames_and_time():
+    trigger = AutoCaptureTrigger(min_frames=3, min_seconds=0.2, cooldown=10.0)
+    assert trigger.update([A], now=0.0) == []
+    assert trigger.update([A], now=0.1) == []
+    # Three reads, but only 0.15 s in view
+    assert trigger.update([A], now=0.15) == []
+    assert trigger.update([A], now=0.2) == ["123"]
+    assert trigger.triggered == 1
+
+
+def test_auto_capture_tolerates_short_gaps():
+    trigger = AutoCaptureTrigger(min_frames=3, max_misses=1)
+    assert trigger.update([A], now=0.0) == []
+    assert trigger.update([], now=0.1) == []
+    assert trigger.update([A], now=0.2) == []
+    assert trigger.update([A], now=0.3) == ["123"]
+
+    trigger = AutoCaptureTrigger(min_frames=3, max_misses=1)
+    trigger.update([A], now=0.0)
+    trigger.update([], now=0.1)
+    trigger.update([], now=0.2)
+    trigger.update([A], now=0.3)
+    assert trigger.update([A], now=0.4) == []
+
+
+def test_auto_capture_cools_down_across_cameras():
+    trigger = AutoCaptureTrigger(min_frames=2, cooldown=1.0)
+    trigger.update([A], source=1, now=0.0)
+    trigger.update([A], source=0, now=0.0)
+    assert trigger.update([A], source=0, now=0.1) == ["123"]
+    # The other camera's streak is covered by the capture
+    assert trigger.update([A], source=1, now=0.2) == []
+    # Still in view, so the cooldown keeps being extended
+    for now in [0.5, 1.0, 1.5, 2.0]:
+        assert trigger.update([A], now=now) == []
+    trigger.update([], now=3.1)
+    trigger.update([A], now=3.2)
+    assert trigger.update([A], now=3.3) == ["123"]
+
+
+def test_auto_capture_forget_allows_an_immediate_retry():
+    trigger = AutoCaptureTrigger(min_frames=1, cooldown=10.0)
+    assert trigger.update([A], now=0.0) == ["123"]
+    assert trigger.update([A], now=0.1) == []
+    trigger.forget("123")
+    assert trigger.update([A], now=0.2) == ["123"]
+    trigger.reset()
+    assert trigger.update([A], now=0.3) == ["123"]
@@ -0,0 +1,66 @@
+import io
+
+from barcoder.core import startup
+from barcoder.core.metrics import REGISTRY
+from barcoder.core.startup import StartupProfiler
+
+
+def test_stages_are_timed_even_when_they_fail():
+    profiler = StartupProfiler()
+    with profiler.stage("settings"):
+        pass
+    try:
+        with profiler.stage("camera"):
+            raise RuntimeError("no camera")
+    except RuntimeError:
+        pass
+    assert [name for name, _ in profiler.stages] == ["settings", "camera"]
+    assert all(duration >= 0 for _, duration in profiler.stages)
+
+
+def test_only_the_first_frame_counts(monkeypatch):
+    times = iter([1500.0, 9000.0])
+    monkeypatch.setattr(StartupProfiler, "elapsed_ms", staticmethod(lambda: next(times)))
+    profiler = StartupProfiler(budget_ms=2000)
+    with profiler.stage("window"):
+        pass
+    profiler.first_frame()
+    profiler.first_frame()
+
+    assert profiler.first_frame_ms == 1500.0
+    assert not profiler.over_budget()
+    assert REGISTRY.gauge("barcoder_time_to_first_frame_seconds").value == 1.5
+    assert REGISTRY.gauge("barcoder_startup_stage_seconds", stage="window").value >= 0
+
+
+def test_over_budget_is_reported_on_stderr(monkeypatch, capsys):
+    monkeypatch.setattr(StartupProfiler, "elapsed_ms", staticmethod(lambda: 2500.0))
+    profiler = StartupProfiler(budget_ms=2000)
+    profiler.first_frame()
+    captured = capsys.readouterr()
+    assert profiler.over_budget()
+    assert captured.out == ""
+    assert "Time to first frame 2500 ms exceeds the 2000 ms budget" in captured.err
+
+
+def test_verbose_report(monkeypatch, capsys):
+    monkeypatch.setattr(StartupProfiler, "elapsed_ms", staticmethod(lambda: 2500.0))
+    profiler = StartupProfiler(budget_ms=2000, verbose=True)
+    profiler.stages.append(("imports", 120.0))
+    profiler.first_frame()
+    err = capsys.readouterr().err
+    assert "imports" in err and "120.0 ms" in err
+    assert "(budget 2000 ms, over)" in err
+
+
+def test_report_without_a_first_frame():
+    profiler = StartupProfiler()
+    profiler.stages.append(("imports", 1.0))
+    stream = io.StringIO()
+    profiler.report(file=stream)
+    assert stream.getvalue().splitlines() == ["Start-up timings:", "  imports                           1.0 ms"]
+
+
+def test_elapsed_is_measured_from_process_start(monkeypatch):
+    monkeypatch.setattr(startup, "PROCESS_START", startup.time.perf_counter() - 1)
+    assert 1000 <= StartupProfiler.elapsed_ms() < 2000
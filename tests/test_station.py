@@ -0,0 +1,54 @@
+from collections import namedtuple
+
+from barcoder.core import station as station_module
+from barcoder.core.station import ScanStation, camera_settings
+
+Decoded = namedtuple("Decoded", "data type rect")
+
+
+class ClosedCamera:
+    """Camera stand-in for stations that are never started"""
+
+    def isOpened(self):
+        return False
+
+
+def make_station(monkeypatch, settings, opened=None):
+    def camera_from_settings(config):
+        if opened is not None:
+            opened.append(config)
+        return ClosedCamera()
+
+    monkeypatch.setattr(station_module, "camera_from_settings", camera_from_settings)
+    station = ScanStation(settings, on_result=lambda index, frame, barcodes: None)
+    station_module.REGISTRY.unregister_collector("station")
+    return station
+
+
+def test_camera_settings_default_to_one_camera():
+    configs = camera_settings({"camera_device": 2, "roi_tracking": True})
+    assert configs == [{"camera_device": 2, "roi_tracking": True, "name": "Camera 1"}]
+
+
+def test_camera_settings_override_the_top_level():
+    settings = {"camera_device": 0, "decode_scale": 1.0, "cameras": [{}, {"camera_device": 1, "name": "Side"}]}
+    configs = camera_settings(settings)
+    assert [config["camera_device"] for config in configs] == [0, 1]
+    assert [config["name"] for config in configs] == ["Camera 1", "Side"]
+    assert all(config["decode_scale"] == 1.0 and "cameras" not in config for config in configs)
+
+
+def test_each_camera_is_opened_with_its_own_device(monkeypatch):
+    opened = []
+    settings = {"camera_device": "/dev/video0", "cameras": [{}, {"camera_device": "/dev/video2"}]}
+    make_station(monkeypatch, settings, opened)
+    assert [config["camera_device"] for config in opened] == ["/dev/video0", "/dev/video2"]
+
+
+def test_barcode_seen_by_two_cameras_is_reported_once(monkeypatch):
+    settings = {"cameras": [{}, {}], "stabilizer_window": 1, "stabilizer_min_hits": 1, "dedup_window": 10.0}
+    station = make_station(monkeypatch, settings)
+    barcode = Decoded(b"123", "EAN13", (0, 0, 10, 10))
+    assert [event.data for event in station.barcode_events(0, [barcode])] == ["123"]
+    assert station.barcode_events(1, [barcode]) == []
+    assert station.dedup.suppressed == 1
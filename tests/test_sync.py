@@ -0,0 +1,95 @@
+import os
+import time
+
+from barcoder.drive.backends import LocalMockBackend, StorageError
+from barcoder.drive.sync import GoogleDriveSync
+
+
+def make_sync(tmp_path, backend=None, **options):
+    folder = tmp_path / "images"
+    folder.mkdir(exist_ok=True)
+    sync = GoogleDriveSync(
+        folder_path=str(folder), manifest_path=str(tmp_path / "manifest.sqlite3"),
+        journal_path=str(tmp_path / "journal.jsonl"), watch=False,
+        backend=backend or LocalMockBackend(str(tmp_path / "remote"), latency=0), **options
+    )
+    sync.authenticated = True
+    return sync
+
+
+def write(sync, name, data):
+    path = os.path.join(sync.folder_path, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_failed_update_is_uploaded_as_a_new_file_without_retries(tmp_path):
+    sync = make_sync(tmp_path, max_retries=0)
+    folder_id = sync.get_folder_id()
+    path = write(sync, "a.jpg", b"new content")
+
+    def update(file_id, file_path):
+        raise StorageError("File not found", status=404)
+
+    sync.backend.update = update
+    file_id = sync.upload_file(path, folder_id, file_id="deleted")
+    assert file_id is not None and file_id != "deleted"
+    assert os.listdir(os.path.join(str(tmp_path / "remote"), "BarcoderImages")) == ["a.jpg"]
+    sync.stop_sync_thread()
+
+
+def test_changed_file_is_uploaded_as_a_revision(tmp_path):
+    sync = make_sync(tmp_path)
+    folder_id = sync.get_folder_id()
+    path = write(sync, "a.jpg", b"first")
+    sync.sync_folder()
+    drive_id = sync.manifest.files(folder_id)["a.jpg"]["drive_id"]
+
+    write(sync, "a.jpg", b"second version")
+    os.utime(path, (1, 1))
+    sync.sync_folder()
+
+    record = sync.manifest.files(folder_id)["a.jpg"]
+    assert record["drive_id"] == drive_id
+    with open(os.path.join(str(tmp_path / "remote"), "BarcoderImages", "a.jpg"), "rb") as f:
+        assert f.read() == b"second version"
+    sync.stop_sync_thread()
+
+
+def test_identical_content_under_a_new_name_is_not_uploaded_again(tmp_path):
+    sync = make_sync(tmp_path)
+    folder_id = sync.get_folder_id()
+    write(sync, "a.jpg", b"same")
+    sync.sync_folder()
+    write(sync, "b.jpg", b"same")
+    sync.sync_folder()
+
+    files = sync.manifest.files(folder_id)
+    assert files["a.jpg"]["drive_id"] == files["b.jpg"]["drive_id"]
+    assert sync.backend.api_calls["upload"] == 1
+    sync.stop_sync_thread()
+
+
+def test_full_sync_runs_while_notifications_keep_arriving(tmp_path):
+    sync = make_sync(tmp_path, sync_interval=0.3, debounce=0.01)
+    calls = {"folder": 0, "files": 0}
+
+    def sync_folder():
+        calls["folder"] += 1
+
+    def sync_files(paths):
+        calls["files"] += 1
+
+    sync.sync_folder = sync_folder
+    sync.sync_files = sync_files
+    sync.start_sync_thread()
+    path = write(sync, "a.jpg", b"data")
+    deadline = time.monotonic() + 1
+    while time.monotonic() < deadline:
+        sync.notify_file(path)
+        time.sleep(0.05)
+    sync.stop_sync_thread()
+
+    assert calls["files"] > 5
+    assert calls["folder"] >= 3
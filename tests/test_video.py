@@ -0,0 +1,85 @@
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtGui = pytest.importorskip("PyQt5.QtGui")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+
+from barcoder.gui.video import DISPLAY_FORMAT, VideoWidget, format_latency  # noqa: E402
+
+Decoded = namedtuple("Decoded", "data type rect")
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def make_widget(width=320, height=240, scaling="smooth"):
+    widget = VideoWidget(scaling=scaling)
+    widget.resize(width, height)
+    return widget
+
+
+def gradient(width, height):
+    x = np.linspace(0, 255, width, dtype=np.uint8)
+    return np.dstack([np.tile(x, (height, 1))] * 3).copy()
+
+
+def test_frame_is_fitted_to_the_widget(app):
+    widget = make_widget()
+    widget.show_frame(gradient(640, 360))
+    assert widget._buffer.shape == (180, 320, 3)
+    assert (widget._image.width(), widget._image.height()) == (320, 180)
+    assert widget.rendered == 1
+
+
+def test_buffer_is_reused_until_the_size_changes(app):
+    widget = make_widget()
+    widget.show_frame(gradient(640, 480))
+    buffer, image = widget._buffer, widget._image
+    widget.show_frame(gradient(640, 480))
+    assert widget._buffer is buffer and widget._image is image
+
+    widget.resize(160, 120)
+    widget.show_frame(gradient(640, 480))
+    assert widget._buffer is not buffer
+    assert widget._buffer.shape == (120, 160, 3)
+
+
+def test_smooth_scaling_matches_a_direct_area_resize(app):
+    widget = make_widget(300, 200)
+    image = cv2.GaussianBlur(np.random.default_rng(0).integers(0, 256, (1200, 1800, 3), dtype=np.uint8), (15, 15), 0)
+    widget.show_frame(image)
+    expected = cv2.resize(image, (300, 200), interpolation=cv2.INTER_AREA)
+    if DISPLAY_FORMAT == QtGui.QImage.Format_RGB888:
+        expected = cv2.cvtColor(expected, cv2.COLOR_BGR2RGB)
+    # The whole-factor reduction goes through its own buffer
+    assert widget._reduced.shape == (200, 300, 3)
+    assert np.abs(widget._buffer.astype(int) - expected).mean() < 2
+
+
+def test_fast_scaling_samples_pixels(app):
+    widget = make_widget(4, 4, scaling="fast")
+    image = np.zeros((8, 8, 3), np.uint8)
+    image[::2, ::2] = 200
+    widget.show_frame(image)
+    assert set(np.unique(widget._buffer)) <= {0, 200}
+
+
+def test_barcodes_are_outlined_on_the_display_copy_only(app):
+    widget = make_widget(320, 240)
+    image = np.zeros((480, 640, 3), np.uint8)
+    widget.show_frame(image, [Decoded(b"1", "EAN13", (100, 100, 200, 100))])
+    assert not image.any()
+    assert widget._buffer[50, 75, 1] == 255
+    assert widget._buffer[75, 100].sum() == 0
+
+
+def test_format_latency():
+    assert format_latency(None, None) == "-"
+    assert format_latency(0.0125, 0.1) == "p50   12.5 ms  p95  100.0 ms"
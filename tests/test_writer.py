@@ -0,0 +1,149 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from barcoder.core import writer as writer_module
+from barcoder.core.writer import CaptureWriter, EncodingProfile, write_atomic
+
+
+def make_image():
+    return np.random.default_rng(0).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+
+
+def test_write_atomic_replaces_the_file(tmp_path):
+    path = str(tmp_path / "a.jpg")
+    write_atomic(path, b"first")
+    write_atomic(path, b"second")
+    with open(path, "rb") as f:
+        assert f.read() == b"second"
+    assert os.listdir(tmp_path) == ["a.jpg"]
+
+
+def test_write_atomic_leaves_no_temp_file_on_failure(tmp_path, monkeypatch):
+    path = str(tmp_path / "a.jpg")
+    write_atomic(path, b"old")
+
+    def fail(source, destination):
+        raise OSError("rename failed")
+
+    monkeypatch.setattr(writer_module.os, "replace", fail)
+    with pytest.raises(OSError):
+        write_atomic(path, b"new")
+    assert os.listdir(tmp_path) == ["a.jpg"]
+    with open(path, "rb") as f:
+        assert f.read() == b"old"
+
+
+def test_temp_files_are_hidden_from_the_sync(tmp_path, monkeypatch):
+    names = []
+    replace = os.replace
+
+    def record(source, destination):
+        names.append(os.path.basename(source))
+        replace(source, destination)
+
+    monkeypatch.setattr(writer_module.os, "replace", record)
+    write_atomic(str(tmp_path / "a.jpg"), b"data")
+    assert names[0].startswith(".") and not names[0].endswith(".jpg")
+
+
+def test_captures_are_saved_in_the_background(tmp_path):
+    saved = []
+    released = threading.Event()
+    writer = CaptureWriter(workers=1, on_saved=saved.append)
+    path = str(tmp_path / "sub" / "123.jpg")
+    assert writer.submit(make_image(), path, release=released.set) is True
+    writer.stop()
+
+    assert saved == [path]
+    assert released.is_set()
+    assert writer.saved == 1 and writer.pending() == 0
+    assert cv2.imread(path).shape == (120, 160, 3)
+
+
+def test_full_queue_refuses_captures(tmp_path):
+    writer = CaptureWriter(max_queue=1, workers=1)
+    encoding, block = threading.Event(), threading.Event()
+    encode = writer.profile.encode
+
+    def slow_encode(image, quality=None):
+        encoding.set()
+        block.wait(5)
+        return encode(image, quality)
+
+    writer.profile.encode = slow_encode
+    writer.submit(make_image(), str(tmp_path / "a.jpg"))
+    # The worker holds the first capture; the second fills the queue
+    assert encoding.wait(5)
+    assert writer.submit(make_image(), str(tmp_path / "b.jpg")) is True
+    assert writer.submit(make_image(), str(tmp_path / "c.jpg")) is False
+    block.set()
+    writer.stop()
+    assert sorted(os.listdir(tmp_path)) == ["a.jpg", "b.jpg"]
+
+
+def test_unknown_format_falls_back_to_jpeg(capsys):
+    profile = EncodingProfile(image_format="gif")
+    assert profile.image_format == "jpeg" and profile.extension == ".jpg"
+    assert "Unknown capture format" in capsys.readouterr().out
+
+
+def test_profile_from_settings():
+    profile = EncodingProfile.from_settings({"capture_format": "webp", "capture_quality": 80,
+                                             "capture_upload_max_size": 640})
+    assert (profile.image_format, profile.extension, profile.quality) == ("webp", ".webp", 80)
+    assert profile.upload_max_size == 640 and profile.upload_quality == 85
+    assert cv2.imdecode(profile.encode(make_image()), cv2.IMREAD_COLOR).shape == (120, 160, 3)
+
+
+def test_upload_copy_fits_the_maximum_size():
+    profile = EncodingProfile(upload_max_size=80)
+    assert profile.upload_copy(make_image()).shape == (60, 80, 3)
+    assert EncodingProfile(upload_max_size=200).upload_copy(make_image()) is None
+    assert EncodingProfile().upload_copy(make_image()) is None
+
+
+def test_downscaled_upload_keeps_the_original_in_the_archive(tmp_path):
+    writer = CaptureWriter(workers=1, profile=EncodingProfile(upload_max_size=80), compare_interval=1)
+    path = str(tmp_path / "123.jpg")
+    writer.submit(make_image(), path)
+    writer.stop()
+
+    assert cv2.imread(path).shape == (60, 80, 3)
+    assert cv2.imread(str(tmp_path / "archive" / "123.jpg")).shape == (120, 160, 3)
+    savings = writer.savings()
+    assert savings["captures"] == 1
+    assert savings["upload_bytes"] == os.path.getsize(path)
+    assert savings["disk_bytes"] == os.path.getsize(path) + os.path.getsize(tmp_path / "archive" / "123.jpg")
+    assert 0 < savings["upload_ratio"] < 1
+
+
+def test_savings_are_unknown_until_a_capture_is_compared(tmp_path):
+    writer = CaptureWriter(workers=1, compare_interval=0)
+    writer.submit(make_image(), str(tmp_path / "a.jpg"))
+    writer.stop()
+    assert writer.savings() is None
+
+
+def test_write_failure_is_reported_and_leaves_nothing_behind(tmp_path, monkeypatch, capsys):
+    errors = []
+    released = threading.Event()
+    writer = CaptureWriter(workers=1, on_saved=lambda path: pytest.fail("saved"),
+                           on_error=lambda path, error: errors.append((path, error)))
+
+    def disk_full(fd):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(writer_module.os, "fsync", disk_full)
+    path = str(tmp_path / "123.jpg")
+    writer.submit(make_image(), path, release=released.set)
+    writer.stop()
+
+    assert errors == [(path, "[Errno 28] No space left on device")]
+    assert writer.failed == 1 and writer.saved == 0
+    assert released.is_set()
+    assert os.listdir(tmp_path) == []
+    assert "Failed to save" in capsys.readouterr().out
@@ -0,0 +1,47 @@
+import pytest
+
+from barcoder.utils import zbar_finder
+
+
+def test_load_warnings_go_to_stderr(monkeypatch, capsys):
+    monkeypatch.setattr(zbar_finder, "resolve_zbar_library", lambda: None)
+    zbar_finder.load_zbar_library()
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "ZBar library not found" in captured.err
+
+
+def test_cache_failure_warning_goes_to_stderr(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(zbar_finder, "ZBAR_PATH_CACHE", str(tmp_path / "missing" / "zbar_path.txt"))
+    monkeypatch.setattr(zbar_finder, "CONFIG_DIR", str(tmp_path / "config.txt"))
+    (tmp_path / "config.txt").write_text("")
+    monkeypatch.setattr(zbar_finder, "find_zbar_library", lambda: "/lib/libzbar.so.0")
+
+    assert zbar_finder.resolve_zbar_library() == "/lib/libzbar.so.0"
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Failed to cache ZBar library path" in captured.err
+
+
+def test_cached_path_skips_the_search(tmp_path, monkeypatch):
+    cache = tmp_path / "zbar_path.txt"
+    cache.write_text("/lib/libzbar.so.0\n")
+    monkeypatch.setattr(zbar_finder, "ZBAR_PATH_CACHE", str(cache))
+    monkeypatch.setattr(zbar_finder.ctypes.cdll, "LoadLibrary", lambda path: None)
+    monkeypatch.setattr(zbar_finder, "find_zbar_library", lambda: pytest.fail("searched"))
+    assert zbar_finder.resolve_zbar_library() == "/lib/libzbar.so.0"
+
+
+def test_stale_cached_path_is_replaced(tmp_path, monkeypatch):
+    cache = tmp_path / "zbar_path.txt"
+    cache.write_text("/old/libzbar.so.0")
+    monkeypatch.setattr(zbar_finder, "ZBAR_PATH_CACHE", str(cache))
+    monkeypatch.setattr(zbar_finder, "CONFIG_DIR", str(tmp_path))
+
+    def load(path):
+        raise OSError(f"{path}: cannot open shared object file")
+
+    monkeypatch.setattr(zbar_finder.ctypes.cdll, "LoadLibrary", load)
+    monkeypatch.setattr(zbar_finder, "find_zbar_library", lambda: "/lib/libzbar.so.0")
+    assert zbar_finder.resolve_zbar_library() == "/lib/libzbar.so.0"
+    assert cache.read_text() == "/lib/libzbar.so.0"